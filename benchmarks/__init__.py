@@ -0,0 +1 @@
+"""cashlog 性能基准脚本"""
@@ -0,0 +1,185 @@
+"""
+异步服务事件循环响应基准测试
+
+在同一个事件循环中同时运行：
+- 心跳任务：每隔固定间隔唤醒一次，记录实际唤醒时间比预期晚了多少（事件循环延迟）
+- 写入任务：不断新增交易和待办事项、更新待办状态
+- 读取任务：不断执行月度报表、交易筛选和全文检索
+
+分别使用同步服务（直接在协程中调用）和 cashlog.aio 异步服务运行相同负载，
+对比心跳延迟的分布和完成的操作数。同步服务在等待数据库时会阻塞整个事件循环，
+异步服务只在Python侧处理结果时占用事件循环。
+
+用法:
+    PYTHONPATH=src python -m benchmarks.bench_async --rows 50000 --duration 5
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+from benchmarks.generator import LedgerGenerator, load_todos, load_transactions
+from cashlog.aio import (
+    AsyncReportService,
+    AsyncTodoService,
+    AsyncTransactionService,
+    create_async_db_engine,
+    create_async_session_factory,
+    init_async_db,
+)
+from cashlog.models.db import PRAGMA_PROFILES, create_db_engine
+from cashlog.services.report_service import ReportService
+from cashlog.services.todo_service import TodoService
+from cashlog.services.transaction_service import TransactionService
+from sqlalchemy.orm import sessionmaker
+
+# 心跳间隔（毫秒）
+HEARTBEAT_MS = 5.0
+
+# 读取任务轮流查询的月份和关键词
+READ_MONTHS = ["2022-03", "2022-11", "2023-06"]
+SEARCH_TERMS = ["午餐", "房租", "咖啡"]
+
+
+def _percentile(timings: List[float], ratio: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(int(len(ordered) * ratio), len(ordered) - 1)]
+
+
+def _seed(db_path: Path, rows: int, todos: int, seed: int, pragmas: Dict[str, Any]) -> None:
+    async def migrate():
+        async_engine = create_async_db_engine(db_path, pragmas)
+        await init_async_db(async_engine)
+        await async_engine.dispose()
+
+    asyncio.run(migrate())
+    engine = create_db_engine(db_path, pragmas)
+    with sessionmaker(bind=engine)() as db:
+        generator = LedgerGenerator(seed=seed)
+        load_transactions(db, generator.transactions(rows))
+        load_todos(db, generator.todos(todos))
+        ReportService.rebuild_rollups(db)
+        db.commit()
+    engine.dispose()
+
+
+async def _heartbeat(stop: asyncio.Event, lags: List[float]) -> None:
+    interval = HEARTBEAT_MS / 1000
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(time.perf_counter() - expected, 0.0) * 1000)
+
+
+async def _sync_writer(stop: asyncio.Event, session_factory, counter: Dict[str, int]) -> None:
+    with session_factory() as db:
+        while not stop.is_set():
+            TransactionService.create_transaction(db, {"amount": -18, "category": "餐饮", "notes": "午餐"})
+            todo = TodoService.create_todo(db, {"content": "基准待办", "category": "工作"})
+            TodoService.update_todo_status(db, todo.id, "done")
+            counter["writes"] += 3
+            await asyncio.sleep(0)
+
+
+async def _sync_reader(stop: asyncio.Event, session_factory, counter: Dict[str, int]) -> None:
+    with session_factory() as db:
+        index = 0
+        while not stop.is_set():
+            month = READ_MONTHS[index % len(READ_MONTHS)]
+            ReportService.generate_monthly_report(db, month)
+            TransactionService.get_transactions(db, month=month, transaction_type="expense")
+            TransactionService.search_transactions(db, SEARCH_TERMS[index % len(SEARCH_TERMS)])
+            db.rollback()
+            counter["reads"] += 3
+            index += 1
+            await asyncio.sleep(0)
+
+
+async def _async_writer(stop: asyncio.Event, session_factory, counter: Dict[str, int]) -> None:
+    async with session_factory() as db:
+        while not stop.is_set():
+            await AsyncTransactionService.create_transaction(db, {"amount": -18, "category": "餐饮", "notes": "午餐"})
+            todo = await AsyncTodoService.create_todo(db, {"content": "基准待办", "category": "工作"})
+            await AsyncTodoService.update_todo_status(db, todo.id, "done")
+            counter["writes"] += 3
+
+
+async def _async_reader(stop: asyncio.Event, session_factory, counter: Dict[str, int]) -> None:
+    async with session_factory() as db:
+        index = 0
+        while not stop.is_set():
+            month = READ_MONTHS[index % len(READ_MONTHS)]
+            await AsyncReportService.generate_monthly_report(db, month)
+            await AsyncTransactionService.get_transactions(db, month=month, transaction_type="expense")
+            await AsyncTransactionService.search_transactions(db, SEARCH_TERMS[index % len(SEARCH_TERMS)])
+            await db.rollback()
+            counter["reads"] += 3
+            index += 1
+
+
+async def _run_load(writer, reader, session_factory, duration: float, readers: int) -> Dict[str, Any]:
+    stop = asyncio.Event()
+    lags: List[float] = []
+    counter = {"writes": 0, "reads": 0}
+    tasks = [asyncio.create_task(_heartbeat(stop, lags)),
+             asyncio.create_task(writer(stop, session_factory, counter))]
+    tasks += [asyncio.create_task(reader(stop, session_factory, counter)) for _ in range(readers)]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return {
+        "heartbeats": len(lags),
+        "lag_p50": statistics.median(lags) if lags else float("nan"),
+        "lag_p99": _percentile(lags, 0.99) if lags else float("nan"),
+        "lag_max": max(lags) if lags else float("nan"),
+        "writes_per_sec": counter["writes"] / duration,
+        "reads_per_sec": counter["reads"] / duration,
+    }
+
+
+async def _run_sync(db_path: Path, pragmas: Dict[str, Any], duration: float, readers: int) -> Dict[str, Any]:
+    engine = create_db_engine(db_path, pragmas)
+    try:
+        return await _run_load(_sync_writer, _sync_reader, sessionmaker(bind=engine), duration, readers)
+    finally:
+        engine.dispose()
+
+
+async def _run_async(db_path: Path, pragmas: Dict[str, Any], duration: float, readers: int) -> Dict[str, Any]:
+    engine = create_async_db_engine(db_path, pragmas)
+    try:
+        return await _run_load(_async_writer, _async_reader, create_async_session_factory(engine), duration, readers)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="测量混合读写负载下的事件循环响应")
+    parser.add_argument("--rows", type=int, default=50000, help="预置交易条数")
+    parser.add_argument("--todos", type=int, default=5000, help="预置待办事项条数")
+    parser.add_argument("--seed", type=int, default=42, help="数据生成随机种子")
+    parser.add_argument("--duration", type=float, default=5.0, help="每种模式的运行时长（秒）")
+    parser.add_argument("--readers", type=int, default=2, help="并发读取任务数")
+    parser.add_argument("--pragma-profile", default="fast", choices=list(PRAGMA_PROFILES),
+                        help="连接参数预设，并发读写需要WAL模式")
+    args = parser.parse_args()
+
+    pragmas = PRAGMA_PROFILES[args.pragma_profile]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        _seed(db_path, args.rows, args.todos, args.seed, pragmas)
+        results["同步服务"] = asyncio.run(_run_sync(db_path, pragmas, args.duration, args.readers))
+        results["异步服务"] = asyncio.run(_run_async(db_path, pragmas, args.duration, args.readers))
+
+    print(f"预置 {args.rows} 条交易、{args.todos} 条待办，{args.readers} 个读取任务，每种模式运行 {args.duration:.0f} 秒")
+    print(f"{'模式':<10}{'心跳次数':>10}{'延迟P50(ms)':>14}{'延迟P99(ms)':>14}{'最大(ms)':>12}{'写/秒':>10}{'读/秒':>10}")
+    for name, result in results.items():
+        print(f"{name:<10}{result['heartbeats']:>12}{result['lag_p50']:>14.2f}{result['lag_p99']:>14.2f}"
+              f"{result['lag_max']:>12.2f}{result['writes_per_sec']:>12.0f}{result['reads_per_sec']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+常驻服务往返耗时基准测试
+
+在后台线程启动常驻服务（数据库指向临时文件），通过客户端转发 transaction add 和
+todo update，统计往返耗时；并与每次新启动进程执行命令帮助的耗时对比，
+后者只包含解释器启动和命令行解析，是不使用常驻服务时的下限。
+
+用法:
+    PYTHONPATH=src python -m benchmarks.bench_daemon --runs 200
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List
+import cashlog.models.db as db_module
+from cashlog.cli.client import forward_command, send_request
+from cashlog.cli.server import CommandServer
+from cashlog.models.db import PRAGMA_PROFILES, create_db_engine
+from cashlog.models.todo import Todo
+
+# 往返耗时目标（毫秒）
+TARGET_MS = 10.0
+
+
+def _percentile(timings: List[float], ratio: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(int(len(ordered) * ratio), len(ordered) - 1)]
+
+
+def _time_forward(argv_list: List[List[str]], socket_path: Path) -> List[float]:
+    timings = []
+    for argv in argv_list:
+        start = time.perf_counter()
+        response = forward_command(argv, socket_path)
+        timings.append((time.perf_counter() - start) * 1000)
+        if response is None or response["exit_code"] != 0 or "失败" in response["stdout"]:
+            raise RuntimeError(f"命令执行失败: {argv} {response}")
+    return timings
+
+
+def _time_cold_start(runs: int) -> List[float]:
+    main_path = Path(__file__).resolve().parent.parent / "main.py"
+    env = dict(os.environ, CASHLOG_NO_DAEMON="1")
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(main_path), "transaction", "add", "--help"],
+                       env=env, capture_output=True, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="测量常驻服务的命令往返耗时")
+    parser.add_argument("--runs", type=int, default=200, help="每个命令执行的次数")
+    parser.add_argument("--cold-runs", type=int, default=10, help="新进程启动的测量次数")
+    parser.add_argument("--pragma-profile", default="safe", choices=list(PRAGMA_PROFILES), help="连接参数预设")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 常驻服务使用 cashlog.models.db 的全局引擎，测试期间指向临时数据库
+        engine = create_db_engine(Path(tmp) / "bench.db", PRAGMA_PROFILES[args.pragma_profile])
+        db_module.engine = engine
+        db_module.SessionLocal.configure(bind=engine)
+        os.environ.pop("CASHLOG_NO_DAEMON", None)
+
+        socket_path = Path(tmp) / "cashlog.sock"
+        server = CommandServer(socket_path)
+        server.warm_up()
+        thread = threading.Thread(target=server.serve, daemon=True)
+        thread.start()
+        try:
+            results = {
+                "transaction add": _time_forward([
+                    ["transaction", "add", "-a", str(-(i % 200) - 1), "-c", "餐饮", "-t", "午餐", "-n", f"基准{i}"]
+                    for i in range(args.runs)
+                ], socket_path),
+                "todo add": _time_forward([
+                    ["todo", "add", "-c", f"待办{i}", "-C", "工作"] for i in range(args.runs)
+                ], socket_path),
+            }
+            with db_module.SessionLocal() as db:
+                todo_ids = [row[0] for row in db.query(Todo.id).order_by(Todo.id)]
+            results["todo update"] = _time_forward([
+                ["todo", "update", str(todo_id), ("doing", "done")[i % 2]] for i, todo_id in enumerate(todo_ids)
+            ], socket_path)
+        finally:
+            send_request({"action": "shutdown"}, socket_path)
+            thread.join()
+            engine.dispose()
+
+    cold = _time_cold_start(args.cold_runs)
+    print(f"{'命令':<18}{'中位数(ms)':>12}{'P95(ms)':>12}{'最大(ms)':>12}")
+    for name, timings in results.items():
+        median = statistics.median(timings)
+        flag = "" if median < TARGET_MS else f"  超过目标 {TARGET_MS:.0f}ms"
+        print(f"{name:<20}{median:>12.2f}{_percentile(timings, 0.95):>12.2f}{max(timings):>12.2f}{flag}")
+    print(f"{'新进程(仅帮助)':<14}{statistics.median(cold):>12.2f}{_percentile(cold, 0.95):>12.2f}{max(cold):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+列表输出格式基准测试
+
+在临时数据库中导入一批交易，分别以 table / tsv / csv / jsonl 格式输出
+全部交易到空设备，统计每种格式每秒输出的行数（含查询耗时）。
+
+用法:
+    PYTHONPATH=src python -m benchmarks.bench_output --rows 100000
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base, create_db_engine
+from cashlog.services.transaction_service import TransactionService
+from cashlog.utils.formatter import Formatter, OUTPUT_FORMATS, TRANSACTION_FIELDS
+from benchmarks.bench_pragmas import _sample_csv
+
+# table 格式与 transaction list 保持一致的表头
+TABLE_HEADERS = {
+    "id": "ID",
+    "amount": "金额",
+    "type": "类型",
+    "category": "分类",
+    "tags": "标签",
+    "notes": "备注",
+    "created_at": "时间"
+}
+
+
+def run_format(db, output_format: str, devnull) -> float:
+    """
+    以指定格式输出全部交易
+
+    Returns:
+        耗时（秒）
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(devnull):
+        if output_format == "table":
+            transactions = TransactionService.get_transactions(db)
+            Formatter.print_table(Formatter.format_transactions(transactions), TABLE_HEADERS)
+        else:
+            Formatter.write_rows(TransactionService.iter_transactions(db), TRANSACTION_FIELDS, output_format)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比各输出格式的吞吐量")
+    parser.add_argument("--rows", type=int, default=50000, help="交易条数")
+    parser.add_argument("--formats", nargs="+", default=list(OUTPUT_FORMATS), choices=list(OUTPUT_FORMATS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "output.db")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        TransactionService.import_transactions(db, io.StringIO(_sample_csv(args.rows)), "csv", batch_size=5000)
+
+        print(f"{'格式':<8}{'耗时(秒)':>12}{'行/秒':>14}")
+        with open(os.devnull, "w", encoding="utf-8") as devnull:
+            for output_format in args.formats:
+                # 每种格式使用新的会话，避免身份映射中缓存的对象影响结果
+                db.close()
+                seconds = run_format(db, output_format, devnull)
+                print(f"{output_format:<8}{seconds:>12.3f}{args.rows / seconds:>14.0f}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+连接参数预设基准测试
+
+对比 safe / fast / bulk 三种PRAGMA预设下的逐条插入、批量导入和月度报表耗时。
+
+用法:
+    PYTHONPATH=src python -m benchmarks.bench_pragmas --rows 2000
+"""
+import argparse
+import io
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base, PRAGMA_PROFILES, create_db_engine
+from cashlog.services.transaction_service import TransactionService
+from cashlog.services.report_service import ReportService
+
+CATEGORIES = ["餐饮", "交通", "购物", "工资", "娱乐", "医疗"]
+
+
+def _sample_csv(rows: int) -> str:
+    """生成批量导入用的CSV数据"""
+    lines = ["amount,category,tags,notes,created_at"]
+    for i in range(rows):
+        amount = 5000 if i % 50 == 0 else -(i % 300) - 1
+        lines.append(f"{amount},{CATEGORIES[i % len(CATEGORIES)]},日常,备注{i},2024-03-{i % 28 + 1:02d} 12:00:00")
+    return "\n".join(lines) + "\n"
+
+
+def run_profile(profile: str, rows: int, import_rows: int, report_runs: int, workdir: Path) -> dict:
+    """
+    在指定预设下执行一轮基准测试
+
+    Returns:
+        各场景耗时（秒）
+    """
+    engine = create_db_engine(workdir / f"{profile}.db", PRAGMA_PROFILES[profile])
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    try:
+        # 逐条插入，每条一次提交，与 transaction add 的写入路径一致
+        start = time.perf_counter()
+        for i in range(rows):
+            TransactionService.create_transaction(db, {
+                "amount": str(-(i % 200) - 1),
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "tags": "日常",
+                "created_at": f"2024-03-{i % 28 + 1:02d} 08:00:00"
+            })
+        insert_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        TransactionService.import_transactions(db, io.StringIO(_sample_csv(import_rows)), "csv", batch_size=5000)
+        import_seconds = time.perf_counter() - start
+
+        timings = []
+        for _ in range(report_runs):
+            start = time.perf_counter()
+            ReportService.generate_monthly_report(db, "2024-03")
+            timings.append(time.perf_counter() - start)
+    finally:
+        db.close()
+        engine.dispose()
+
+    return {
+        "insert_per_row_ms": insert_seconds / rows * 1000,
+        "import_rows_per_sec": import_rows / import_seconds,
+        "report_median_ms": statistics.median(timings) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比各连接参数预设的写入与报表耗时")
+    parser.add_argument("--rows", type=int, default=1000, help="逐条插入的交易数")
+    parser.add_argument("--import-rows", type=int, default=50000, help="批量导入的交易数")
+    parser.add_argument("--report-runs", type=int, default=20, help="月度报表重复次数")
+    parser.add_argument("--profiles", nargs="+", default=list(PRAGMA_PROFILES), choices=list(PRAGMA_PROFILES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'预设':<8}{'逐条插入(ms/条)':>18}{'批量导入(条/秒)':>18}{'月度报表(ms)':>16}")
+        for profile in args.profiles:
+            result = run_profile(profile, args.rows, args.import_rows, args.report_runs, Path(tmp))
+            print(
+                f"{profile:<8}"
+                f"{result['insert_per_row_ms']:>18.3f}"
+                f"{result['import_rows_per_sec']:>18.0f}"
+                f"{result['report_median_ms']:>16.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
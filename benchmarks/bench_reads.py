@@ -0,0 +1,113 @@
+"""
+只读查询路径基准测试
+
+在临时数据库中生成一批交易和待办事项，对比两种读取方式的耗时：
+- ORM：get_transactions / iter_transactions 等，构造完整的ORM对象
+- 记录：list_records / iter_records 等，Core语句只读取所需列并构造 __slots__ 记录
+
+每种方式重复多次取中位数，并统计格式化为表格数据（format_transactions）的总耗时。
+每轮使用新会话，ORM方式不会因身份映射中已有对象而变快。
+
+用法:
+    PYTHONPATH=src python -m benchmarks.bench_reads --rows 100000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+from sqlalchemy.orm import sessionmaker
+from benchmarks.generator import LedgerGenerator, load_todos, load_transactions
+from cashlog.models.db import PRAGMA_PROFILES, Base, create_db_engine
+from cashlog.models.migrations import run_migrations
+from cashlog.services.todo_service import TodoService
+from cashlog.services.transaction_service import TransactionService
+from cashlog.utils.formatter import Formatter
+
+# 记录方式相对ORM方式的目标加速比
+TARGET_SPEEDUP = 3.0
+
+
+def _time(session_factory, func: Callable, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        with session_factory() as db:
+            start = time.perf_counter()
+            func(db)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def _cases(rows: int) -> Dict[str, Dict[str, Callable]]:
+    def drain(iterator):
+        for _ in iterator:
+            pass
+
+    return {
+        "交易列表": {
+            "orm": lambda db: TransactionService.get_transactions(db),
+            "records": lambda db: TransactionService.list_records(db, include_notes=True),
+            "records_no_text": lambda db: TransactionService.list_records(db),
+        },
+        "交易流式读取": {
+            "orm": lambda db: drain(TransactionService.iter_transactions(db)),
+            "records": lambda db: drain(TransactionService.iter_records(db, include_notes=True)),
+            "records_no_text": lambda db: drain(TransactionService.iter_records(db)),
+        },
+        "交易列表+格式化": {
+            "orm": lambda db: Formatter.format_transactions(TransactionService.get_transactions(db)),
+            "records": lambda db: Formatter.format_transactions(
+                TransactionService.list_records(db, include_notes=True)),
+        },
+        "单月交易": {
+            "orm": lambda db: TransactionService.get_transactions(db, month="2022-06"),
+            "records": lambda db: TransactionService.list_records(db, include_notes=True, month="2022-06"),
+        },
+        "待办列表": {
+            "orm": lambda db: TodoService.get_todos(db),
+            "records": lambda db: TodoService.list_records(db, include_content=True),
+            "records_no_text": lambda db: TodoService.list_records(db),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对比ORM对象与Core只读记录的列表读取耗时")
+    parser.add_argument("--rows", type=int, default=100000, help="交易条数")
+    parser.add_argument("--todos", type=int, default=20000, help="待办事项条数")
+    parser.add_argument("--seed", type=int, default=42, help="数据生成随机种子")
+    parser.add_argument("--repeat", type=int, default=5, help="每项测量的重复次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "bench.db", PRAGMA_PROFILES["fast"])
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as db:
+            generator = LedgerGenerator(seed=args.seed)
+            load_transactions(db, generator.transactions(args.rows))
+            load_todos(db, generator.todos(args.todos))
+            db.commit()
+
+        results: List[tuple] = []
+        for name, variants in _cases(args.rows).items():
+            # 预热：填充页缓存和编译缓存
+            for func in variants.values():
+                _time(session_factory, func, 1)
+            timings = {variant: _time(session_factory, func, args.repeat) for variant, func in variants.items()}
+            results.append((name, timings))
+        engine.dispose()
+
+    print(f"{args.rows} 条交易、{args.todos} 条待办，每项重复 {args.repeat} 次取中位数")
+    print(f"{'场景':<14}{'ORM(ms)':>10}{'记录(ms)':>10}{'不含文本(ms)':>14}{'加速比':>8}")
+    for name, timings in results:
+        speedup = timings["orm"] / timings["records"]
+        no_text = f"{timings['records_no_text']:.1f}" if "records_no_text" in timings else "-"
+        flag = "" if speedup >= TARGET_SPEEDUP else f"  未达到 {TARGET_SPEEDUP:.0f}x"
+        print(f"{name:<14}{timings['orm']:>10.1f}{timings['records']:>10.1f}{no_text:>14}{speedup:>8.1f}x{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+命令行启动耗时基准测试
+
+使用 python -X importtime 统计启动阶段的导入耗时，并与预算比较，
+超出预算时以非零状态码退出，可直接用于CI中的回归检查。
+
+用法:
+    PYTHONPATH=src python -m benchmarks.bench_startup
+    PYTHONPATH=src python -m benchmarks.bench_startup --budget-ms 80 --runs 10
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+# 默认场景：仅解析参数、不访问数据库的命令
+SCENARIOS = {
+    "help": ["--help"],
+    "todo-help": ["todo", "--help"],
+    "todo-update-help": ["todo", "update", "--help"],
+}
+
+# 启动阶段不应加载的重量级依赖
+FORBIDDEN_MODULES = ("sqlalchemy", "rich")
+
+# 导入耗时预算（毫秒），以 cashlog 相关模块的累计导入时间计
+DEFAULT_BUDGET_MS = 100.0
+
+_RUNNER = (
+    "import sys\n"
+    "from cashlog.cli.main_cli import cli\n"
+    "try:\n"
+    "    cli(sys.argv[1:], prog_name='cashlog')\n"
+    "except SystemExit:\n"
+    "    pass\n"
+)
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    解析 -X importtime 的输出
+
+    Returns:
+        (模块名, 累计耗时微秒, 嵌套深度) 列表，深度为0表示顶层导入
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # 表头行
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(cumulative), depth))
+    return entries
+
+
+def run_scenario(args: List[str]) -> Dict[str, Any]:
+    """
+    执行一次启动并统计耗时
+
+    Returns:
+        cashlog 导入耗时、进程总耗时（毫秒）以及加载了的重量级依赖
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _RUNNER, *args],
+        capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    entries = parse_importtime(proc.stderr)
+    names = {name for name, _, _ in entries}
+    return {
+        # 只累加顶层导入，间接导入已计入上层模块的累计耗时
+        "import_ms": sum(us for name, us, depth in entries if depth == 0 and name.startswith("cashlog")) / 1000,
+        "wall_ms": wall_ms,
+        "forbidden": [m for m in FORBIDDEN_MODULES if m in names],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="cashlog 命令行启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每个场景的运行次数")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="导入耗时预算（毫秒，取中位数比较）")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'场景':<18}{'导入中位数(ms)':>16}{'总耗时中位数(ms)':>18}  重量级依赖")
+    for name, argv in SCENARIOS.items():
+        runs = [run_scenario(argv) for _ in range(args.runs)]
+        import_ms = statistics.median(r["import_ms"] for r in runs)
+        wall_ms = statistics.median(r["wall_ms"] for r in runs)
+        forbidden = sorted({m for r in runs for m in r["forbidden"]})
+        print(f"{name:<18}{import_ms:>16.1f}{wall_ms:>18.1f}  {', '.join(forbidden) or '-'}")
+        if import_ms > args.budget_ms or forbidden:
+            failed = True
+
+    if failed:
+        print(f"超出启动预算: 导入耗时需低于 {args.budget_ms:.0f}ms，且不得加载 {', '.join(FORBIDDEN_MODULES)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
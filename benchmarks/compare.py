@@ -0,0 +1,119 @@
+"""
+基准结果对比
+
+对比两次 benchmarks.suite 的JSON结果，按场景中位数耗时计算变化比例。
+耗时增加超过阈值且绝对差值超过下限的场景记为回退，存在回退时以状态码1退出，
+可直接用于CI。两次运行的数据规模或连接参数不同时给出提示。
+
+用法:
+    python -m benchmarks.compare base.json new.json --threshold 0.2
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 参与比较的运行参数，不一致时结果不可直接对比
+COMPARABLE_META = ("rows", "todos", "seed", "pragma_profile")
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    """
+    读取基准结果文件
+
+    Raises:
+        ValueError: 当文件不是基准结果时
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or "scenarios" not in data:
+        raise ValueError(f"不是有效的基准结果文件: {path}")
+    return data
+
+
+def compare_results(
+    base: Dict[str, Any],
+    new: Dict[str, Any],
+    threshold: float = 0.2,
+    min_delta_ms: float = 1.0
+) -> List[Dict[str, Any]]:
+    """
+    按场景对比中位数耗时
+
+    Args:
+        base: 基准结果
+        new: 新结果
+        threshold: 判定回退或提升的相对变化比例
+        min_delta_ms: 判定回退或提升的最小绝对差值（毫秒），过滤极短场景的噪声
+
+    Returns:
+        每个场景的对比结果，status 为 regression、improvement、ok、new 或 missing
+    """
+    base_scenarios = base["scenarios"]
+    new_scenarios = new["scenarios"]
+    rows = []
+    for name in list(base_scenarios) + [n for n in new_scenarios if n not in base_scenarios]:
+        before = base_scenarios.get(name, {}).get("median_ms")
+        after = new_scenarios.get(name, {}).get("median_ms")
+        row = {"name": name, "base_ms": before, "new_ms": after, "change": None}
+        if before is None:
+            row["status"] = "new"
+        elif after is None:
+            row["status"] = "missing"
+        else:
+            delta = after - before
+            row["change"] = delta / before if before else 0.0
+            if abs(delta) < min_delta_ms or abs(row["change"]) < threshold:
+                row["status"] = "ok"
+            else:
+                row["status"] = "regression" if delta > 0 else "improvement"
+        rows.append(row)
+    return rows
+
+
+def meta_differences(base: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """返回两次运行中不一致的运行参数"""
+    base_meta = base.get("meta", {})
+    new_meta = new.get("meta", {})
+    return [
+        f"{key}: {base_meta.get(key)} -> {new_meta.get(key)}"
+        for key in COMPARABLE_META
+        if base_meta.get(key) != new_meta.get(key)
+    ]
+
+
+def _format_ms(value: Optional[float]) -> str:
+    return f"{value:>12.3f}" if value is not None else f"{'-':>12}"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="对比两次基准测试结果并标出性能回退")
+    parser.add_argument("base", type=Path, help="基准结果JSON")
+    parser.add_argument("new", type=Path, help="新结果JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定回退的相对变化比例")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="判定回退的最小绝对差值（毫秒）")
+    args = parser.parse_args(argv)
+
+    try:
+        base = load_results(args.base)
+        new = load_results(args.new)
+    except (OSError, ValueError) as e:
+        sys.exit(str(e))
+
+    for difference in meta_differences(base, new):
+        print(f"警告: 运行参数不一致，{difference}")
+
+    rows = compare_results(base, new, args.threshold, args.min_delta_ms)
+    print(f"{'场景':<20}{'基准(ms)':>12}{'新(ms)':>12}{'变化':>10}  状态")
+    for row in rows:
+        change = f"{row['change']:>+10.1%}" if row["change"] is not None else f"{'-':>10}"
+        print(f"{row['name']:<22}{_format_ms(row['base_ms'])}{_format_ms(row['new_ms'])}{change}  {row['status']}")
+
+    regressions = [row["name"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"性能回退: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
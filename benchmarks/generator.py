@@ -0,0 +1,215 @@
+"""
+基准测试数据生成器
+
+按固定随机种子生成贴近真实使用的账本：工资、房租等按月出现的收支，
+餐饮、交通等按日出现的小额支出，周末消费更多；每个分类有各自的金额区间、
+标签和备注模板。待办事项带有分类、标签、截止时间和状态分布。
+相同的种子和参数总是生成完全相同的数据，便于不同版本之间对比。
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from cashlog.models.tag import todo_tags
+from cashlog.models.todo import Todo, TodoStatus
+from cashlog.services.tag_service import TagService
+from cashlog.services.transaction_service import TransactionService
+
+# 日常分类：名称 -> (权重, 金额下限, 金额上限, 标签候选, 备注模板)
+DAILY_CATEGORIES = {
+    "餐饮": (40, 8, 180, ["午餐", "晚餐", "早餐", "外卖", "聚餐"], ["{place}午餐", "和{person}吃晚饭", "外卖 {place}", "dinner with {person}"]),
+    "交通": (18, 2, 120, ["地铁", "打车", "公交", "加油"], ["地铁通勤", "打车去{place}", "加油 {place}", "taxi to {place}"]),
+    "购物": (14, 15, 1500, ["日用", "数码", "衣物", "网购"], ["{place}购物", "网购 {item}", "买{item}", "bought {item}"]),
+    "娱乐": (8, 20, 600, ["电影", "游戏", "旅行"], ["电影票 {place}", "周末和{person}出去玩", "game {item}"]),
+    "医疗": (3, 10, 2000, ["药品", "门诊"], ["{place}门诊", "买药"]),
+    "咖啡": (12, 12, 45, ["咖啡", "日常"], ["{place}咖啡", "coffee with {person}"]),
+    "水电": (5, 30, 400, ["账单"], ["电费", "水费", "燃气费", "宽带"]),
+}
+
+# 每月固定出现的收支：名称 -> (日期, 金额, 标签)
+MONTHLY_ITEMS = {
+    "工资": (10, 15000, "收入,月度"),
+    "房租": (1, -4500, "住房,月度"),
+    "奖金": (25, 3000, "收入"),
+}
+
+PLACES = ["公司楼下", "万达", "星巴克", "全家", "海底捞", "机场", "火车站", "超市", "downtown", "mall"]
+PERSONS = ["同事", "家人", "朋友", "老王", "Alice", "Bob", "客户"]
+ITEMS = ["耳机", "键盘", "T恤", "书", "水果", "猫粮", "charger", "backpack"]
+
+# 待办分类：名称 -> (标签候选, 内容模板)
+TODO_CATEGORIES = {
+    "工作": (["重要", "紧急", "会议", "报告"], ["准备{topic}材料", "回复{person}的邮件", "整理{topic}周报", "review {topic} PR"]),
+    "生活": (["家务", "购物", "缴费"], ["买{item}", "交{topic}费", "打扫房间"]),
+    "学习": (["读书", "课程"], ["读完{item}相关章节", "复习{topic}", "finish {topic} course"]),
+    "健康": (["运动", "体检"], ["跑步5公里", "预约体检", "去健身房"]),
+}
+TOPICS = ["季度汇报", "项目立项", "预算", "年终总结", "数据库迁移", "性能优化", "onboarding"]
+
+# 一天中各小时的消费权重，集中在三餐和通勤时间
+HOUR_WEIGHTS = [1, 0, 0, 0, 0, 0, 1, 4, 8, 6, 4, 6, 10, 8, 4, 4, 5, 6, 10, 9, 6, 5, 3, 2]
+
+# 待办状态分布
+TODO_STATUS_WEIGHTS = {TodoStatus.TODO: 5, TodoStatus.DOING: 2, TodoStatus.DONE: 3}
+
+
+class LedgerGenerator:
+    """账本数据生成器"""
+
+    def __init__(self, seed: int = 42, start: datetime = datetime(2021, 1, 1), months: int = 36):
+        """
+        Args:
+            seed: 随机种子
+            start: 数据起始时间
+            months: 数据覆盖的月数
+        """
+        self.seed = seed
+        self.start = start
+        self.months = months
+        self.end = self._add_months(start, months)
+        self._daily_names = list(DAILY_CATEGORIES)
+        self._daily_weights = [DAILY_CATEGORIES[name][0] for name in self._daily_names]
+
+    @staticmethod
+    def _add_months(value: datetime, months: int) -> datetime:
+        year, month = divmod(value.month - 1 + months, 12)
+        return value.replace(year=value.year + year, month=month + 1, day=1)
+
+    def transactions(self, count: int) -> Iterator[Dict[str, Any]]:
+        """
+        生成交易记录
+
+        Args:
+            count: 交易条数
+
+        Returns:
+            交易数据迭代器，字段与 transaction import 一致，按日期递增
+        """
+        rng = random.Random(self.seed)
+        monthly = [
+            (self._add_months(self.start, m).replace(day=day, hour=9), name, amount, tags)
+            for m in range(self.months)
+            for name, (day, amount, tags) in MONTHLY_ITEMS.items()
+        ]
+        # 固定收支最多占总数的一半，其余为日常消费
+        monthly = monthly[:count // 2]
+        monthly_index = 0
+        daily_count = count - len(monthly)
+        days = (self.end - self.start).days
+
+        for i in range(daily_count):
+            created_at = self.start + timedelta(
+                days=days * i // max(daily_count, 1),
+                hours=rng.choices(range(24), HOUR_WEIGHTS)[0],
+                seconds=rng.randrange(3600)
+            )
+            while monthly_index < len(monthly) and monthly[monthly_index][0] <= created_at:
+                at, name, amount, tags = monthly[monthly_index]
+                yield self._row(amount, name, tags, f"{at.month}月{name}", at)
+                monthly_index += 1
+
+            # 周末的消费更集中在娱乐和餐饮
+            weights = self._daily_weights
+            if created_at.weekday() >= 5:
+                weights = [w * (2 if name in ("餐饮", "娱乐") else 1) for w, name in zip(weights, self._daily_names)]
+            category = rng.choices(self._daily_names, weights)[0]
+            _, low, high, tag_pool, templates = DAILY_CATEGORIES[category]
+            amount = -round(min(high, low + rng.expovariate(3 / (high - low))), 2)
+            tags = ",".join(rng.sample(tag_pool, rng.randint(0, min(2, len(tag_pool))))) or None
+            notes = rng.choice(templates).format(
+                place=rng.choice(PLACES), person=rng.choice(PERSONS), item=rng.choice(ITEMS)
+            ) if rng.random() < 0.8 else None
+            yield self._row(amount, category, tags, notes, created_at)
+
+        for at, name, amount, tags in monthly[monthly_index:]:
+            yield self._row(amount, name, tags, f"{at.month}月{name}", at)
+
+    @staticmethod
+    def _row(amount: float, category: str, tags, notes, created_at: datetime) -> Dict[str, Any]:
+        return {
+            "amount": amount,
+            "category": category,
+            "tags": tags,
+            "notes": notes,
+            "created_at": created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def todos(self, count: int) -> Iterator[Dict[str, Any]]:
+        """
+        生成待办事项
+
+        Args:
+            count: 待办条数
+
+        Returns:
+            待办数据迭代器，deadline 约七成有值，多数在创建后两周内
+        """
+        rng = random.Random(self.seed + 1)
+        names = list(TODO_CATEGORIES)
+        statuses = list(TODO_STATUS_WEIGHTS)
+        status_weights = list(TODO_STATUS_WEIGHTS.values())
+        span = (self.end - self.start).total_seconds()
+
+        for i in range(count):
+            created_at = self.start + timedelta(seconds=span * (i + rng.random()) / max(count, 1))
+            category = rng.choice(names)
+            tag_pool, templates = TODO_CATEGORIES[category]
+            deadline = None
+            if rng.random() < 0.7:
+                deadline = (created_at + timedelta(days=rng.randint(0, 14), hours=rng.randint(0, 23))).replace(
+                    minute=0, second=0, microsecond=0
+                )
+            yield {
+                "content": rng.choice(templates).format(
+                    topic=rng.choice(TOPICS), person=rng.choice(PERSONS), item=rng.choice(ITEMS)
+                ),
+                "category": category,
+                "tags": ",".join(rng.sample(tag_pool, rng.randint(0, 2))) or None,
+                "deadline": deadline,
+                "status": rng.choices(statuses, status_weights)[0],
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+
+def load_transactions(db: Session, rows: Iterator[Dict[str, Any]], batch_size: int = 5000) -> int:
+    """
+    通过批量导入接口写入交易，与 transaction import 走同一路径
+
+    Returns:
+        写入的条数
+    """
+    lines = (json.dumps(row, ensure_ascii=False) for row in rows)
+    result = TransactionService.import_transactions(db, lines, "jsonl", batch_size=batch_size)
+    if result["rejected"]:
+        raise ValueError(f"生成的数据有 {result['rejected']} 条未能导入")
+    return result["imported"]
+
+
+def load_todos(db: Session, rows: Iterator[Dict[str, Any]], batch_size: int = 5000) -> int:
+    """
+    批量写入待办事项及标签关联
+
+    Returns:
+        写入的条数
+    """
+    statement = insert(Todo.__table__).returning(Todo.__table__.c.id, sort_by_parameter_order=True)
+    total = 0
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            total += _insert_todo_batch(db, statement, batch)
+            batch = []
+    if batch:
+        total += _insert_todo_batch(db, statement, batch)
+    db.commit()
+    return total
+
+
+def _insert_todo_batch(db: Session, statement, batch: List[Dict[str, Any]]) -> int:
+    ids = db.execute(statement, batch).scalars().all()
+    TagService.link_tags(db, todo_tags.c.todo_id, [(todo_id, row["tags"]) for todo_id, row in zip(ids, batch)])
+    return len(batch)
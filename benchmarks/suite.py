@@ -0,0 +1,332 @@
+"""
+服务层基准测试套件
+
+在临时数据库中用 generator 生成指定规模的账本，然后对各服务路径计时：
+逐条插入、各筛选条件下的列表首页与深分页、全量流式读取、全文检索、
+待办列表与状态更新、月度报表、导出、备份与恢复。结果写成JSON，
+可用 benchmarks.compare 与之前的结果对比并标出性能回退。
+
+用法:
+    PYTHONPATH=src python -m benchmarks.suite --rows 100000 --output results.json
+    PYTHONPATH=src python -m benchmarks.suite --rows 10000 --scenarios list_ monthly_report
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import patch
+from sqlalchemy import func
+from sqlalchemy.orm import Session, sessionmaker
+from cashlog.models.db import Base, PRAGMA_PROFILES, create_db_engine
+from cashlog.models.migrations import run_migrations
+from cashlog.models.transaction import Transaction
+from cashlog.models.todo import Todo
+from cashlog.services.data_service import DataService
+from cashlog.services.export_service import ExportService
+from cashlog.services.report_service import ReportService
+from cashlog.services.todo_service import TodoService
+from cashlog.services.transaction_service import TransactionService
+from benchmarks.generator import LedgerGenerator, load_todos, load_transactions
+
+# 列表场景每页条数，与命令行默认的一屏数据量相当
+PAGE_SIZE = 50
+
+# 逐条写入场景每轮写入的条数
+WRITE_BATCH = 100
+
+
+class BenchContext:
+    """基准场景共享的数据库和参数"""
+
+    def __init__(self, db: Session, db_path: Path, workdir: Path, generator: LedgerGenerator):
+        self.db = db
+        self.db_path = db_path
+        self.workdir = workdir
+        self.generator = generator
+        self.month = generator.end.replace(year=generator.end.year - 1).strftime("%Y-%m")
+        self.middle_id = (db.query(func.max(Transaction.id)).scalar() or 0) // 2
+        self.todo_ids = [row[0] for row in db.query(Todo.id).order_by(Todo.id).limit(WRITE_BATCH)]
+        self.backup_path: Optional[Path] = None
+
+    def database(self):
+        """将备份与恢复服务指向临时数据库"""
+        return patch("cashlog.services.data_service.DB_PATH", self.db_path)
+
+
+def _insert_transactions(ctx: BenchContext) -> int:
+    for i in range(WRITE_BATCH):
+        TransactionService.create_transaction(ctx.db, {
+            "amount": str(-(i % 200) - 1), "category": "餐饮", "tags": "午餐", "notes": f"基准{i}"
+        })
+    return WRITE_BATCH
+
+
+def _list(**filters) -> Callable[[BenchContext], int]:
+    def run(ctx: BenchContext) -> int:
+        values = {key: (value(ctx) if callable(value) else value) for key, value in filters.items()}
+        return len(TransactionService.get_transactions(ctx.db, limit=PAGE_SIZE, **values))
+    return run
+
+
+def _stream_transactions(ctx: BenchContext) -> int:
+    return sum(1 for _ in TransactionService.iter_transactions(ctx.db))
+
+
+def _search_transactions(ctx: BenchContext) -> int:
+    return len(TransactionService.search_transactions(ctx.db, "星巴克"))
+
+
+def _list_todos(**filters) -> Callable[[BenchContext], int]:
+    def run(ctx: BenchContext) -> int:
+        return len(TodoService.get_todos(ctx.db, limit=PAGE_SIZE, **filters))
+    return run
+
+
+def _update_todo_status(ctx: BenchContext) -> int:
+    for i, todo_id in enumerate(ctx.todo_ids):
+        TodoService.update_todo_status(ctx.db, todo_id, ("doing", "done", "todo")[i % 3])
+    return len(ctx.todo_ids)
+
+
+def _monthly_report(ctx: BenchContext) -> int:
+    report = ReportService.generate_monthly_report(ctx.db, ctx.month)
+    return report["transaction_count"]
+
+
+def _rebuild_rollups(ctx: BenchContext) -> int:
+    return ReportService.rebuild_rollups(ctx.db)
+
+
+def _export_csv(ctx: BenchContext) -> int:
+    result = ExportService.export_table(ctx.db, str(ctx.workdir / "export.csv"), overwrite=True)
+    return result["rows"]
+
+
+def _backup(**options) -> Callable[[BenchContext], int]:
+    def run(ctx: BenchContext) -> int:
+        output_path = ctx.workdir / ("backup.db" + (".gz" if options.get("compress") else ""))
+        with ctx.database():
+            DataService.create_backup(str(output_path), overwrite=True, **options)
+        if not options:
+            ctx.backup_path = output_path
+        return 0
+    return run
+
+
+def _incremental_backup(ctx: BenchContext) -> int:
+    with ctx.database():
+        DataService.create_incremental_backup(str(ctx.workdir / "store"))
+    return 0
+
+
+def _restore(ctx: BenchContext) -> int:
+    if ctx.backup_path is None:
+        _backup()(ctx)
+    # 恢复会直接覆盖数据库文件，先释放会话持有的连接
+    ctx.db.close()
+    ctx.db.get_bind().dispose()
+    with ctx.database():
+        DataService.restore_backup(str(ctx.backup_path), backup_current=False, confirm=False)
+    return 0
+
+
+# 基准场景：名称 -> (执行函数, 说明)，执行函数返回本轮处理的行数
+SCENARIOS: Dict[str, tuple] = {
+    "insert_transaction": (_insert_transactions, f"逐条新增交易，每条一次提交（每轮{WRITE_BATCH}条）"),
+    "list_first_page": (_list(), "交易列表首页，无筛选"),
+    "list_month": (_list(month=lambda ctx: ctx.month), "交易列表首页，按月份筛选"),
+    "list_category": (_list(category="交通"), "交易列表首页，按分类筛选"),
+    "list_tags": (_list(tags="外卖,打车"), "交易列表首页，任一标签"),
+    "list_tags_all": (_list(tags="午餐,聚餐", tags_match="all"), "交易列表首页，全部标签"),
+    "list_type": (_list(transaction_type="income"), "交易列表首页，只看收入"),
+    "list_deep_page": (_list(after_id=lambda ctx: ctx.middle_id), "交易列表从中间位置翻页"),
+    "stream_transactions": (_stream_transactions, "流式读取全部交易"),
+    "search_transactions": (_search_transactions, "全文检索交易备注"),
+    "todo_list_status": (_list_todos(status="todo"), "待办列表首页，按状态筛选"),
+    "todo_list_deadline": (_list_todos(deadline_before="2022-06-30"), "待办列表首页，按截止时间筛选"),
+    "todo_list_tags": (_list_todos(tags="重要"), "待办列表首页，按标签筛选"),
+    "todo_update_status": (_update_todo_status, f"逐条更新待办状态（每轮{WRITE_BATCH}条）"),
+    "monthly_report": (_monthly_report, "月度报表"),
+    "rebuild_rollups": (_rebuild_rollups, "重建月度汇总表"),
+    "export_csv": (_export_csv, "导出全部交易为CSV"),
+    "backup_online": (_backup(), "在线备份API分步备份"),
+    "backup_vacuum": (_backup(vacuum=True), "VACUUM INTO 备份"),
+    "backup_gzip": (_backup(compress="gzip"), "gzip压缩备份"),
+    "backup_incremental": (_incremental_backup, "增量备份"),
+    "restore": (_restore, "从备份文件恢复"),
+}
+
+
+def select_scenarios(patterns: Optional[List[str]]) -> List[str]:
+    """
+    按名称前缀选择场景
+
+    Raises:
+        ValueError: 当某个前缀没有匹配任何场景时
+    """
+    if not patterns:
+        return list(SCENARIOS)
+    selected = []
+    for pattern in patterns:
+        matched = [name for name in SCENARIOS if name.startswith(pattern)]
+        if not matched:
+            raise ValueError(f"没有匹配 {pattern} 的场景，可选值：" + ", ".join(SCENARIOS))
+        selected.extend(name for name in matched if name not in selected)
+    return selected
+
+
+def _measure(func: Callable[[], int], repeat: int) -> Dict[str, Any]:
+    """执行若干轮并统计耗时（毫秒）"""
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(timings)
+    result = {
+        "median_ms": round(median, 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "runs": repeat,
+        "rows": rows,
+    }
+    if rows and median > 0:
+        result["rows_per_sec"] = round(rows / median * 1000, 1)
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    rows: int,
+    todos: int,
+    seed: int = 42,
+    repeat: int = 5,
+    pragma_profile: str = "safe",
+    scenarios: Optional[List[str]] = None,
+    workdir: Optional[Path] = None,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    生成数据并依次执行基准场景
+
+    Args:
+        rows: 交易条数
+        todos: 待办条数
+        seed: 数据生成的随机种子
+        repeat: 每个场景执行的轮数
+        pragma_profile: 连接参数预设
+        scenarios: 要执行的场景名称前缀，为None时执行全部
+        workdir: 临时数据库所在目录，为None时使用系统临时目录
+        progress: 每个场景完成后的回调，参数为 (场景名称, 结果)
+
+    Returns:
+        包含运行环境 meta 和各场景结果 scenarios 的字典
+    """
+    names = select_scenarios(scenarios)
+    if pragma_profile not in PRAGMA_PROFILES:
+        raise ValueError("连接参数预设无效，可选值：" + ", ".join(PRAGMA_PROFILES))
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        workdir = Path(tmp)
+        db_path = workdir / "bench.db"
+        engine = create_db_engine(db_path, PRAGMA_PROFILES[pragma_profile])
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        generator = LedgerGenerator(seed=seed)
+
+        results: Dict[str, Any] = {}
+        db = Session()
+        try:
+            # 数据生成只执行一次，同时作为批量导入的基准
+            for name, loader in (
+                ("load_transactions", lambda: load_transactions(db, generator.transactions(rows))),
+                ("load_todos", lambda: load_todos(db, generator.todos(todos))),
+            ):
+                results[name] = _measure(loader, 1)
+                if progress:
+                    progress(name, results[name])
+
+            ctx = BenchContext(db, db_path, workdir, generator)
+            for name in names:
+                results[name] = _measure(lambda: SCENARIOS[name][0](ctx), repeat)
+                if progress:
+                    progress(name, results[name])
+        finally:
+            db.close()
+            engine.dispose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "rows": rows,
+            "todos": todos,
+            "seed": seed,
+            "repeat": repeat,
+            "pragma_profile": pragma_profile,
+        },
+        "scenarios": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="生成合成数据并对各服务路径计时")
+    parser.add_argument("--rows", type=int, default=10000, help="交易条数")
+    parser.add_argument("--todos", type=int, default=None, help="待办条数，默认为交易条数的十分之一")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--repeat", type=int, default=5, help="每个场景执行的轮数")
+    parser.add_argument("--pragma-profile", default="safe", choices=list(PRAGMA_PROFILES), help="连接参数预设")
+    parser.add_argument("--scenarios", nargs="+", help="只执行名称以这些前缀开头的场景")
+    parser.add_argument("--workdir", type=Path, help="临时数据库所在目录")
+    parser.add_argument("--output", "-o", type=Path, help="结果JSON文件路径")
+    parser.add_argument("--list", action="store_true", help="列出全部场景后退出")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, description) in SCENARIOS.items():
+            print(f"{name:<22}{description}")
+        return
+
+    todos = args.todos if args.todos is not None else max(args.rows // 10, WRITE_BATCH)
+
+    def report(name: str, result: Dict[str, Any]) -> None:
+        rate = f"{result['rows_per_sec']:>14.0f}" if "rows_per_sec" in result else f"{'-':>14}"
+        print(f"{name:<22}{result['median_ms']:>12.3f}{result['min_ms']:>12.3f}{rate}", flush=True)
+
+    print(f"{'场景':<20}{'中位数(ms)':>12}{'最小(ms)':>12}{'行/秒':>14}")
+    try:
+        results = run_suite(
+            args.rows, todos, args.seed, args.repeat, args.pragma_profile, args.scenarios, args.workdir, report
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
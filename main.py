@@ -1,6 +1,6 @@
 """cashlog 主入口文件"""
-from cashlog.cli.main_cli import cli
+from cashlog.cli.client import main
 
 
 if __name__ == "__main__":
-    cli()
+    main()
@@ -0,0 +1,28 @@
+"""
+异步接口
+
+在asyncio应用中使用cashlog的服务，需要安装可选依赖：pip install "cashlog[aio]"
+
+示例:
+    engine = create_async_db_engine()
+    await init_async_db(engine)
+    Session = create_async_session_factory(engine)
+    async with Session() as db:
+        transactions = await AsyncTransactionService.get_transactions(db, month="2024-03")
+"""
+try:
+    import aiosqlite  # noqa: F401
+except ImportError as e:
+    raise ImportError('cashlog.aio 需要 aiosqlite，请执行 pip install "cashlog[aio]"') from e
+
+from cashlog.aio.db import create_async_db_engine, create_async_session_factory, init_async_db
+from cashlog.aio.services import AsyncReportService, AsyncTodoService, AsyncTransactionService
+
+__all__ = [
+    "create_async_db_engine",
+    "create_async_session_factory",
+    "init_async_db",
+    "AsyncTransactionService",
+    "AsyncTodoService",
+    "AsyncReportService",
+]
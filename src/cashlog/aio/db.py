@@ -0,0 +1,61 @@
+"""异步数据库引擎与会话"""
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.util import greenlet_spawn
+from cashlog.models.db import DB_PATH, Base, apply_pragmas, load_pragma_settings
+from cashlog.models.migrations import get_schema_version, latest_version, run_migrations
+
+
+def create_async_db_engine(db_path=DB_PATH, pragmas: Optional[Dict[str, Any]] = None) -> AsyncEngine:
+    """
+    创建基于aiosqlite的异步数据库引擎，并在每个新连接上应用PRAGMA
+
+    Args:
+        db_path: 数据库文件路径，默认与命令行使用同一个数据库
+        pragmas: PRAGMA名称到取值的映射，为None时使用配置文件中的设置
+
+    Returns:
+        异步数据库引擎
+    """
+    db_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", echo=False)
+    pragmas = load_pragma_settings() if pragmas is None else pragmas
+    if pragmas:
+        @event.listens_for(db_engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            apply_pragmas(dbapi_connection, pragmas)
+    return db_engine
+
+
+def create_async_session_factory(db_engine: AsyncEngine) -> async_sessionmaker:
+    """
+    创建异步会话工厂
+
+    提交后不使对象过期：异步会话中访问过期属性需要再次查询，在协程外无法自动完成。
+
+    Args:
+        db_engine: 异步数据库引擎
+
+    Returns:
+        异步会话工厂
+    """
+    return async_sessionmaker(db_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def _create_and_migrate(sync_engine) -> None:
+    from cashlog.models import transaction, todo, tag, rollup, search  # noqa: F401
+    Base.metadata.create_all(bind=sync_engine)
+    run_migrations(sync_engine)
+
+
+async def init_async_db(db_engine: AsyncEngine) -> None:
+    """
+    初始化数据库，与 cashlog.models.db.init_db 相同：结构不是最新版本时建表并执行迁移
+
+    Args:
+        db_engine: 异步数据库引擎
+    """
+    async with db_engine.connect() as conn:
+        current = await conn.run_sync(get_schema_version)
+    if current < latest_version():
+        await greenlet_spawn(_create_and_migrate, db_engine.sync_engine)
@@ -0,0 +1,148 @@
+"""
+异步业务服务
+
+每个方法通过 AsyncSession.run_sync 调用同步服务中的同名方法，模型、参数校验、
+查询构建和错误信息与同步版本完全一致；SQL在aiosqlite的工作线程中执行，
+等待数据库时事件循环可以继续处理其他任务。
+"""
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, TextIO
+from sqlalchemy.ext.asyncio import AsyncSession
+from cashlog.models.transaction import Transaction
+from cashlog.models.todo import Todo
+from cashlog.services.report_service import ReportService
+from cashlog.services.todo_service import TodoService
+from cashlog.services.transaction_service import TransactionService
+
+
+async def _stream(db: AsyncSession, build_query, batch_size: int, filters: Dict[str, Any]) -> AsyncIterator[Any]:
+    """在同步会话中构建查询，再以异步游标分批读取"""
+    if batch_size <= 0:
+        raise ValueError("每批读取行数必须为正整数")
+    query = await db.run_sync(lambda session: build_query(session, **filters))
+    result = await db.stream_scalars(query.statement.execution_options(yield_per=batch_size))
+    async for item in result:
+        yield item
+
+
+class AsyncTransactionService:
+    """异步交易服务类，参数和返回值与 TransactionService 相同"""
+
+    @staticmethod
+    async def create_transaction(db: AsyncSession, transaction_data: Dict[str, Any]) -> Transaction:
+        """创建交易记录，见 TransactionService.create_transaction"""
+        return await db.run_sync(TransactionService.create_transaction, transaction_data)
+
+    @staticmethod
+    async def import_transactions(db: AsyncSession, lines: Iterable[str], file_format: str = "csv",
+                                  batch_size: int = 1000, reject_stream: Optional[TextIO] = None) -> Dict[str, int]:
+        """
+        批量导入交易记录，见 TransactionService.import_transactions
+
+        解析和校验在事件循环线程中执行，只有SQL交给数据库线程，
+        因此应传入已读入内存的行；大文件请分段调用，避免长时间占用事件循环。
+        """
+        return await db.run_sync(TransactionService.import_transactions, lines, file_format, batch_size, reject_stream)
+
+    @staticmethod
+    async def get_transactions(db: AsyncSession, **filters) -> List[Transaction]:
+        """查询交易列表，见 TransactionService.get_transactions"""
+        return await db.run_sync(lambda session: TransactionService.get_transactions(session, **filters))
+
+    @staticmethod
+    def iter_transactions(db: AsyncSession, batch_size: int = 1000, **filters) -> AsyncIterator[Transaction]:
+        """
+        流式查询交易列表，见 TransactionService.iter_transactions
+
+        Returns:
+            异步迭代器，用 async for 逐条读取
+        """
+        return _stream(db, TransactionService.build_query, batch_size, filters)
+
+    @staticmethod
+    async def search_transactions(db: AsyncSession, text: str, limit: int = 20, **filters) -> List[Transaction]:
+        """全文检索交易，见 TransactionService.search_transactions"""
+        return await db.run_sync(lambda session: TransactionService.search_transactions(session, text, limit, **filters))
+
+    @staticmethod
+    async def bulk_update(db: AsyncSession, transaction_ids: Optional[Sequence[str]] = None, **kwargs) -> int:
+        """批量修改交易的分类和标签，见 TransactionService.bulk_update"""
+        return await db.run_sync(lambda session: TransactionService.bulk_update(session, transaction_ids, **kwargs))
+
+    @staticmethod
+    async def bulk_delete(db: AsyncSession, transaction_ids: Optional[Sequence[str]] = None, **kwargs) -> int:
+        """批量删除交易，见 TransactionService.bulk_delete"""
+        return await db.run_sync(lambda session: TransactionService.bulk_delete(session, transaction_ids, **kwargs))
+
+    @staticmethod
+    async def get_transaction_by_id(db: AsyncSession, transaction_id: int) -> Optional[Transaction]:
+        """根据ID获取交易记录，见 TransactionService.get_transaction_by_id"""
+        return await db.run_sync(TransactionService.get_transaction_by_id, transaction_id)
+
+
+class AsyncTodoService:
+    """异步待办事项服务类，参数和返回值与 TodoService 相同"""
+
+    @staticmethod
+    async def create_todo(db: AsyncSession, todo_data: Dict[str, Any]) -> Todo:
+        """创建待办事项，见 TodoService.create_todo"""
+        return await db.run_sync(TodoService.create_todo, todo_data)
+
+    @staticmethod
+    async def get_todos(db: AsyncSession, **filters) -> List[Todo]:
+        """查询待办事项列表，见 TodoService.get_todos"""
+        return await db.run_sync(lambda session: TodoService.get_todos(session, **filters))
+
+    @staticmethod
+    def iter_todos(db: AsyncSession, batch_size: int = 1000, **filters) -> AsyncIterator[Todo]:
+        """
+        流式查询待办事项，见 TodoService.iter_todos
+
+        Returns:
+            异步迭代器，用 async for 逐条读取
+        """
+        return _stream(db, TodoService.build_query, batch_size, filters)
+
+    @staticmethod
+    async def search_todos(db: AsyncSession, text: str, limit: int = 20, **filters) -> List[Todo]:
+        """全文检索待办事项，见 TodoService.search_todos"""
+        return await db.run_sync(lambda session: TodoService.search_todos(session, text, limit, **filters))
+
+    @staticmethod
+    async def update_todo_status(db: AsyncSession, todo_id: int, status: str) -> Todo:
+        """更新待办事项状态，见 TodoService.update_todo_status"""
+        return await db.run_sync(TodoService.update_todo_status, todo_id, status)
+
+    @staticmethod
+    async def bulk_update_status(db: AsyncSession, status: str, todo_ids: Optional[Sequence[str]] = None,
+                                 dry_run: bool = False, **filters) -> int:
+        """批量更新待办事项状态，见 TodoService.bulk_update_status"""
+        return await db.run_sync(
+            lambda session: TodoService.bulk_update_status(session, status, todo_ids, dry_run, **filters)
+        )
+
+    @staticmethod
+    async def get_todo_by_id(db: AsyncSession, todo_id: int) -> Optional[Todo]:
+        """根据ID获取待办事项，见 TodoService.get_todo_by_id"""
+        return await db.run_sync(TodoService.get_todo_by_id, todo_id)
+
+
+class AsyncReportService:
+    """异步报表服务类，报表格式化不涉及数据库，直接使用 ReportService.format_report 等"""
+
+    @staticmethod
+    async def generate_monthly_report(db: AsyncSession, month: str = None) -> Dict[str, Any]:
+        """生成月度收支报表，见 ReportService.generate_monthly_report"""
+        return await db.run_sync(ReportService.generate_monthly_report, month)
+
+    @staticmethod
+    async def generate_range_report(db: AsyncSession, start: str, end: str = None,
+                                    by: str = "month") -> Dict[str, Any]:
+        """生成区间收支报表，见 ReportService.generate_range_report"""
+        return await db.run_sync(ReportService.generate_range_report, start, end, by)
+
+    @staticmethod
+    async def rebuild_rollups(db: AsyncSession) -> int:
+        """从交易表全量重建月度分类汇总表并提交，见 ReportService.rebuild_rollups"""
+        count = await db.run_sync(ReportService.rebuild_rollups)
+        await db.commit()
+        return count
@@ -1,7 +1,18 @@
 """命令行接口包"""
-from cashlog.cli.main_cli import cli
-from cashlog.cli.transaction_cli import transaction
-from cashlog.cli.todo_cli import todo
-from cashlog.cli.report_cli import report
 
 __all__ = ["cli", "transaction", "todo", "report"]
+
+# 命令对象按需导入，导入本包（如 cashlog.cli.client）时不加载click和各子命令模块
+_SUBCOMMANDS = {
+    "cli": "cashlog.cli.main_cli",
+    "transaction": "cashlog.cli.transaction_cli",
+    "todo": "cashlog.cli.todo_cli",
+    "report": "cashlog.cli.report_cli",
+}
+
+
+def __getattr__(name):
+    if name in _SUBCOMMANDS:
+        import importlib
+        return getattr(importlib.import_module(_SUBCOMMANDS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,214 @@
+"""交互式命令行与批处理接口"""
+import click
+from typing import List, Optional
+
+# 不能在批处理或交互模式中嵌套执行的命令
+NESTED_COMMANDS = {"shell", "batch", "serve"}
+
+# --atomic 模式下不能执行的命令组：备份恢复直接读写数据库文件，与未提交的事务冲突
+NON_ATOMIC_GROUPS = {"data"}
+
+
+def _parse_line(line: str) -> List[str]:
+    """
+    拆分一行命令，忽略空行和 # 注释，允许以 cashlog 或 python main.py 开头
+
+    Raises:
+        ValueError: 当引号不匹配时
+    """
+    import shlex
+    args = shlex.split(line, comments=True)
+    if args[:1] == ["cashlog"]:
+        args = args[1:]
+    elif len(args) >= 2 and args[0].startswith("python") and args[1].endswith("main.py"):
+        args = args[2:]
+    return args
+
+
+def _command_name(args: List[str]) -> Optional[str]:
+    """跳过顶层选项，返回命令组名称"""
+    index = 0
+    while index < len(args) and args[index].startswith("-"):
+        index += 2 if args[index] == "--output" else 1
+    return args[index] if index < len(args) else None
+
+
+def _run_command(args: List[str], atomic: bool, interactive: bool = True) -> bool:
+    """
+    在当前进程内执行一条命令
+
+    Args:
+        args: 命令行参数，不含程序名
+        atomic: 是否处于 --atomic 模式
+        interactive: 是否允许命令提示用户确认；批处理从标准输入读取命令，
+            为False时需要确认的命令直接失败，提示加上 -y
+
+    Returns:
+        命令是否成功；命令打印了错误信息或以非零状态退出时视为失败
+    """
+    from cashlog.cli.main_cli import cli
+    from cashlog.utils.formatter import Formatter
+
+    name = _command_name(args)
+    if name in NESTED_COMMANDS:
+        Formatter.print_error(f"{name} 不能在批处理或交互模式中执行")
+        return False
+    if atomic and name in NON_ATOMIC_GROUPS:
+        Formatter.print_error(f"{name} 命令不能在 --atomic 模式中执行")
+        return False
+
+    errors_before = Formatter.errors_printed
+    try:
+        cli.main(args=args, prog_name="cashlog", standalone_mode=False, obj={"interactive": interactive})
+    except click.exceptions.Exit as e:
+        return e.exit_code == 0
+    except click.ClickException as e:
+        e.show()
+        return False
+    except click.Abort:
+        Formatter.print_error("已中止")
+        return False
+    except SystemExit as e:
+        return e.code in (None, 0)
+    return Formatter.errors_printed == errors_before
+
+
+class _AtomicAbort(Exception):
+    """--atomic 模式下命令失败，回滚整个事务"""
+
+
+@click.command()
+@click.option("-f", "--file", "source", type=click.File("r", encoding="utf-8"), default="-",
+              help="命令文件，每行一条命令，默认从标准输入读取")
+@click.option("--atomic", is_flag=True, default=False,
+              help="所有命令在一个数据库事务中执行，最后提交一次；任一命令失败则全部回滚")
+@click.option("--keep-going", is_flag=True, default=False, help="命令失败后继续执行后续命令（--atomic 模式下无效）")
+@click.pass_context
+def batch(ctx: click.Context, source, atomic: bool, keep_going: bool):
+    """
+    批量执行命令
+
+    在一个进程内依次执行文件或标准输入中的命令，所有命令共用同一个数据库引擎和会话，
+    省去每条命令启动解释器和初始化数据库的开销。每行一条命令，写法与命令行相同，
+    可以省略开头的 cashlog，空行和 # 开头的注释会被忽略。
+
+    示例:
+    cashlog batch -f commands.txt
+    cashlog batch --atomic -f commands.txt   # 全部成功才提交
+    printf 'todo update 1 done\\ntodo update 2 done\\n' | cashlog batch
+    """
+    from cashlog.models.db import init_db, shared_session
+    from cashlog.utils.formatter import Formatter
+
+    # 迁移需要独立的写事务，在打开共用会话之前完成
+    init_db()
+
+    executed = 0
+    failed = 0
+    try:
+        with shared_session(atomic=atomic) as db:
+            for line_number, line in enumerate(source, 1):
+                try:
+                    args = _parse_line(line)
+                except ValueError as e:
+                    args = None
+                    Formatter.print_error(f"第 {line_number} 行无法解析: {str(e)}")
+                if args == []:
+                    continue
+                executed += 1
+                if args is not None and _run_command(args, atomic, interactive=False):
+                    continue
+                failed += 1
+                if atomic:
+                    raise _AtomicAbort(f"第 {line_number} 行执行失败，全部 {executed} 条命令已回滚")
+                # 撤销失败命令未提交的修改，避免随后续命令一起提交
+                db.rollback()
+                if not keep_going:
+                    Formatter.print_error(f"第 {line_number} 行执行失败，已停止")
+                    break
+    except _AtomicAbort as e:
+        Formatter.print_error(str(e))
+        ctx.exit(1)
+
+    summary = f"批处理完成：执行 {executed} 条命令，失败 {failed} 条"
+    if atomic:
+        summary += "，已在一个事务中提交"
+    Formatter.print_info(summary)
+    if failed:
+        ctx.exit(1)
+
+
+class _Rollback(Exception):
+    """交互模式下用户要求回滚当前事务"""
+
+
+@click.command()
+@click.option("--atomic", is_flag=True, default=False,
+              help="命令在数据库事务中执行，输入 commit 提交、rollback 回滚，退出时自动提交")
+def shell(atomic: bool):
+    """
+    交互式命令行
+
+    在一个进程内反复输入并执行命令，所有命令共用同一个数据库引擎和会话。
+    输入 help 查看可用命令，exit 或 Ctrl-D 退出。
+
+    示例:
+    cashlog shell
+    cashlog> transaction add -a -20 -c 餐饮
+    cashlog> todo list -s todo
+    """
+    from cashlog.models.db import init_db, shared_session
+    from cashlog.utils.formatter import Formatter
+
+    try:
+        import readline  # noqa: F401  提供历史记录和行编辑
+    except ImportError:
+        pass
+
+    init_db()
+    hint = "输入 help 查看命令，exit 退出"
+    if atomic:
+        hint += "；commit 提交，rollback 回滚"
+    Formatter.print_info(hint)
+
+    prompt = "cashlog*> " if atomic else "cashlog> "
+    finished = False
+    while not finished:
+        try:
+            with shared_session(atomic=atomic) as db:
+                while True:
+                    try:
+                        line = input(prompt)
+                    except KeyboardInterrupt:
+                        click.echo()
+                        continue
+                    except EOFError:
+                        click.echo()
+                        finished = True
+                        break
+
+                    command = line.strip()
+                    if command in ("exit", "quit"):
+                        finished = True
+                        break
+                    if command == "help":
+                        command = "--help"
+                    if atomic and command == "commit":
+                        break
+                    if atomic and command == "rollback":
+                        raise _Rollback()
+                    try:
+                        args = _parse_line(command)
+                    except ValueError as e:
+                        Formatter.print_error(f"无法解析命令: {str(e)}")
+                        continue
+                    if args and not _run_command(args, atomic):
+                        # 只撤销失败命令未提交的修改；事务模式下会话以保存点加入外层事务，
+                        # 回滚到最近一次提交释放的保存点，之前命令的修改保留
+                        db.rollback()
+                        if atomic:
+                            Formatter.print_info("命令失败，已撤销该命令的修改，之前的修改仍在当前事务中，可输入 rollback 回滚")
+            if atomic:
+                Formatter.print_success("已提交")
+        except _Rollback:
+            Formatter.print_info("已回滚")
@@ -0,0 +1,180 @@
+"""
+常驻服务客户端
+
+命令行入口先尝试把命令转发给 cashlog serve 启动的常驻服务，服务未运行或命令不适合转发时
+回退为在当前进程内执行。本模块只依赖标准库，转发成功时不会导入click、SQLAlchemy或rich。
+"""
+import io
+import json
+import os
+import shutil
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO
+
+# 默认套接字路径，与 cashlog.models.db.DB_DIR 位于同一数据目录
+DEFAULT_SOCKET_PATH = Path(__file__).parent.parent.parent.parent / "data" / "cashlog.sock"
+
+# 可以转发的命令：命令组 -> 子命令。读取标准输入、需要交互确认或直接替换数据库文件的命令只在本进程执行
+FORWARDED_COMMANDS = {
+    "transaction": {"add", "list", "search"},
+    "todo": {"add", "update", "list", "search"},
+    "report": {"monthly"},
+}
+
+# 决定数据库引擎设置的环境变量。常驻服务启动时已按自身的环境创建引擎，
+# 请求中的取值与服务不一致时，服务让客户端回退为在本进程内执行
+ENGINE_ENV = ("CASHLOG_PRAGMA_PROFILE", "CASHLOG_CONFIG")
+
+# 转发时随请求一起发送的环境变量
+FORWARDED_ENV = ("CASHLOG_OUTPUT", "TERM", "COLORTERM", "NO_COLOR", "FORCE_COLOR") + ENGINE_ENV
+
+# 单次请求的最大等待时间（秒）
+REQUEST_TIMEOUT = 300.0
+
+
+def get_socket_path() -> Path:
+    """常驻服务的套接字路径，可通过环境变量 CASHLOG_SOCKET 指定"""
+    return Path(os.environ.get("CASHLOG_SOCKET") or DEFAULT_SOCKET_PATH)
+
+
+def should_forward(argv: List[str]) -> bool:
+    """
+    判断命令是否可以转发给常驻服务
+
+    顶层只允许 --output 选项，--profile 等分析选项需要在本进程内执行。
+
+    Args:
+        argv: 命令行参数，不含程序名
+
+    Returns:
+        是否转发
+    """
+    if os.environ.get("CASHLOG_NO_DAEMON") or not hasattr(socket, "AF_UNIX"):
+        return False
+    index = 0
+    while index < len(argv) and argv[index].startswith("-"):
+        if argv[index] == "--output":
+            index += 2
+        elif argv[index].startswith("--output="):
+            index += 1
+        else:
+            return False
+    if index + 1 >= len(argv):
+        return False
+    return argv[index + 1] in FORWARDED_COMMANDS.get(argv[index], ())
+
+
+def _connect(socket_path: Path, timeout: float) -> Optional[socket.socket]:
+    """连接常驻服务，服务未运行时返回None"""
+    if not os.path.exists(socket_path):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(str(socket_path))
+    except OSError:
+        # 套接字文件残留但服务已退出
+        client.close()
+        return None
+    return client
+
+
+def send_request(request: Dict[str, Any], socket_path: Optional[Path] = None,
+                 timeout: float = REQUEST_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """
+    向常驻服务发送一个请求
+
+    请求和响应都是一行JSON，用于 ping、shutdown 等控制请求。
+
+    Args:
+        request: 请求内容
+        socket_path: 套接字路径，默认为 get_socket_path()
+        timeout: 等待响应的秒数
+
+    Returns:
+        服务的响应，服务未运行时返回None
+    """
+    client = _connect(socket_path or get_socket_path(), timeout)
+    if client is None:
+        return None
+    with client, client.makefile("rb") as reader:
+        client.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        line = reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def forward_command(argv: List[str], socket_path: Optional[Path] = None,
+                    stdout: Optional[TextIO] = None) -> Optional[Dict[str, Any]]:
+    """
+    将命令转发给常驻服务执行
+
+    服务把标准输出分块发回，每块到达后立即写出，大量输出也不会整体留在任一进程的内存中。
+    写到标准输出时下游（如 head）提前关闭管道，会断开连接，服务随即丢弃剩余输出。
+
+    Args:
+        argv: 命令行参数，不含程序名
+        socket_path: 套接字路径，默认为 get_socket_path()
+        stdout: 输出写入的流，为None时收集为字符串放在结果的 stdout 中
+
+    Returns:
+        包含 exit_code、stdout、stderr 的执行结果；不适合转发、服务未运行或服务要求回退时返回None
+    """
+    if not should_forward(argv):
+        return None
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": {name: os.environ[name] for name in FORWARDED_ENV if name in os.environ},
+        "columns": shutil.get_terminal_size().columns,
+        "isatty": sys.stdout.isatty(),
+    }
+    client = _connect(socket_path or get_socket_path(), REQUEST_TIMEOUT)
+    if client is None:
+        return None
+
+    collected = io.StringIO() if stdout is None else None
+    target = stdout or collected
+    received = False
+    try:
+        with client, client.makefile("rb") as reader:
+            client.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            for line in reader:
+                message = json.loads(line)
+                received = True
+                if message.get("fallback"):
+                    return None
+                if "stdout" in message and message["stdout"]:
+                    target.write(message["stdout"])
+                    target.flush()
+                if "exit_code" in message:
+                    message["stdout"] = collected.getvalue() if collected else ""
+                    return message
+    except BrokenPipeError:
+        if target is not sys.stdout:
+            raise
+        # 下游提前关闭了管道：断开连接让服务停止输出，后续输出全部丢弃，与本进程执行时一致
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return {"exit_code": 0, "stdout": "", "stderr": ""}
+    except (OSError, ValueError):
+        pass
+    # 服务在发回任何内容之前断开时回退为本进程执行，输出中途断开则报告错误
+    if not received:
+        return None
+    return {"exit_code": 1, "stdout": "", "stderr": "常驻服务连接中断，命令输出不完整\n"}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口：优先转发给常驻服务，否则在本进程内执行"""
+    argv = sys.argv[1:] if argv is None else argv
+    response = forward_command(argv, stdout=sys.stdout)
+    if response is None:
+        from cashlog.cli.main_cli import cli
+        cli.main(args=argv, prog_name="cashlog")
+        return
+    sys.stderr.write(response["stderr"])
+    sys.exit(response["exit_code"])
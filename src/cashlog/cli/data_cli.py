@@ -2,9 +2,6 @@
 import click
 import os
 from typing import Optional
-from cashlog.services.data_service import DataService
-from cashlog.utils.formatter import Formatter
-from cashlog.models.db import init_db
 
 
 @click.group()
@@ -18,21 +15,75 @@ def data():
 
 
 @data.command()
-@click.option("-o", "--output", help="指定备份文件路径（含文件名，后缀.db）")
+@click.option("-o", "--output", help="指定备份文件路径（含文件名，后缀.db，压缩时为.db.gz/.db.xz/.db.bz2）")
 @click.option("-f", "--overwrite", is_flag=True, default=False, help="强制覆盖已有备份文件")
-def backup(output: Optional[str], overwrite: bool):
+@click.option("--pages", type=int, default=1024, show_default=True, help="在线备份每一步复制的页数，-1表示一次复制全部")
+@click.option("--sleep", "step_interval", type=float, default=0.0, show_default=True, help="每一步之间的休眠秒数，避免长时间阻塞并发写入")
+@click.option("--vacuum", is_flag=True, default=False, help="使用 VACUUM INTO 生成压缩整理后的备份")
+@click.option("--incremental", is_flag=True, default=False, help="增量备份：按块去重存入 data/backups/store，只写入新增的块")
+@click.option("--chunk-size", type=int, default=64 * 1024, show_default=True, help="增量备份的分块大小（字节）")
+@click.option("--compress", type=click.Choice(["gzip", "xz", "bz2"]), help="流式压缩备份文件")
+def backup(output: Optional[str], overwrite: bool, pages: int, step_interval: float, vacuum: bool,
+           incremental: bool, chunk_size: int, compress: Optional[str]):
     """
     创建数据库备份
+
+    使用SQLite在线备份API生成一致的快照，备份期间其他命令仍可写入数据库。
     
     示例:
-    cashlog data backup                      # 使用默认路径备份到 ~/.cashlog16/backup_YYYYMMDD.db
+    cashlog data backup                      # 使用默认路径备份到 data/backups/backup_YYYYMMDD.db
     cashlog data backup -o ~/cashlog_backup.db  # 指定备份路径
     cashlog data backup -o ~/cashlog_backup.db -f  # 强制覆盖已存在的备份文件
+    cashlog data backup --pages 256 --sleep 0.01  # 小步复制，给并发写入让路
+    cashlog data backup --vacuum             # 生成压缩整理后的备份
+    cashlog data backup --incremental        # 增量备份，生成清单文件
+    cashlog data backup --compress xz -o ~/cashlog_backup.db.xz  # 生成xz压缩备份
     """
+    from cashlog.services.data_service import DataService
+    from cashlog.utils.formatter import Formatter
+    from cashlog.models.db import init_db
+    from rich.progress import Progress
+
     init_db()  # 确保数据库已初始化
     
     try:
-        backup_path = DataService.create_backup(output_path=output, overwrite=overwrite)
+        if incremental and output:
+            raise ValueError("增量备份固定存放在 data/backups/store，不支持-o参数")
+        if incremental and compress:
+            raise ValueError("增量备份不支持--compress参数")
+
+        with Progress(transient=True) as progress_bar:
+            task = progress_bar.add_task("备份中", total=None)
+
+            def on_progress(copied: int, total: int) -> None:
+                progress_bar.update(task, completed=copied, total=total)
+
+            if incremental:
+                result = DataService.create_incremental_backup(
+                    chunk_size=chunk_size,
+                    pages=pages,
+                    step_interval=step_interval,
+                    progress=on_progress,
+                    vacuum=vacuum
+                )
+            else:
+                backup_path = DataService.create_backup(
+                    output_path=output,
+                    overwrite=overwrite,
+                    pages=pages,
+                    step_interval=step_interval,
+                    progress=on_progress,
+                    vacuum=vacuum,
+                    compress=compress
+                )
+
+        if incremental:
+            Formatter.print_success(f"\n✅ 增量备份成功")
+            Formatter.print_info(f"   清单文件: [bold]{result['manifest_path']}[/bold]")
+            Formatter.print_info(f"   数据块: 共 {result['total_chunks']} 块，新增 {result['new_chunks']} 块")
+            Formatter.print_info(f"   新增数据: {result['new_bytes'] / 1024:.2f} KB / 快照大小 {result['size'] / 1024:.2f} KB")
+            return
+
         Formatter.print_success(f"\n✅ 数据库备份成功")
         Formatter.print_info(f"   备份文件: [bold]{backup_path}[/bold]")
         
@@ -51,7 +102,7 @@ def backup(output: Optional[str], overwrite: bool):
 
 
 @data.command()
-@click.option("-i", "--input", required=True, help="指定备份文件路径（需为合法SQLite文件）")
+@click.option("-i", "--input", required=True, help="指定备份文件路径（需为合法SQLite文件、gzip/xz/bz2压缩备份或增量备份清单）")
 @click.option("-b", "--backup-current", default=True, help="恢复前自动备份当前数据库")
 @click.option("-y", "--confirm", is_flag=True, default=False, help="跳过恢复二次确认")
 def restore(input: str, backup_current: bool, confirm: bool):
@@ -62,7 +113,14 @@ def restore(input: str, backup_current: bool, confirm: bool):
     cashlog data restore -i ~/cashlog_backup.db             # 从指定备份文件恢复，恢复前自动备份当前数据
     cashlog data restore -i ~/cashlog_backup.db -y           # 跳过确认直接恢复
     cashlog data restore -i ~/cashlog_backup.db -y -b False  # 跳过确认且不备份当前数据直接恢复
+    cashlog data restore -i ~/cashlog_backup.db.xz -y        # 从压缩备份恢复，自动识别压缩格式
+    cashlog data restore -i data/backups/store/manifests/snapshot_xxx.json  # 从增量备份清单恢复
     """
+    from cashlog.cli.options import confirm_continue
+    from cashlog.services.data_service import DataService
+    from cashlog.utils.formatter import Formatter
+    from cashlog.models.db import init_db
+
     init_db()  # 确保数据库已初始化
     
     # 展开用户路径
@@ -75,8 +133,7 @@ def restore(input: str, backup_current: bool, confirm: bool):
         if backup_current:
             Formatter.print_info("   系统将自动备份当前数据库")
         
-        response = click.prompt("是否继续？(y/N)", default="N")
-        if response.lower() != 'y':
+        if not confirm_continue():
             Formatter.print_info("恢复操作已取消")
             return
     
@@ -113,3 +170,117 @@ def restore(input: str, backup_current: bool, confirm: bool):
         Formatter.print_error(f"\n❌ IO错误: {str(e)}")
     except Exception as e:
         Formatter.print_error(f"\n❌ 恢复失败: {str(e)}")
+
+
+@data.command()
+def gc():
+    """
+    清理增量备份存储中不再被任何清单引用的数据块
+
+    删除 data/backups/store/manifests 下的清单文件即可删除对应快照，再执行本命令回收空间。
+
+    示例:
+    cashlog data gc
+    """
+    from cashlog.services.data_service import DataService
+    from cashlog.utils.formatter import Formatter
+
+    try:
+        result = DataService.gc_chunks()
+        Formatter.print_success(f"清理完成: 删除 {result['removed']} 块，释放 {result['freed_bytes'] / 1024:.2f} KB")
+        Formatter.print_info(f"   清单 {result['manifests']} 个，保留 {result['kept']} 块")
+    except ValueError as e:
+        Formatter.print_error(f"清理已中止，未删除任何数据块: {str(e)}")
+    except Exception as e:
+        Formatter.print_error(f"清理失败: {str(e)}")
+
+
+@data.command(name="rebuild-rollups")
+def rebuild_rollups():
+    """
+    从交易记录全量重建月度分类汇总表
+
+    汇总表平时由触发器自动维护，在直接修改过数据库文件或怀疑汇总不一致时使用。
+
+    示例:
+    cashlog data rebuild-rollups
+    """
+    from cashlog.services.report_service import ReportService
+    from cashlog.utils.formatter import Formatter
+    from cashlog.models.db import get_db, init_db
+
+    init_db()  # 确保数据库已初始化
+
+    try:
+        db = next(get_db())
+        try:
+            count = ReportService.rebuild_rollups(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        Formatter.print_success(f"月度分类汇总已重建，共 {count} 行")
+    except Exception as e:
+        Formatter.print_error(f"重建汇总失败: {str(e)}")
+
+
+@data.command()
+@click.option("--table", type=click.Choice(["transactions", "todos"]), default="transactions", show_default=True, help="要导出的表")
+@click.option("--format", "file_format", type=click.Choice(["csv", "jsonl", "sql"]), default="csv", show_default=True, help="导出格式")
+@click.option("-o", "--output", help="导出文件路径，省略时写到标准输出")
+@click.option("-f", "--overwrite", is_flag=True, default=False, help="强制覆盖已有导出文件")
+@click.option("--compress", type=click.Choice(["gzip", "xz", "bz2"]), help="流式压缩导出数据，文件后缀为.gz/.xz/.bz2时自动启用")
+@click.option("-m", "--month", help="月份，格式：YYYY-MM（仅交易）")
+@click.option("-c", "--category", help="分类")
+@click.option("-t", "--tags", help="标签，多个标签用逗号分隔")
+@click.option("--all-tags", is_flag=True, default=False, help="要求包含全部指定标签，默认包含任一标签即可")
+@click.option("--type", "transaction_type", type=click.Choice(["income", "expense"]), help="交易类型（仅交易）")
+@click.option("--chunk-size", type=int, default=5000, show_default=True, help="每次从数据库读取的行数")
+def export(table: str, file_format: str, output: Optional[str], overwrite: bool, compress: Optional[str],
+           month: Optional[str], category: Optional[str], tags: Optional[str], all_tags: bool,
+           transaction_type: Optional[str], chunk_size: int):
+    """
+    流式导出交易或待办数据
+
+    按ID顺序分批读取并逐行写出，数据量再大内存占用也保持不变。
+    sql 格式输出包在一个事务中的 INSERT 语句，只包含所选表本身的数据。
+
+    示例:
+    cashlog data export -o ledger.csv                      # 导出全部交易为CSV
+    cashlog data export --format jsonl -m 2023-10 -c 餐饮   # 将10月餐饮交易以JSONL写到标准输出
+    cashlog data export --table todos --format sql -o todos.sql.gz  # 导出待办为gzip压缩的SQL
+    """
+    from cashlog.services.export_service import ExportService
+    from cashlog.utils.formatter import Formatter
+    from cashlog.models.db import get_db, init_db
+
+    init_db()  # 确保数据库已初始化
+
+    try:
+        filters = {
+            "month": month,
+            "category": category,
+            "tags": tags,
+            "tags_match": "all" if tags and all_tags else None,
+            "transaction_type": transaction_type,
+        }
+        db = next(get_db())
+        result = ExportService.export_table(
+            db,
+            output_path=output,
+            table=table,
+            file_format=file_format,
+            compress=compress,
+            overwrite=overwrite,
+            chunk_size=chunk_size,
+            **{key: value for key, value in filters.items() if value}
+        )
+        # 写到标准输出时不打印提示，避免混入导出数据
+        if result["path"]:
+            Formatter.print_success(f"导出完成: {result['rows']} 行 -> {result['path']}")
+    except FileExistsError as e:
+        Formatter.print_error(str(e))
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"导出失败: {str(e)}")
@@ -0,0 +1,49 @@
+"""按需加载子命令的命令组"""
+import importlib
+from typing import Dict, List, Optional, Tuple
+import click
+
+
+class LazyGroup(click.Group):
+    """
+    延迟导入子命令的命令组
+
+    子命令以 {"命令名": ("模块路径:属性名", "简短帮助")} 的形式登记，
+    只有真正调用某个子命令时才导入对应模块。列出帮助信息时使用登记的
+    简短帮助，不会触发任何子命令模块的导入。
+    """
+
+    def __init__(self, *args, lazy_subcommands: Optional[Dict[str, Tuple[str, str]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_subcommands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name in self.lazy_subcommands and cmd_name not in self.commands:
+            self.add_command(self._load(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        rows = []
+        for name in self.list_commands(ctx):
+            if name in self.commands:
+                command = self.commands[name]
+                if command.hidden:
+                    continue
+                rows.append((name, command.get_short_help_str(formatter.width - 6 - len(name))))
+            else:
+                rows.append((name, self.lazy_subcommands[name][1]))
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+    def _load(self, cmd_name: str) -> click.Command:
+        """导入并返回登记的子命令"""
+        import_path = self.lazy_subcommands[cmd_name][0]
+        module_name, attr = import_path.split(":", 1)
+        command = getattr(importlib.import_module(module_name), attr)
+        if not isinstance(command, click.Command):
+            raise TypeError(f"{import_path} 不是有效的命令对象")
+        return command
@@ -1,27 +1,42 @@
 """主命令行接口"""
+from typing import Optional
 import click
-from cashlog.cli.transaction_cli import transaction
-from cashlog.cli.todo_cli import todo
-from cashlog.cli.report_cli import report
-from cashlog.cli.data_cli import data
+from cashlog.cli.lazy_group import LazyGroup
+from cashlog.utils.formatter import OUTPUT_FORMATS
 
 
-@click.group()
+# 子命令在调用时才导入，避免每次启动都加载ORM、全部服务和rich
+@click.group(cls=LazyGroup, lazy_subcommands={
+    "transaction": ("cashlog.cli.transaction_cli:transaction", "交易管理命令组"),
+    "todo": ("cashlog.cli.todo_cli:todo", "待办事项管理命令组"),
+    "report": ("cashlog.cli.report_cli:report", "报表管理命令组"),
+    "data": ("cashlog.cli.data_cli:data", "数据备份与恢复命令组"),
+    "serve": ("cashlog.cli.serve_cli:serve", "启动常驻服务，加速后续命令"),
+    "shell": ("cashlog.cli.batch_cli:shell", "交互式命令行"),
+    "batch": ("cashlog.cli.batch_cli:batch", "批量执行命令"),
+})
 @click.version_option("0.1.0", "-v", "--version")
-def cli():
+@click.option("--output", type=click.Choice(OUTPUT_FORMATS), default="table", show_default=True,
+              envvar="CASHLOG_OUTPUT", help="列表和报表的默认输出格式，也可通过环境变量 CASHLOG_OUTPUT 设置")
+@click.option("--profile", is_flag=True, help="命令结束后在标准错误输出耗时分析：各阶段耗时、SQL统计、N+1和全表扫描警告")
+@click.option("--profile-cpu", is_flag=True, help="耗时分析中加入cProfile函数耗时统计")
+@click.option("--profile-memory", is_flag=True, help="耗时分析中加入tracemalloc内存分配统计")
+@click.option("--profile-output", type=click.Path(dir_okay=False), help="将耗时分析结果以JSON写入文件")
+@click.option("--trace-sql", is_flag=True, help="每条SQL完成时在标准错误输出语句、耗时和返回行数")
+@click.pass_context
+def cli(ctx: click.Context, output: str, profile: bool, profile_cpu: bool, profile_memory: bool,
+        profile_output: Optional[str], trace_sql: bool):
     """
     轻量化本地记账 / 待办 CLI 工具
-    
+
     用于管理个人收支和待办事项的命令行工具，数据存储在本地SQLite数据库中。
     """
-    pass
-
-
-# 注册子命令
-cli.add_command(transaction)
-cli.add_command(todo)
-cli.add_command(report)
-cli.add_command(data)
+    if profile or profile_cpu or profile_memory or profile_output or trace_sql:
+        from cashlog.utils.profiler import CommandProfiler
+        profiler = CommandProfiler(cpu=profile_cpu, memory=profile_memory, trace_sql=trace_sql)
+        profiler.start()
+        summary = profile or profile_cpu or profile_memory
+        ctx.call_on_close(lambda: profiler.finish(summary=summary, output_path=profile_output))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,51 @@
+"""命令行公共选项"""
+from typing import Optional
+import click
+from cashlog.utils.formatter import OUTPUT_FORMATS
+
+
+def output_option(func):
+    """为命令添加 --output 选项，未指定时沿用顶层命令的 --output"""
+    return click.option(
+        "--output",
+        type=click.Choice(OUTPUT_FORMATS),
+        help="输出格式：table(表格)、tsv、csv、jsonl，默认沿用 cashlog --output",
+    )(func)
+
+
+def resolve_output(output: Optional[str]) -> str:
+    """
+    确定实际使用的输出格式
+
+    Args:
+        output: 子命令上指定的输出格式
+
+    Returns:
+        子命令指定的格式，未指定时为顶层命令的格式，默认为table
+    """
+    if output:
+        return output
+    ctx = click.get_current_context(silent=True)
+    root_output = ctx.find_root().params.get("output") if ctx else None
+    return root_output or "table"
+
+
+def confirm_continue() -> bool:
+    """
+    二次确认，询问用户是否继续
+
+    批处理从标准输入读取命令，提示会把下一行命令当作回答读走；
+    以 interactive=False 执行的命令不提示，直接报错要求加上 -y。
+
+    Returns:
+        用户是否输入 y
+
+    Raises:
+        click.UsageError: 当前命令不允许交互时
+    """
+    ctx = click.get_current_context(silent=True)
+    root_obj = ctx.find_root().obj if ctx else None
+    if isinstance(root_obj, dict) and root_obj.get("interactive") is False:
+        raise click.UsageError("批处理中无法进行二次确认，请为该命令加上 -y")
+    response = click.prompt("是否继续？(y/N)", default="N")
+    return response.lower() == "y"
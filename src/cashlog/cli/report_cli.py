@@ -1,9 +1,7 @@
 """报表相关命令行接口"""
 import click
 from typing import Optional
-from cashlog.models.db import get_db, init_db
-from cashlog.services.report_service import ReportService
-from cashlog.utils.formatter import Formatter
+from cashlog.cli.options import output_option, resolve_output
 
 
 @click.group()
@@ -15,7 +13,8 @@ def report():
 @report.command()
 @click.option("-m", "--month", help="月份，格式：YYYY-MM，默认为当前月")
 @click.option("--format", type=click.Choice(["text", "markdown"]), default="text", help="输出格式，默认为text")
-def monthly(month: Optional[str], format: str):
+@output_option
+def monthly(month: Optional[str], format: str, output: Optional[str]):
     """
     生成月度收支报表
     
@@ -23,23 +22,85 @@ def monthly(month: Optional[str], format: str):
     cashlog report monthly  # 生成当前月报表
     cashlog report monthly -m 2023-10  # 生成指定月份报表
     cashlog report monthly --format markdown  # 生成Markdown格式报表
+    cashlog report monthly --output jsonl  # 按分类逐行输出JSON，--format 此时不生效
     """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.report_service import ReportService
+    from cashlog.utils.formatter import Formatter, REPORT_FIELDS
+
     init_db()  # 确保数据库已初始化
     
     try:
+        output = resolve_output(output)
         db = next(get_db())
         report_data = ReportService.generate_monthly_report(db, month)
+
+        # 机器可读格式每个分类输出一行
+        if output != "table":
+            rows = (
+                {"month": report_data["month"], "category": category, **stats}
+                for category, stats in report_data["category_stats"].items()
+            )
+            Formatter.write_rows(rows, REPORT_FIELDS, output)
+            return
+
         formatted_report = ReportService.format_report(report_data, format)
         
         if not report_data["has_data"]:
             Formatter.print_info(f"{month or '当前月'} 暂无交易数据")
         
         # 打印报表
-        from rich.console import Console
-        console = Console()
-        console.print(formatted_report)
+        Formatter.print_text(formatted_report)
         
     except ValueError as e:
         Formatter.print_error(str(e))
     except Exception as e:
         Formatter.print_error(f"生成报表失败: {str(e)}")
+
+
+@report.command(name="range")
+@click.option("--from", "start", required=True, help="起始月份或日期，格式：YYYY-MM 或 YYYY-MM-DD")
+@click.option("--to", "end", help="结束月份或日期（含），默认与起始相同")
+@click.option("--by", type=click.Choice(["month", "week", "day"]), default="month",
+              help="统计周期，默认按月；按周时以每周周一的日期表示")
+@click.option("--pivot", type=click.Choice(["category"]), help="按分类展开为 分类×周期 矩阵")
+@click.option("--value", type=click.Choice(["net", "income", "expense"]), default="net",
+              help="透视表单元格的取值: net(净额), income(收入), expense(支出)")
+@click.option("--format", type=click.Choice(["text", "markdown", "csv"]), default="text", help="输出格式，默认为text")
+def range_report(start: str, end: Optional[str], by: str, pivot: Optional[str], value: str, format: str):
+    """
+    生成区间收支报表
+
+    整个区间的统计由一次分组查询完成，不需要逐月生成报表。
+
+    示例:
+    cashlog report range --from 2024-01 --to 2024-12  # 2024年逐月收支
+    cashlog report range --from 2024-01 --to 2024-12 --pivot category  # 分类×月份净额矩阵
+    cashlog report range --from 2024-03-01 --to 2024-03-31 --by week --pivot category --value expense
+    cashlog report range --from 2024-01 --to 2024-12 --pivot category --format csv > 2024.csv
+    """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.report_service import ReportService
+    from cashlog.utils.formatter import Formatter
+
+    init_db()  # 确保数据库已初始化
+
+    try:
+        db = next(get_db())
+        report_data = ReportService.generate_range_report(db, start, end, by)
+        formatted_report = ReportService.format_range_report(report_data, format, pivot, value)
+
+        # CSV 不经过rich，原样写到标准输出便于重定向
+        if format == "csv":
+            click.echo(formatted_report, nl=False)
+            return
+
+        if not report_data["has_data"]:
+            Formatter.print_info(f"{report_data['start']} 至 {report_data['end']} 暂无交易数据")
+
+        Formatter.print_text(formatted_report)
+
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"生成报表失败: {str(e)}")
@@ -0,0 +1,66 @@
+"""常驻服务命令行接口"""
+import click
+from typing import Optional
+
+
+@click.command()
+@click.option("--socket", "socket_path", type=click.Path(dir_okay=False),
+              help="套接字路径，默认为 data/cashlog.sock，也可通过环境变量 CASHLOG_SOCKET 指定")
+@click.option("--idle-timeout", type=float, help="空闲多少秒后自动退出，默认一直运行")
+@click.option("--stop", is_flag=True, default=False, help="停止正在运行的常驻服务")
+def serve(socket_path: Optional[str], idle_timeout: Optional[float], stop: bool):
+    """
+    启动常驻服务
+
+    服务进程保持已导入的模块、数据库连接和缓存。服务运行期间，transaction add/list/search、
+    todo add/update/list/search 和 report monthly 会自动转发给服务执行，省去每次启动解释器、
+    导入依赖和初始化数据库的时间；服务未运行时这些命令照常在本进程内执行。
+    设置环境变量 CASHLOG_NO_DAEMON=1 可以临时禁用转发。
+
+    示例:
+    cashlog serve &                    # 在后台启动常驻服务
+    cashlog serve --idle-timeout 600   # 空闲10分钟后自动退出
+    cashlog serve --stop               # 停止常驻服务
+    """
+    import signal
+    from pathlib import Path
+    from cashlog.cli.client import get_socket_path, send_request
+    from cashlog.utils.formatter import Formatter
+
+    path = Path(socket_path) if socket_path else get_socket_path()
+
+    if stop:
+        try:
+            response = send_request({"action": "shutdown"}, path, timeout=5.0)
+        except OSError as e:
+            response = None
+            Formatter.print_error(f"停止常驻服务失败: {str(e)}")
+        if response is None:
+            Formatter.print_info(f"常驻服务未运行: {path}")
+        else:
+            Formatter.print_success(f"常驻服务已停止（PID: {response['pid']}，共处理 {response['requests']} 个请求）")
+        return
+
+    from cashlog.cli.server import CommandServer
+
+    try:
+        server = CommandServer(path, idle_timeout)
+    except (RuntimeError, OSError) as e:
+        Formatter.print_error(f"启动常驻服务失败: {str(e)}")
+        return
+
+    try:
+        server.warm_up()
+    except Exception as e:
+        server.server_close()
+        Formatter.print_error(f"启动常驻服务失败: {str(e)}")
+        return
+
+    def on_terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    # kill 与 Ctrl+C 一样正常退出并删除套接字文件
+    signal.signal(signal.SIGTERM, on_terminate)
+    Formatter.print_success(f"常驻服务已启动，监听 {path}")
+    server.serve()
+    Formatter.print_info("常驻服务已退出")
@@ -0,0 +1,239 @@
+"""
+常驻服务
+
+cashlog serve 启动后在Unix域套接字上监听，进程内保持已导入的模块、数据库引擎、
+连接池和已确认的结构版本。客户端（cashlog.cli.client）发来命令行参数，服务在进程内
+执行对应的click命令。标准输出按块（每行一个 {"stdout": ...} JSON）边执行边发回客户端，
+命令结束后再发一行包含标准错误和退出码的JSON。
+
+请求按顺序逐个处理，SQLite的写入本来就是串行的，也避免了多个命令同时切换工作目录和环境变量。
+"""
+import contextlib
+import io
+import json
+import os
+import socketserver
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+from cashlog.cli.client import ENGINE_ENV, FORWARDED_ENV, send_request
+
+# 标准输出每攒够这么多字符就发给客户端一次
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+class _SocketWriter(io.TextIOBase):
+    """
+    把命令的标准输出分块发给客户端
+
+    缓冲不超过 STREAM_CHUNK_SIZE 个字符。客户端断开（如下游管道已关闭）后不再抛出异常，
+    后续输出直接丢弃，与命令在本进程内执行时写到已关闭管道的处理一致。
+    """
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self._buffer = []
+        self._size = 0
+        self.disconnected = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        # 与 StringIO 一致只接受字符串，click 据此判断这是文本流
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if not self.disconnected:
+            self._buffer.append(text)
+            self._size += len(text)
+            if self._size >= STREAM_CHUNK_SIZE:
+                self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        chunk = "".join(self._buffer)
+        self._buffer, self._size = [], 0
+        if not chunk or self.disconnected:
+            return
+        try:
+            # 单次写入很长时也按块大小拆开发送
+            for start in range(0, len(chunk), STREAM_CHUNK_SIZE):
+                self._wfile.write(_encode({"stdout": chunk[start:start + STREAM_CHUNK_SIZE]}))
+            self._wfile.flush()
+        except OSError:
+            self.disconnected = True
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """读取一行JSON请求；命令请求边执行边写回输出块，最后写回一行结果"""
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            response = self.server.dispatch(request, self.wfile)
+        except ValueError as e:
+            response = {"exit_code": 1, "stdout": "", "stderr": f"无效的请求: {e}\n"}
+        # 客户端已断开时没有人接收结果
+        with contextlib.suppress(OSError):
+            self.wfile.write(_encode(response))
+
+
+class CommandServer(socketserver.UnixStreamServer):
+    """在常驻进程中执行转发来的命令"""
+
+    def __init__(self, socket_path: Path, idle_timeout: Optional[float] = None):
+        """
+        Args:
+            socket_path: 监听的套接字路径
+            idle_timeout: 空闲多少秒后自动退出，为None时一直运行
+
+        Raises:
+            RuntimeError: 当已有服务在该套接字上运行时
+        """
+        self.socket_path = Path(socket_path)
+        self.timeout = idle_timeout
+        self.requests = 0
+        self._running = False
+        # 引擎按启动时的环境创建，请求的这些环境变量不同时让客户端回退
+        self.engine_env = {name: os.environ.get(name) for name in ENGINE_ENV}
+        if self.socket_path.exists():
+            if send_request({"action": "ping"}, self.socket_path, timeout=1.0) is not None:
+                raise RuntimeError(f"常驻服务已在运行: {self.socket_path}")
+            self.socket_path.unlink()
+
+        # 套接字只允许当前用户访问
+        previous_umask = os.umask(0o177)
+        try:
+            super().__init__(str(self.socket_path), _RequestHandler)
+        finally:
+            os.umask(previous_umask)
+
+    def warm_up(self) -> None:
+        """预先导入命令模块和依赖，建立数据库连接并确认结构版本"""
+        from cashlog.cli.main_cli import cli
+        from cashlog.models.db import init_db, engine
+        from cashlog.utils.formatter import Formatter
+        import cashlog.services.transaction_service  # noqa: F401
+        import cashlog.services.todo_service  # noqa: F401
+        import cashlog.services.report_service  # noqa: F401
+
+        ctx = cli.make_context("cashlog", [], resilient_parsing=True)
+        for name in ("transaction", "todo", "report"):
+            cli.get_command(ctx, name)
+        init_db()
+        with engine.connect():
+            pass
+        with Formatter.use_console(file=io.StringIO()):
+            pass
+
+    def serve(self) -> None:
+        """逐个处理请求，直到收到停止请求、空闲超时或被中断（KeyboardInterrupt）"""
+        self._running = True
+        try:
+            while self._running:
+                self.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
+
+    def handle_timeout(self) -> None:
+        self._running = False
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            self.socket_path.unlink()
+
+    def dispatch(self, request: Dict[str, Any], wfile=None) -> Dict[str, Any]:
+        """
+        处理一个请求
+
+        Args:
+            request: 请求内容，action 为 ping、shutdown，或包含 argv 的命令请求
+            wfile: 命令输出块写入的连接，为None时丢弃输出
+
+        Returns:
+            响应内容
+        """
+        action = request.get("action", "run")
+        if action == "ping":
+            return {"pid": os.getpid(), "requests": self.requests}
+        if action == "shutdown":
+            self._running = False
+            return {"pid": os.getpid(), "requests": self.requests}
+        if action != "run" or not isinstance(request.get("argv"), list):
+            raise ValueError(f"未知的操作 {action}")
+        env = request.get("env") or {}
+        if any(env.get(name) != value for name, value in self.engine_env.items()):
+            return {"fallback": True}
+        self.requests += 1
+        return self.run_command(request, wfile or io.BytesIO())
+
+    def run_command(self, request: Dict[str, Any], wfile) -> Dict[str, Any]:
+        """
+        在当前进程内执行一条命令，标准输出分块写到 wfile，并捕获标准错误和退出码
+
+        执行期间切换到客户端的工作目录和环境变量，rich输出按客户端的终端宽度和颜色支持渲染。
+        """
+        from sqlalchemy.orm import close_all_sessions
+        from cashlog.cli.main_cli import cli
+        from cashlog.models.db import invalidate_init_cache
+        from cashlog.utils.formatter import Formatter
+
+        # 数据库文件可能已被其他进程恢复为旧版本，让本次命令的 init_db 重新检查结构版本
+        invalidate_init_cache()
+
+        stdout, stderr = _SocketWriter(wfile), io.StringIO()
+        env = request.get("env") or {}
+        saved_env = {name: os.environ.get(name) for name in FORWARDED_ENV}
+        saved_cwd = os.getcwd()
+        exit_code = 0
+        try:
+            for name in FORWARDED_ENV:
+                os.environ.pop(name, None)
+            os.environ.update({name: value for name, value in env.items() if name in FORWARDED_ENV})
+            os.chdir(request.get("cwd") or saved_cwd)
+            console_options = {"file": stdout, "width": request.get("columns") or 80}
+            if request.get("isatty"):
+                console_options["force_terminal"] = True
+            else:
+                console_options["color_system"] = None
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr), \
+                    _redirect_stdin(io.StringIO()), Formatter.use_console(**console_options):
+                try:
+                    cli.main(args=request["argv"], prog_name="cashlog")
+                except SystemExit as e:
+                    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except Exception as e:
+                    stderr.write(f"命令执行失败: {e}\n")
+                    exit_code = 1
+        finally:
+            stdout.flush()
+            # 命令通过 next(get_db()) 取得的会话不会显式关闭，在这里归还连接，避免连接池耗尽
+            close_all_sessions()
+            os.chdir(saved_cwd)
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        return {"exit_code": exit_code, "stderr": stderr.getvalue()}
+
+
+@contextlib.contextmanager
+def _redirect_stdin(stream):
+    """转发的命令不能读取常驻进程的标准输入"""
+    previous = sys.stdin
+    sys.stdin = stream
+    try:
+        yield stream
+    finally:
+        sys.stdin = previous
@@ -1,9 +1,7 @@
 """待办事项相关命令行接口"""
 import click
-from typing import Optional
-from cashlog.models.db import get_db, init_db
-from cashlog.services.todo_service import TodoService
-from cashlog.utils.formatter import Formatter
+from typing import Optional, Tuple
+from cashlog.cli.options import output_option, resolve_output
 
 
 @click.group()
@@ -25,6 +23,10 @@ def add(content: str, category: str, tags: Optional[str], deadline: Optional[str
     cashlog todo add -c "完成项目报告" -C 工作 -t "重要,紧急" -d 2023-12-31
     cashlog todo add -c "购物" -C 个人 -t "日常" -d 2023-12-15 18:00:00
     """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.todo_service import TodoService
+    from cashlog.utils.formatter import Formatter
+
     init_db()  # 确保数据库已初始化
     
     try:
@@ -45,29 +47,63 @@ def add(content: str, category: str, tags: Optional[str], deadline: Optional[str
 
 
 @todo.command()
-@click.argument("todo_id")
+@click.argument("todo_ids", nargs=-1)
 @click.argument("status", type=click.Choice(["todo", "doing", "done"]))
-def update(todo_id: str, status: str):
+@click.option("-c", "--category", help="只更新指定分类的待办事项")
+@click.option("-t", "--tags", help="只更新包含指定标签的待办事项，多个标签用逗号分隔")
+@click.option("--all-tags", is_flag=True, default=False, help="要求包含全部指定标签，默认包含任一标签即可")
+@click.option("--before", help="只更新截止时间在此日期之前的待办事项，格式：YYYY-MM-DD")
+@click.option("--after", help="只更新截止时间在此日期之后的待办事项，格式：YYYY-MM-DD")
+@click.option("--dry-run", is_flag=True, default=False, help="只显示将被更新的条数，不修改数据")
+def update(todo_ids: Tuple[str, ...], status: str, category: Optional[str], tags: Optional[str], all_tags: bool,
+           before: Optional[str], after: Optional[str], dry_run: bool):
     """
     更新待办事项状态
-    
+
+    TODO_IDS 可以是多个ID、逗号分隔的列表或范围（如 1,3,5-9），也可以省略并用筛选条件选择，
+    两者同时指定时取交集。批量更新使用一条语句完成，只提交一次。
+
     示例:
     cashlog todo update 1 doing  # 将ID为1的待办事项标记为进行中
     cashlog todo update 2 done    # 将ID为2的待办事项标记为已完成
+    cashlog todo update 3,5,10-40 done  # 批量更新多个ID和范围
+    cashlog todo update done -c 工作 --before 2023-12-31  # 按筛选条件批量更新
+    cashlog todo update done -t 迭代12 --dry-run  # 预览将被更新的条数
     """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.todo_service import TodoService
+    from cashlog.utils.formatter import Formatter
+
     init_db()  # 确保数据库已初始化
-    
+
     try:
-        # 验证ID格式
-        try:
-            todo_id_int = int(todo_id)
-        except ValueError:
-            Formatter.print_error("待办事项ID必须为数字")
-            return
-        
+        filters = {}
+        if category:
+            filters["category"] = category
+        if tags:
+            filters["tags"] = tags
+            if all_tags:
+                filters["tags_match"] = "all"
+        if before:
+            filters["deadline_before"] = before
+        if after:
+            filters["deadline_after"] = after
+
         db = next(get_db())
-        todo = TodoService.update_todo_status(db, todo_id_int, status)
-        Formatter.print_success(f"待办事项(ID: {todo.id})状态已更新为: {todo.status_text}")
+
+        # 单个ID保持逐条更新：不存在时报错，并显示更新后的状态
+        if len(todo_ids) == 1 and not filters and not dry_run and todo_ids[0].strip().isdigit():
+            todo = TodoService.update_todo_status(db, int(todo_ids[0]), status)
+            Formatter.print_success(f"待办事项(ID: {todo.id})状态已更新为: {todo.status_text}")
+            return
+
+        count = TodoService.bulk_update_status(db, status, todo_ids, dry_run=dry_run, **filters)
+        if dry_run:
+            Formatter.print_info(f"将更新 {count} 条待办事项（未修改数据）")
+        elif count:
+            Formatter.print_success(f"已更新 {count} 条待办事项的状态")
+        else:
+            Formatter.print_info("没有需要更新的待办事项")
     except ValueError as e:
         Formatter.print_error(str(e))
     except Exception as e:
@@ -78,9 +114,16 @@ def update(todo_id: str, status: str):
 @click.option("-s", "--status", type=click.Choice(["todo", "doing", "done"]), help="状态")
 @click.option("-c", "--category", help="分类")
 @click.option("-t", "--tags", help="标签，多个标签用逗号分隔")
+@click.option("--all-tags", is_flag=True, default=False, help="要求包含全部指定标签，默认包含任一标签即可")
 @click.option("--before", help="截止时间之前，格式：YYYY-MM-DD")
 @click.option("--after", help="截止时间之后，格式：YYYY-MM-DD")
-def list(status: Optional[str], category: Optional[str], tags: Optional[str], before: Optional[str], after: Optional[str]):
+@click.option("-l", "--limit", type=int, help="最多显示的条数")
+@click.option("--after-id", type=int, help="从指定ID的记录之后开始显示（上一页最后一条记录的ID）")
+@click.option("--stream", is_flag=True, default=False, help="流式读取并分块输出，适合大量数据")
+@output_option
+def list(status: Optional[str], category: Optional[str], tags: Optional[str], all_tags: bool,
+         before: Optional[str], after: Optional[str], limit: Optional[int], after_id: Optional[int], stream: bool,
+         output: Optional[str]):
     """
     列出待办事项
     
@@ -88,10 +131,17 @@ def list(status: Optional[str], category: Optional[str], tags: Optional[str], be
     cashlog todo list  # 列出所有待办事项
     cashlog todo list -s todo  # 列出待办状态的事项
     cashlog todo list -c 工作 --before 2023-12-31  # 列出工作分类且截止日期在2023-12-31之前的事项
+    cashlog todo list -l 20 --after-id 35  # 分页：ID为35的事项之后的20条
+    cashlog todo list -s todo --output tsv | cut -f2  # 以TSV输出并交给其他工具处理
     """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.todo_service import TodoService
+    from cashlog.utils.formatter import Formatter, TODO_FIELDS
+
     init_db()  # 确保数据库已初始化
     
     try:
+        output = resolve_output(output)
         filters = {}
         if status:
             filters["status"] = status
@@ -99,16 +149,21 @@ def list(status: Optional[str], category: Optional[str], tags: Optional[str], be
             filters["category"] = category
         if tags:
             filters["tags"] = tags
+            if all_tags:
+                filters["tags_match"] = "all"
         if before:
             filters["deadline_before"] = before
         if after:
             filters["deadline_after"] = after
         
         db = next(get_db())
-        todos = TodoService.get_todos(db, **filters)
-        
-        # 格式化并打印
-        formatted_data = Formatter.format_todos(todos)
+
+        # 机器可读格式边查询边写出，不经过rich
+        if output != "table":
+            rows = TodoService.iter_records(db, include_content=True, limit=limit, after_id=after_id, **filters)
+            Formatter.write_rows(rows, TODO_FIELDS, output)
+            return
+
         headers = {
             "id": "ID",
             "content": "内容",
@@ -118,12 +173,84 @@ def list(status: Optional[str], category: Optional[str], tags: Optional[str], be
             "deadline": "截止时间",
             "created_at": "创建时间"
         }
-        
+
         if filters:
             Formatter.print_info(f"查询条件: {filters}")
+
+        if stream:
+            todos = TodoService.iter_records(db, include_content=True, limit=limit, after_id=after_id, **filters)
+            Formatter.print_table_stream(todos, headers, Formatter.format_todos)
+            return
+
+        todos = TodoService.list_records(db, include_content=True, limit=limit, after_id=after_id, **filters)
+
+        # 格式化并打印
+        formatted_data = Formatter.format_todos(todos)
         Formatter.print_table(formatted_data, headers)
+        if limit and len(todos) == limit:
+            Formatter.print_info(f"查看下一页: --after-id {todos[-1].id}")
         
     except ValueError as e:
         Formatter.print_error(str(e))
     except Exception as e:
         Formatter.print_error(f"查询待办事项失败: {str(e)}")
+
+
+@todo.command()
+@click.argument("text")
+@click.option("-s", "--status", type=click.Choice(["todo", "doing", "done"]), help="状态")
+@click.option("-c", "--category", help="分类")
+@click.option("-t", "--tags", help="标签，多个标签用逗号分隔")
+@click.option("--all-tags", is_flag=True, default=False, help="要求包含全部指定标签，默认包含任一标签即可")
+@click.option("-l", "--limit", type=int, default=20, show_default=True, help="最多显示的条数")
+@output_option
+def search(text: str, status: Optional[str], category: Optional[str], tags: Optional[str], all_tags: bool,
+           limit: int, output: Optional[str]):
+    """
+    全文检索待办内容和标签，按相关度排序
+
+    TEXT 中多个关键词用空格分隔，需全部命中。
+
+    示例:
+    cashlog todo search "季度汇报"  # 内容或标签包含“季度汇报”的待办
+    cashlog todo search "report" -s todo -c 工作
+    """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.todo_service import TodoService
+    from cashlog.utils.formatter import Formatter, TODO_FIELDS
+
+    init_db()  # 确保数据库已初始化
+
+    try:
+        output = resolve_output(output)
+        filters = {}
+        if status:
+            filters["status"] = status
+        if category:
+            filters["category"] = category
+        if tags:
+            filters["tags"] = tags
+            if all_tags:
+                filters["tags_match"] = "all"
+
+        db = next(get_db())
+        todos = TodoService.search_records(db, text, include_content=True, limit=limit, **filters)
+
+        if output != "table":
+            Formatter.write_rows(todos, TODO_FIELDS, output)
+            return
+
+        headers = {
+            "id": "ID",
+            "content": "内容",
+            "category": "分类",
+            "status": "状态",
+            "tags": "标签",
+            "deadline": "截止时间",
+            "created_at": "创建时间"
+        }
+        Formatter.print_table(Formatter.format_todos(todos), headers)
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"搜索待办事项失败: {str(e)}")
@@ -1,9 +1,9 @@
 """交易相关命令行接口"""
 import click
-from typing import Optional
-from cashlog.models.db import get_db, init_db
-from cashlog.services.transaction_service import TransactionService
-from cashlog.utils.formatter import Formatter
+import contextlib
+import sys
+from typing import Any, Dict, Optional, Tuple
+from cashlog.cli.options import confirm_continue, output_option, resolve_output
 
 
 @click.group()
@@ -26,6 +26,10 @@ def add(amount: str, category: str, tags: Optional[str], notes: Optional[str], d
     cashlog transaction add -a 100.50 -c 工资 -t "收入,月度"
     cashlog transaction add -a -50.00 -c 餐饮 -t "支出,日常" -n "午餐"
     """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.transaction_service import TransactionService
+    from cashlog.utils.formatter import Formatter
+
     init_db()  # 确保数据库已初始化
     
     try:
@@ -51,8 +55,15 @@ def add(amount: str, category: str, tags: Optional[str], notes: Optional[str], d
 @click.option("-m", "--month", help="月份，格式：YYYY-MM")
 @click.option("-c", "--category", help="分类")
 @click.option("-t", "--tags", help="标签，多个标签用逗号分隔")
+@click.option("--all-tags", is_flag=True, default=False, help="要求包含全部指定标签，默认包含任一标签即可")
 @click.option("--type", type=click.Choice(["income", "expense"]), help="交易类型: income(收入), expense(支出)")
-def list(month: Optional[str], category: Optional[str], tags: Optional[str], type: Optional[str]):
+@click.option("-l", "--limit", type=int, help="最多显示的条数")
+@click.option("--after-id", type=int, help="从指定ID的记录之后开始显示（上一页最后一条记录的ID）")
+@click.option("--stream", is_flag=True, default=False, help="流式读取并分块输出，适合大量数据")
+@output_option
+def list(month: Optional[str], category: Optional[str], tags: Optional[str], all_tags: bool, type: Optional[str],
+         limit: Optional[int], after_id: Optional[int], stream: bool,
+         output: Optional[str]):
     """
     列出交易记录
     
@@ -61,10 +72,18 @@ def list(month: Optional[str], category: Optional[str], tags: Optional[str], typ
     cashlog transaction list -m 2023-10  # 列出10月交易
     cashlog transaction list --type income  # 列出所有收入
     cashlog transaction list -c 餐饮 -t "午餐,晚餐"  # 按分类和标签筛选
+    cashlog transaction list -l 50 --after-id 1200  # 分页：ID为1200的记录之后的50条
+    cashlog transaction list --stream  # 流式输出全部交易
+    cashlog transaction list --output csv > ledger.csv  # 导出为CSV，可再用 transaction import 导入
     """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.transaction_service import TransactionService
+    from cashlog.utils.formatter import Formatter, TRANSACTION_FIELDS
+
     init_db()  # 确保数据库已初始化
     
     try:
+        output = resolve_output(output)
         filters = {}
         if month:
             filters["month"] = month
@@ -72,14 +91,20 @@ def list(month: Optional[str], category: Optional[str], tags: Optional[str], typ
             filters["category"] = category
         if tags:
             filters["tags"] = tags
+            if all_tags:
+                filters["tags_match"] = "all"
         if type:
             filters["transaction_type"] = type
         
         db = next(get_db())
-        transactions = TransactionService.get_transactions(db, **filters)
-        
-        # 格式化并打印
-        formatted_data = Formatter.format_transactions(transactions)
+
+        # 机器可读格式边查询边写出，不经过rich
+        if output != "table":
+            rows = TransactionService.iter_records(db, include_notes=True, limit=limit, after_id=after_id,
+                                                   **filters)
+            Formatter.write_rows(rows, TRANSACTION_FIELDS, output)
+            return
+
         headers = {
             "id": "ID",
             "amount": "金额",
@@ -89,12 +114,272 @@ def list(month: Optional[str], category: Optional[str], tags: Optional[str], typ
             "notes": "备注",
             "created_at": "时间"
         }
-        
+
         if filters:
             Formatter.print_info(f"查询条件: {filters}")
+
+        if stream:
+            transactions = TransactionService.iter_records(db, include_notes=True, limit=limit, after_id=after_id,
+                                                           **filters)
+            Formatter.print_table_stream(transactions, headers, Formatter.format_transactions)
+            return
+
+        transactions = TransactionService.list_records(db, include_notes=True, limit=limit, after_id=after_id, **filters)
+
+        # 格式化并打印
+        formatted_data = Formatter.format_transactions(transactions)
         Formatter.print_table(formatted_data, headers)
+        if limit and len(transactions) == limit:
+            Formatter.print_info(f"查看下一页: --after-id {transactions[-1].id}")
         
     except ValueError as e:
         Formatter.print_error(str(e))
     except Exception as e:
         Formatter.print_error(f"查询交易记录失败: {str(e)}")
+
+
+@transaction.command()
+@click.argument("text")
+@click.option("-m", "--month", help="月份，格式：YYYY-MM")
+@click.option("-c", "--category", help="分类")
+@click.option("-t", "--tags", help="标签，多个标签用逗号分隔")
+@click.option("--all-tags", is_flag=True, default=False, help="要求包含全部指定标签，默认包含任一标签即可")
+@click.option("--type", type=click.Choice(["income", "expense"]), help="交易类型: income(收入), expense(支出)")
+@click.option("-l", "--limit", type=int, default=20, show_default=True, help="最多显示的条数")
+@output_option
+def search(text: str, month: Optional[str], category: Optional[str], tags: Optional[str], all_tags: bool,
+           type: Optional[str], limit: int, output: Optional[str]):
+    """
+    全文检索交易备注和标签，按相关度排序
+
+    TEXT 中多个关键词用空格分隔，需全部命中。三个字及以上的关键词走全文索引，
+    更短的关键词逐条匹配，与长关键词或其他筛选条件一起使用时更快。
+
+    示例:
+    cashlog transaction search "dinner"  # 备注或标签包含dinner的交易
+    cashlog transaction search "聚餐 dinner" -m 2024-03  # 3月同时包含两个关键词的交易
+    cashlog transaction search "工作日午餐" -c 餐饮 --output jsonl
+    """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.transaction_service import TransactionService
+    from cashlog.utils.formatter import Formatter, TRANSACTION_FIELDS
+
+    init_db()  # 确保数据库已初始化
+
+    try:
+        output = resolve_output(output)
+        filters = {}
+        if month:
+            filters["month"] = month
+        if category:
+            filters["category"] = category
+        if tags:
+            filters["tags"] = tags
+            if all_tags:
+                filters["tags_match"] = "all"
+        if type:
+            filters["transaction_type"] = type
+
+        db = next(get_db())
+        transactions = TransactionService.search_records(db, text, include_notes=True, limit=limit, **filters)
+
+        if output != "table":
+            Formatter.write_rows(transactions, TRANSACTION_FIELDS, output)
+            return
+
+        headers = {
+            "id": "ID",
+            "amount": "金额",
+            "type": "类型",
+            "category": "分类",
+            "tags": "标签",
+            "notes": "备注",
+            "created_at": "时间"
+        }
+        Formatter.print_table(Formatter.format_transactions(transactions), headers)
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"搜索交易记录失败: {str(e)}")
+
+
+@transaction.command(name="import")
+@click.argument("source", default="-")
+@click.option("--format", "file_format", type=click.Choice(["csv", "jsonl"]), help="输入格式，默认根据文件后缀判断，标准输入默认为csv")
+@click.option("-b", "--batch-size", type=int, default=1000, show_default=True, help="每批写入的行数")
+@click.option("-r", "--reject-file", help="拒绝行输出文件（JSONL格式），记录无法导入的行及原因")
+def import_(source: str, file_format: Optional[str], batch_size: int, reject_file: Optional[str]):
+    """
+    从CSV或JSONL批量导入交易记录
+
+    字段与 transaction add 一致：amount、category、tags、notes、created_at。
+    SOURCE 为输入文件路径，省略或为 - 时从标准输入读取。
+
+    示例:
+    cashlog transaction import bank_2023.csv
+    cashlog transaction import bank_2023.jsonl -b 5000 -r rejects.jsonl
+    cat bank.csv | cashlog transaction import --format csv
+    """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.transaction_service import TransactionService
+    from cashlog.utils.formatter import Formatter
+
+    init_db()  # 确保数据库已初始化
+
+    if not file_format:
+        file_format = "jsonl" if source.endswith((".jsonl", ".ndjson")) else "csv"
+
+    try:
+        # 任一文件打开失败时，已打开的文件也会被关闭
+        with contextlib.ExitStack() as stack:
+            if source == "-":
+                stream = sys.stdin
+            else:
+                stream = stack.enter_context(open(source, "r", encoding="utf-8", newline=""))
+            reject_stream = stack.enter_context(open(reject_file, "w", encoding="utf-8")) if reject_file else None
+
+            db = next(get_db())
+            result = TransactionService.import_transactions(
+                db,
+                stream,
+                file_format=file_format,
+                batch_size=batch_size,
+                reject_stream=reject_stream
+            )
+
+        Formatter.print_success(f"导入完成: 成功 {result['imported']} 条，拒绝 {result['rejected']} 条")
+        if result["rejected"] and reject_file:
+            Formatter.print_info(f"拒绝行已写入: {reject_file}")
+    except OSError as e:
+        Formatter.print_error(f"无法打开文件: {str(e)}")
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"导入交易记录失败: {str(e)}")
+
+
+def _bulk_filters(month: Optional[str], category: Optional[str], tags: Optional[str], all_tags: bool,
+                  type: Optional[str]) -> Dict[str, Any]:
+    """将批量操作的筛选选项转换为 get_transactions 的筛选条件"""
+    filters = {}
+    if month:
+        filters["month"] = month
+    if category:
+        filters["category"] = category
+    if tags:
+        filters["tags"] = tags
+        if all_tags:
+            filters["tags_match"] = "all"
+    if type:
+        filters["transaction_type"] = type
+    return filters
+
+
+def _bulk_options(func):
+    """批量修改和删除共用的选择参数，筛选选项与 transaction list 相同"""
+    func = click.option("-b", "--batch-size", type=int, default=1000, show_default=True, help="每批处理的交易条数")(func)
+    func = click.option("--dry-run", is_flag=True, default=False, help="只显示命中的条数，不修改数据")(func)
+    func = click.option("--type", type=click.Choice(["income", "expense"]), help="只选择收入或支出")(func)
+    func = click.option("--all-tags", is_flag=True, default=False, help="要求包含全部指定标签，默认包含任一标签即可")(func)
+    func = click.option("-t", "--tags", help="只选择包含指定标签的交易，多个标签用逗号分隔")(func)
+    func = click.option("-c", "--category", help="只选择指定分类的交易")(func)
+    func = click.option("-m", "--month", help="只选择指定月份的交易，格式：YYYY-MM")(func)
+    return click.argument("transaction_ids", nargs=-1)(func)
+
+
+@transaction.command(name="bulk-update")
+@_bulk_options
+@click.option("--set-category", help="修改为新的分类")
+@click.option("--add-tags", help="添加标签，多个标签用逗号分隔")
+@click.option("--remove-tags", help="移除标签，多个标签用逗号分隔")
+def bulk_update(transaction_ids: Tuple[str, ...], month: Optional[str], category: Optional[str], tags: Optional[str],
+                all_tags: bool, type: Optional[str], dry_run: bool, batch_size: int, set_category: Optional[str],
+                add_tags: Optional[str], remove_tags: Optional[str]):
+    """
+    批量修改交易的分类和标签
+
+    TRANSACTION_IDS 可以是多个ID、逗号分隔的列表或范围（如 1,3,5-9），也可以省略并用筛选条件选择，
+    两者同时指定时取交集。修改按批次以集合语句执行，月度汇总、标签和全文索引在同一事务中同步更新。
+
+    示例:
+    cashlog transaction bulk-update -c 其他 -t 星巴克 --set-category 咖啡  # 重新归类
+    cashlog transaction bulk-update 120-180 --add-tags 出差 --remove-tags 日常
+    cashlog transaction bulk-update -m 2023-10 -c 餐饮 --set-category 外卖 --dry-run  # 预览命中条数
+    """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.transaction_service import TransactionService
+    from cashlog.utils.formatter import Formatter
+
+    init_db()  # 确保数据库已初始化
+
+    try:
+        filters = _bulk_filters(month, category, tags, all_tags, type)
+        db = next(get_db())
+        count = TransactionService.bulk_update(
+            db,
+            transaction_ids,
+            new_category=set_category,
+            add_tags=add_tags,
+            remove_tags=remove_tags,
+            dry_run=dry_run,
+            batch_size=batch_size,
+            **filters
+        )
+        if dry_run:
+            Formatter.print_info(f"将修改 {count} 条交易记录（未修改数据）")
+        elif count:
+            Formatter.print_success(f"已修改 {count} 条交易记录")
+        else:
+            Formatter.print_info("没有命中的交易记录")
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"批量修改交易记录失败: {str(e)}")
+
+
+@transaction.command(name="bulk-delete")
+@_bulk_options
+@click.option("-y", "--confirm", is_flag=True, default=False, help="跳过删除二次确认")
+def bulk_delete(transaction_ids: Tuple[str, ...], month: Optional[str], category: Optional[str], tags: Optional[str],
+                all_tags: bool, type: Optional[str], dry_run: bool, batch_size: int, confirm: bool):
+    """
+    批量删除交易记录
+
+    选择方式与 bulk-update 相同。删除按批次执行，标签关联、月度汇总和全文索引
+    在同一事务中同步更新。
+
+    示例:
+    cashlog transaction bulk-delete 301-450  # 删除一次错误导入的记录
+    cashlog transaction bulk-delete -m 2023-10 -t 测试 -y
+    cashlog transaction bulk-delete -c 转账 --dry-run  # 预览命中条数
+    """
+    from cashlog.models.db import get_db, init_db
+    from cashlog.services.transaction_service import TransactionService
+    from cashlog.utils.formatter import Formatter
+
+    init_db()  # 确保数据库已初始化
+
+    try:
+        filters = _bulk_filters(month, category, tags, all_tags, type)
+        db = next(get_db())
+        count = TransactionService.bulk_delete(db, transaction_ids, dry_run=True, batch_size=batch_size, **filters)
+        if dry_run:
+            Formatter.print_info(f"将删除 {count} 条交易记录（未修改数据）")
+            return
+        if not count:
+            Formatter.print_info("没有命中的交易记录")
+            return
+
+        # 二次确认
+        if not confirm:
+            Formatter.print_warning(f"⚠️  警告：将删除 {count} 条交易记录，此操作无法撤销！")
+            if not confirm_continue():
+                Formatter.print_info("删除操作已取消")
+                return
+
+        count = TransactionService.bulk_delete(db, transaction_ids, batch_size=batch_size, **filters)
+        Formatter.print_success(f"已删除 {count} 条交易记录")
+    except ValueError as e:
+        Formatter.print_error(str(e))
+    except Exception as e:
+        Formatter.print_error(f"批量删除交易记录失败: {str(e)}")
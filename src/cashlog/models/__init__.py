@@ -1,5 +1,12 @@
 """数据模型包"""
 from cashlog.models.transaction import Transaction
 from cashlog.models.todo import Todo, TodoStatus
+from cashlog.models.tag import Tag, transaction_tags, todo_tags
+from cashlog.models.rollup import MonthlyCategoryRollup
+from cashlog.models.search import transactions_fts, todos_fts
+from cashlog.models.records import TransactionRecord, TodoRecord
 
-__all__ = ["Transaction", "Todo", "TodoStatus"]
+__all__ = [
+    "Transaction", "Todo", "TodoStatus", "Tag", "transaction_tags", "todo_tags", "MonthlyCategoryRollup",
+    "transactions_fts", "todos_fts", "TransactionRecord", "TodoRecord",
+]
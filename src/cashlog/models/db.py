@@ -1,9 +1,14 @@
 """数据库连接和基类定义"""
 import os
+import re
+import contextlib
+import configparser
 from pathlib import Path
-from sqlalchemy import create_engine
+from typing import Any, Dict, Iterator, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 # 确保数据库目录存在
 DB_DIR = Path(__file__).parent.parent.parent.parent / "data"
@@ -12,8 +17,122 @@ DB_DIR.mkdir(exist_ok=True)
 # 数据库路径
 DB_PATH = DB_DIR / "cashlog.db"
 
+# 配置文件路径，可通过环境变量 CASHLOG_CONFIG 指定
+CONFIG_PATH = Path(os.environ.get("CASHLOG_CONFIG", DB_DIR / "cashlog.ini"))
+
+# 连接参数预设，每个新连接建立时通过PRAGMA应用
+PRAGMA_PROFILES = {
+    # SQLite默认行为：回滚日志、完全同步，断电也不丢已提交数据
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+    # WAL + NORMAL：读写互不阻塞，断电可能丢失最后几个事务但不会损坏数据库
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # 大批量导入：关闭同步并加大缓存，仅建议在可重跑的导入任务中使用
+    "bulk": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -262144,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+}
+
+# 默认预设
+DEFAULT_PRAGMA_PROFILE = "safe"
+
+# PRAGMA取值只允许整数或单个关键字
+_PRAGMA_VALUE_PATTERN = re.compile(r"^-?\w+$")
+
+
+def load_pragma_settings(profile: Optional[str] = None, config_path: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    解析连接参数
+
+    预设的选择顺序为：profile参数 > 环境变量 CASHLOG_PRAGMA_PROFILE >
+    配置文件 [database] 节的 profile > safe。配置文件的 [pragmas] 节可以覆盖预设中的单项。
+
+    Args:
+        profile: 预设名称
+        config_path: 配置文件路径，默认为 CONFIG_PATH
+
+    Returns:
+        PRAGMA名称到取值的映射
+    """
+    parser = configparser.ConfigParser()
+    parser.read(config_path or CONFIG_PATH, encoding="utf-8")
+
+    name = (
+        profile
+        or os.environ.get("CASHLOG_PRAGMA_PROFILE")
+        or parser.get("database", "profile", fallback=DEFAULT_PRAGMA_PROFILE)
+    )
+    if name not in PRAGMA_PROFILES:
+        raise ValueError(f"未知的连接参数预设: {name}，可选值：{', '.join(PRAGMA_PROFILES)}")
+
+    settings = dict(PRAGMA_PROFILES[name])
+    if parser.has_section("pragmas"):
+        for key, value in parser.items("pragmas"):
+            if key not in settings:
+                raise ValueError(f"不支持的PRAGMA配置项: {key}")
+            settings[key] = value
+
+    for key, value in settings.items():
+        if not _PRAGMA_VALUE_PATTERN.match(str(value)):
+            raise ValueError(f"PRAGMA {key} 的取值无效: {value}")
+    return settings
+
+
+def apply_pragmas(dbapi_connection, pragmas: Dict[str, Any]) -> None:
+    """
+    在DBAPI连接上执行PRAGMA
+
+    Args:
+        dbapi_connection: sqlite3连接
+        pragmas: PRAGMA名称到取值的映射
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def create_db_engine(db_path, pragmas: Optional[Dict[str, Any]] = None) -> Engine:
+    """
+    创建数据库引擎，并在每个新连接上应用PRAGMA
+
+    Args:
+        db_path: 数据库文件路径
+        pragmas: PRAGMA名称到取值的映射，为None时不做设置
+
+    Returns:
+        数据库引擎
+    """
+    db_engine = create_engine(f"sqlite:///{db_path}", echo=False)
+    if pragmas:
+        @event.listens_for(db_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            apply_pragmas(dbapi_connection, pragmas)
+    return db_engine
+
+
 # 创建数据库引擎
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
+engine = create_db_engine(DB_PATH, load_pragma_settings())
 
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -22,8 +141,15 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# shared_session 上下文内所有 get_db 调用共用的会话
+_shared_session: Optional[Session] = None
+
+
 def get_db():
-    """获取数据库会话"""
+    """获取数据库会话，处于 shared_session 上下文内时返回共用的会话"""
+    if _shared_session is not None:
+        yield _shared_session
+        return
     db = SessionLocal()
     try:
         yield db
@@ -31,7 +157,92 @@ def get_db():
         db.close()
 
 
+@contextlib.contextmanager
+def shared_session(atomic: bool = False) -> Iterator[Session]:
+    """
+    在上下文内让所有命令共用一个数据库会话
+
+    atomic 为True时整个上下文在一个数据库事务中执行：会话以保存点加入外层事务，
+    服务层的 commit 只释放保存点、rollback 只回滚到保存点，退出上下文时统一提交一次；
+    上下文内抛出异常时全部回滚。
+
+    Args:
+        atomic: 是否在一个事务中执行
+
+    Yields:
+        共用的数据库会话
+
+    Raises:
+        RuntimeError: 当已处于共用会话中时
+    """
+    global _shared_session
+    if _shared_session is not None:
+        raise RuntimeError("已处于共用会话中")
+
+    if not atomic:
+        db = SessionLocal()
+        _shared_session = db
+        try:
+            yield db
+        finally:
+            _shared_session = None
+            db.close()
+        return
+
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        # pysqlite 在第一条写语句前才隐式开始事务，这里显式 BEGIN，
+        # 否则最外层保存点会成为事务本身，RELEASE 时就提前提交了
+        conn.exec_driver_sql("BEGIN")
+        db = SessionLocal(bind=conn, join_transaction_mode="create_savepoint")
+        _shared_session = db
+        try:
+            yield db
+            db.close()
+            transaction.commit()
+        except BaseException:
+            db.close()
+            transaction.rollback()
+            raise
+        finally:
+            _shared_session = None
+
+
+# 已确认结构为最新版本的引擎，同一进程内重复调用 init_db 时直接返回
+_initialized_engine = None
+
+
 def init_db():
-    """初始化数据库，创建所有表"""
-    from cashlog.models import transaction, todo  # noqa: F401
-    Base.metadata.create_all(bind=engine)
+    """
+    初始化数据库
+
+    先读取 PRAGMA user_version，结构已是最新版本时不做任何处理；
+    否则创建缺失的表并执行未应用的结构迁移。
+    """
+    global _initialized_engine
+    if _initialized_engine is engine:
+        return
+
+    from cashlog.models import transaction, todo, tag, rollup, search  # noqa: F401
+    from cashlog.models.migrations import get_schema_version, latest_version, run_migrations
+    with engine.connect() as conn:
+        current = get_schema_version(conn)
+    if current < latest_version():
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+    _initialized_engine = engine
+
+
+def invalidate_init_cache() -> None:
+    """
+    清除 init_db 的进程内缓存
+
+    常驻进程在数据库文件可能被其他进程替换（如 data restore）时调用，
+    下一次 init_db 会重新读取 PRAGMA user_version 并在需要时执行迁移，
+    检索也会重新判断全文索引表是否存在。
+    """
+    from cashlog.services.search import clear_index_table_cache
+
+    global _initialized_engine
+    _initialized_engine = None
+    clear_index_table_cache()
@@ -0,0 +1,231 @@
+"""数据库结构迁移
+
+迁移按版本号顺序登记在 MIGRATIONS 中，已执行到的版本号记录在SQLite的
+PRAGMA user_version 里。每次只执行版本号大于当前版本的迁移，
+整个升级过程在同一个 BEGIN IMMEDIATE 事务中完成，失败时整体回滚。
+"""
+import sqlite3
+import warnings
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import MetaData, bindparam, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+
+# 迁移注册表：(版本号, 说明, 迁移函数)
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = []
+
+
+def migration(version: int, description: str):
+    """
+    登记一个迁移函数
+
+    Args:
+        version: 迁移版本号，必须唯一且递增
+        description: 迁移说明
+    """
+    def decorator(func: Callable[[Connection], None]) -> Callable[[Connection], None]:
+        if any(v == version for v, _, _ in MIGRATIONS):
+            raise ValueError(f"迁移版本号重复: {version}")
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return decorator
+
+
+def latest_version() -> int:
+    """获取代码中最新的结构版本号"""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def get_schema_version(conn: Connection) -> int:
+    """
+    读取数据库当前的结构版本号
+
+    Args:
+        conn: 数据库连接
+
+    Returns:
+        PRAGMA user_version 的值
+    """
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """
+    执行所有未应用的迁移
+
+    Args:
+        engine: 数据库引擎
+
+    Returns:
+        本次执行的迁移版本号列表
+    """
+    applied = []
+    # 关闭驱动的隐式事务管理，由这里显式控制事务边界，使DDL也能回滚
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            # 获取写锁后再读取版本号，避免多个进程重复执行同一迁移
+            current = get_schema_version(conn)
+            for version, _, func in MIGRATIONS:
+                if version <= current:
+                    continue
+                func(conn)
+                conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+                applied.append(version)
+            conn.exec_driver_sql("COMMIT")
+        except Exception:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+    return applied
+
+
+def _create_indexes(conn: Connection, table, names: List[str]) -> None:
+    """按名称创建模型中声明的索引，已存在的索引跳过"""
+    for index in table.indexes:
+        if index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    """检查表中是否存在指定列"""
+    return any(row[1] == column for row in conn.exec_driver_sql(f"PRAGMA table_info({table})"))
+
+
+@migration(1, "为交易和待办的常用查询条件添加二级索引")
+def _add_query_indexes(conn: Connection) -> None:
+    from cashlog.models.transaction import Transaction
+    from cashlog.models.todo import Todo
+
+    _create_indexes(conn, Transaction.__table__, [
+        "ix_transactions_created_at",
+        "ix_transactions_category_created_at",
+    ])
+    _create_indexes(conn, Todo.__table__, [
+        "ix_todos_status_deadline",
+        "ix_todos_category_created_at",
+    ])
+
+
+@migration(2, "新增标签表及关联表，从tags字段回填标签关联，并将tags字段规范为逗号分隔无空白的形式")
+def _normalize_tags(conn: Connection) -> None:
+    from cashlog.models.transaction import Transaction
+    from cashlog.models.todo import Todo
+    from cashlog.models.tag import Tag, transaction_tags, todo_tags
+    from cashlog.services.tag_service import TagService
+
+    for table in (Tag.__table__, transaction_tags, todo_tags):
+        table.create(conn, checkfirst=True)
+
+    for model, owner_column in ((Transaction, transaction_tags.c.transaction_id), (Todo, todo_tags.c.todo_id)):
+        # 旧数据可能是 "餐饮, 日常" 这样的原始输入，改写为与新写入一致的
+        # ",".join(TagService.parse_tags(...)) 形式，后续按字符串处理tags列的语句才与关联表一致
+        normalized = []
+        result = conn.execute(select(model.id, model.tags).where(model.tags.isnot(None)))
+        while True:
+            rows = result.fetchmany(1000)
+            if not rows:
+                break
+            TagService.link_tags(conn, owner_column, rows)
+            for owner_id, tags in rows:
+                value = ",".join(TagService.parse_tags(tags)) or None
+                if value != tags:
+                    normalized.append({"owner_id": owner_id, "normalized_tags": value})
+        if normalized:
+            table = model.__table__
+            conn.execute(
+                update(table).where(table.c.id == bindparam("owner_id")).values(tags=bindparam("normalized_tags")),
+                normalized
+            )
+
+
+@migration(3, "新增月度分类汇总表及维护触发器，并从现有交易重建汇总")
+def _add_monthly_rollup(conn: Connection) -> None:
+    from cashlog.models.rollup import MonthlyCategoryRollup, ROLLUP_TRIGGERS
+    from cashlog.services.report_service import ReportService
+
+    # 交易金额仍为浮点列的旧库由迁移6按整数分重建汇总表和触发器
+    if not _has_column(conn, "transactions", "amount_cents"):
+        return
+    MonthlyCategoryRollup.__table__.create(conn, checkfirst=True)
+    for trigger in ROLLUP_TRIGGERS:
+        conn.exec_driver_sql(trigger)
+    ReportService.rebuild_rollups(conn)
+
+
+@migration(4, "为待办的创建时间添加索引，支持按 (created_at, id) 键集分页")
+def _add_todo_created_at_index(conn: Connection) -> None:
+    from cashlog.models.todo import Todo
+
+    _create_indexes(conn, Todo.__table__, ["ix_todos_created_at"])
+
+
+@migration(5, "新增交易备注和待办内容的FTS5全文索引及同步触发器，并回填现有数据")
+def _add_full_text_search(conn: Connection) -> None:
+    from cashlog.models.search import FTS_MIN_SQLITE_VERSION, SEARCH_DDL, full_text_search_available
+
+    if not full_text_search_available():
+        # 不阻塞后续迁移和其他命令，检索退回到在原表上逐行匹配
+        warnings.warn(
+            f"SQLite {sqlite3.sqlite_version} 不支持 trigram 分词器（需要 "
+            f"{'.'.join(map(str, FTS_MIN_SQLITE_VERSION))} 及以上），未建立全文索引，搜索将改为逐行匹配",
+            RuntimeWarning
+        )
+        return
+    for name, statements in SEARCH_DDL.items():
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+        # 外部内容表的 rebuild 命令会从原表重新生成整个索引
+        conn.exec_driver_sql(f"INSERT INTO {name} ({name}) VALUES ('rebuild')")
+
+
+@migration(6, "交易金额改为以分为单位的整数，并按整数重建月度汇总")
+def _store_amount_in_cents(conn: Connection) -> None:
+    from cashlog.models.rollup import MonthlyCategoryRollup, ROLLUP_TRIGGER_NAMES, ROLLUP_TRIGGERS
+    from cashlog.services.report_service import ReportService
+
+    if not _has_column(conn, "transactions", "amount"):
+        return
+    # 汇总触发器引用了旧的 amount 列，重建交易表前先删除
+    for name in ROLLUP_TRIGGER_NAMES:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    # 不用 ADD COLUMN：NOT NULL 列必须带默认值，迁移后的库会与 create_all 建出的表不一致，
+    # 漏写金额的插入会变成0而不是报错；重建表也不依赖 SQLite 3.35 才支持的 DROP COLUMN
+    _rebuild_transactions_table(conn, {"amount_cents": "CAST(round(amount * 100) AS INTEGER)"})
+
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {MonthlyCategoryRollup.__tablename__}")
+    MonthlyCategoryRollup.__table__.create(conn)
+    for trigger in ROLLUP_TRIGGERS:
+        conn.exec_driver_sql(trigger)
+    ReportService.rebuild_rollups(conn)
+
+
+def _rebuild_transactions_table(conn: Connection, expressions: Dict[str, str]) -> None:
+    """
+    按当前模型重建交易表
+
+    建新表、复制数据、删除旧表后改名，再重建索引和全文索引的同步触发器。
+    连接未开启 foreign_keys，删除旧表不会级联删除标签关联，ID保持不变，
+    关联表和全文索引中的数据仍然有效。
+
+    Args:
+        conn: 数据库连接
+        expressions: 旧表中没有的列及其取值的SQL表达式，其余列按同名复制
+    """
+    from cashlog.models.transaction import Transaction
+    from cashlog.models.search import SEARCH_DDL, full_text_search_available
+
+    table = Transaction.__table__
+    rebuilt = table.to_metadata(MetaData(), name="transactions_rebuild")
+    columns = ", ".join(column.name for column in table.columns)
+    values = ", ".join(expressions.get(column.name, column.name) for column in table.columns)
+    conn.execute(CreateTable(rebuilt))
+    conn.exec_driver_sql(f"INSERT INTO transactions_rebuild ({columns}) SELECT {values} FROM transactions")
+    conn.exec_driver_sql("DROP TABLE transactions")
+    conn.exec_driver_sql("ALTER TABLE transactions_rebuild RENAME TO transactions")
+
+    for index in table.indexes:
+        index.create(conn)
+    if full_text_search_available():
+        for statement in SEARCH_DDL["transactions_fts"]:
+            conn.exec_driver_sql(statement)
@@ -0,0 +1,58 @@
+"""
+只读查询结果记录
+
+列表和报表只需要读取数据并转换为输出，不需要ORM对象的身份映射和变更跟踪。
+这里的记录类使用 __slots__，由Core查询返回的行按列顺序直接构造；
+展示用的属性（交易类型、状态文字等）复用模型上的同名属性，输出与ORM对象完全一致。
+"""
+from cashlog.models.todo import Todo
+from cashlog.models.transaction import Transaction
+
+
+class TransactionRecord:
+    """交易只读记录，notes 未查询时为 None"""
+    __slots__ = ("id", "amount_cents", "category", "tags", "created_at", "notes")
+
+    # 构造参数对应的列，notes 为可选的大文本列，放在最后
+    columns = (Transaction.__table__.c.id, Transaction.__table__.c.amount_cents,
+               Transaction.__table__.c.category,
+               Transaction.__table__.c.tags, Transaction.__table__.c.created_at)
+    text_columns = (Transaction.__table__.c.notes,)
+
+    def __init__(self, id, amount_cents, category, tags, created_at, notes=None):
+        self.id = id
+        self.amount_cents = amount_cents
+        self.category = category
+        self.tags = tags
+        self.created_at = created_at
+        self.notes = notes
+
+    amount = Transaction.amount
+    transaction_type = Transaction.transaction_type
+    month = Transaction.month
+
+    def __repr__(self) -> str:
+        return f"TransactionRecord(id={self.id!r}, amount_cents={self.amount_cents!r}, category={self.category!r})"
+
+
+class TodoRecord:
+    """待办事项只读记录，content 未查询时为 None"""
+    __slots__ = ("id", "category", "status", "tags", "deadline", "created_at", "content")
+
+    columns = (Todo.__table__.c.id, Todo.__table__.c.category, Todo.__table__.c.status,
+               Todo.__table__.c.tags, Todo.__table__.c.deadline, Todo.__table__.c.created_at)
+    text_columns = (Todo.__table__.c.content,)
+
+    def __init__(self, id, category, status, tags, deadline, created_at, content=None):
+        self.id = id
+        self.category = category
+        self.status = status
+        self.tags = tags
+        self.deadline = deadline
+        self.created_at = created_at
+        self.content = content
+
+    status_text = Todo.status_text
+
+    def __repr__(self) -> str:
+        return f"TodoRecord(id={self.id!r}, status={self.status!r}, category={self.category!r})"
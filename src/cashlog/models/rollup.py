@@ -0,0 +1,71 @@
+"""月度分类汇总数据模型"""
+from sqlalchemy import Column, Integer, String, DDL, event
+from cashlog.models.db import Base
+from cashlog.models.transaction import Transaction
+
+
+class MonthlyCategoryRollup(Base):
+    """
+    月度分类汇总表模型
+
+    由 transactions 表上的触发器在插入、更新、删除时增量维护，
+    月度报表直接读取该表，无需扫描当月全部交易。金额与交易表一致以分为单位。
+    """
+    __tablename__ = "monthly_category_rollup"
+
+    month = Column(String(7), primary_key=True)
+    category = Column(String(50), primary_key=True)
+    income_cents = Column(Integer, nullable=False, default=0)
+    expense_cents = Column(Integer, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# 将一条交易计入汇总（{row} 为 NEW 或 OLD）
+_ROLLUP_ADD = """
+    INSERT INTO monthly_category_rollup (month, category, income_cents, expense_cents, count)
+    VALUES (
+        substr({row}.created_at, 1, 7),
+        {row}.category,
+        CASE WHEN {row}.amount_cents > 0 THEN {row}.amount_cents ELSE 0 END,
+        CASE WHEN {row}.amount_cents <= 0 THEN -{row}.amount_cents ELSE 0 END,
+        1
+    )
+    ON CONFLICT (month, category) DO UPDATE SET
+        income_cents = income_cents + excluded.income_cents,
+        expense_cents = expense_cents + excluded.expense_cents,
+        count = count + 1;
+"""
+
+# 将一条交易从汇总中扣除，计数归零的分类行直接删除
+_ROLLUP_SUBTRACT = """
+    UPDATE monthly_category_rollup SET
+        income_cents = income_cents - CASE WHEN {row}.amount_cents > 0 THEN {row}.amount_cents ELSE 0 END,
+        expense_cents = expense_cents - CASE WHEN {row}.amount_cents <= 0 THEN -{row}.amount_cents ELSE 0 END,
+        count = count - 1
+    WHERE month = substr({row}.created_at, 1, 7) AND category = {row}.category;
+    DELETE FROM monthly_category_rollup
+    WHERE month = substr({row}.created_at, 1, 7) AND category = {row}.category AND count <= 0;
+"""
+
+# 维护汇总表的触发器
+ROLLUP_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_insert "
+    "AFTER INSERT ON transactions BEGIN"
+    + _ROLLUP_ADD.format(row="NEW") + "END",
+    "CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_delete "
+    "AFTER DELETE ON transactions BEGIN"
+    + _ROLLUP_SUBTRACT.format(row="OLD") + "END",
+    "CREATE TRIGGER IF NOT EXISTS trg_transactions_rollup_update "
+    "AFTER UPDATE OF amount_cents, category, created_at ON transactions BEGIN"
+    + _ROLLUP_SUBTRACT.format(row="OLD") + _ROLLUP_ADD.format(row="NEW") + "END",
+]
+
+# 触发器名称，结构迁移需要先删除引用旧列的触发器
+ROLLUP_TRIGGER_NAMES = [
+    "trg_transactions_rollup_insert",
+    "trg_transactions_rollup_delete",
+    "trg_transactions_rollup_update",
+]
+
+for _trigger in ROLLUP_TRIGGERS:
+    event.listen(Transaction.__table__, "after_create", DDL(_trigger).execute_if(dialect="sqlite"))
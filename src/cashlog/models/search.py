@@ -0,0 +1,61 @@
+"""全文检索索引定义
+
+交易备注/标签和待办内容/标签各有一张FTS5外部内容表，索引只保存分词结果，
+原文仍从 transactions / todos 读取。使用 trigram 分词器，中文和英文都可以按
+任意三个字符以上的子串检索，不区分大小写。索引由触发器随原表变更同步维护。
+
+trigram 分词器需要 SQLite 3.34 及以上。更早的版本不建立索引表，检索全部改为
+在原表上做 LIKE 匹配，结果相同，只是需要逐行扫描。
+"""
+import sqlite3
+from typing import List, Tuple
+from sqlalchemy import DDL, column, event, table
+from cashlog.models.transaction import Transaction
+from cashlog.models.todo import Todo
+
+# trigram 分词器要求的最低SQLite版本
+FTS_MIN_SQLITE_VERSION = (3, 34, 0)
+
+# 全文索引：索引表名 -> (原表名, 被索引的列)
+FTS_TABLES = {
+    "transactions_fts": ("transactions", ("notes", "tags")),
+    "todos_fts": ("todos", ("content", "tags")),
+}
+
+
+def full_text_search_available() -> bool:
+    """当前链接的SQLite是否支持 trigram 分词器"""
+    return sqlite3.sqlite_version_info >= FTS_MIN_SQLITE_VERSION
+
+
+def _fts_ddl(name: str, content: str, columns: Tuple[str, ...]) -> List[str]:
+    """生成索引表及同步触发器的建表语句"""
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{c}" for c in columns)
+    old_values = ", ".join(f"OLD.{c}" for c in columns)
+    insert_new = f"INSERT INTO {name} (rowid, {column_list}) VALUES (NEW.id, {new_values});"
+    delete_old = f"INSERT INTO {name} ({name}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5("
+        f"{column_list}, content='{content}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{name}_insert AFTER INSERT ON {content} BEGIN "
+        f"{insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{name}_delete AFTER DELETE ON {content} BEGIN "
+        f"{delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{name}_update AFTER UPDATE OF {column_list} ON {content} BEGIN "
+        f"{delete_old} {insert_new} END",
+    ]
+
+
+# 各索引表的建表和触发器语句
+SEARCH_DDL = {name: _fts_ddl(name, content, columns) for name, (content, columns) in FTS_TABLES.items()}
+
+# 查询用的表对象，与索引表同名的隐藏列用于 MATCH
+transactions_fts = table("transactions_fts", column("rowid"), column("transactions_fts"))
+todos_fts = table("todos_fts", column("rowid"), column("todos_fts"))
+
+for _model, _name in ((Transaction, "transactions_fts"), (Todo, "todos_fts")):
+    for _statement in SEARCH_DDL[_name]:
+        event.listen(_model.__table__, "after_create", DDL(_statement).execute_if(
+            dialect="sqlite", callable_=lambda *args, **kwargs: full_text_search_available()
+        ))
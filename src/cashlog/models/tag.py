@@ -0,0 +1,30 @@
+"""标签数据模型"""
+from sqlalchemy import Column, Integer, String, ForeignKey, Table, Index
+from cashlog.models.db import Base
+
+
+class Tag(Base):
+    """标签表模型"""
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), nullable=False, unique=True)
+
+
+# 交易与标签的关联表
+transaction_tags = Table(
+    "transaction_tags",
+    Base.metadata,
+    Column("transaction_id", Integer, ForeignKey("transactions.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_transaction_tags_tag_id", "tag_id", "transaction_id"),
+)
+
+# 待办事项与标签的关联表
+todo_tags = Table(
+    "todo_tags",
+    Base.metadata,
+    Column("todo_id", Integer, ForeignKey("todos.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_todo_tags_tag_id", "tag_id", "todo_id"),
+)
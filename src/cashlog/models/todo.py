@@ -1,6 +1,6 @@
 """待办事项数据模型"""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, Index
 from sqlalchemy import Enum as SQLEnum
 import enum
 from cashlog.models.db import Base
@@ -16,6 +16,11 @@ class TodoStatus(str, enum.Enum):
 class Todo(Base):
     """待办事项表模型"""
     __tablename__ = "todos"
+    __table_args__ = (
+        Index("ix_todos_status_deadline", "status", "deadline"),
+        Index("ix_todos_category_created_at", "category", "created_at"),
+        Index("ix_todos_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
@@ -1,25 +1,36 @@
 """交易数据模型"""
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, String, DateTime, Text
+from decimal import Decimal
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from cashlog.models.db import Base
 
 
 class Transaction(Base):
     """交易记录表模型"""
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_created_at", "created_at"),
+        Index("ix_transactions_category_created_at", "category", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    # 金额以分为单位的整数保存，求和与比较都是精确的整数运算
+    amount_cents = Column(Integer, nullable=False)
     category = Column(String(50), nullable=False)
     tags = Column(String(200), nullable=True)
     notes = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.now, nullable=False)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
+    @property
+    def amount(self) -> Decimal:
+        """金额（元），由 amount_cents 精确换算，只读"""
+        return Decimal(self.amount_cents).scaleb(-2)
+
     @property
     def transaction_type(self):
         """根据金额判断交易类型"""
-        return "收入" if self.amount > 0 else "支出"
+        return "收入" if self.amount_cents > 0 else "支出"
 
     @property
     def month(self):
@@ -1,24 +1,68 @@
 """数据备份与恢复服务"""
 import os
+import bz2
+import gzip
+import json
+import lzma
 import shutil
 import sqlite3
+import hashlib
+import tempfile
+import time
 import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 from cashlog.models.db import DB_PATH
 
+# 在线备份每一步复制的页数
+DEFAULT_BACKUP_PAGES = 1024
+
+# 增量备份的默认分块大小（字节）
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# 增量备份清单格式标识
+MANIFEST_FORMAT = "cashlog-incremental-v1"
+
+# 压缩备份支持的编码：名称 -> (打开函数, 文件后缀, 文件头魔数)
+COMPRESSION_CODECS = {
+    "gzip": (gzip.open, ".gz", b"\x1f\x8b"),
+    "xz": (lzma.open, ".xz", b"\xfd7zXZ\x00"),
+    "bz2": (bz2.open, ".bz2", b"BZh"),
+}
+
+# 压缩与解压时每次读写的字节数
+STREAM_CHUNK_SIZE = 1024 * 1024
+
 
 class DataService:
     """数据服务类，处理备份和恢复操作"""
     
     @staticmethod
-    def create_backup(output_path: Optional[str] = None, overwrite: bool = False) -> str:
+    def create_backup(
+        output_path: Optional[str] = None,
+        overwrite: bool = False,
+        pages: int = DEFAULT_BACKUP_PAGES,
+        step_interval: float = 0.0,
+        progress: Optional[Callable[[int, int], None]] = None,
+        vacuum: bool = False,
+        compress: Optional[str] = None
+    ) -> str:
         """
         创建数据库备份
+
+        使用SQLite在线备份API分步复制数据库页，得到一致的快照，
+        复制过程中其他进程仍可写入。vacuum为True时改用 VACUUM INTO 生成压缩整理后的备份。
+        备份先写入临时文件，校验通过后再替换为目标文件。
+        指定compress时，快照校验通过后按固定大小分块流式压缩，文件后缀为 .db.gz / .db.xz / .db.bz2。
         
         Args:
             output_path: 备份文件路径，如果为None则使用默认路径
             overwrite: 是否覆盖已有文件
+            pages: 每一步复制的页数，-1表示一次复制全部
+            step_interval: 每一步之间的休眠秒数，让出锁给并发写入者
+            progress: 进度回调，参数为 (已复制页数, 总页数)
+            vacuum: 是否使用 VACUUM INTO 生成压缩整理后的备份
+            compress: 压缩编码，可选 gzip、xz、bz2，为None时不压缩
             
         Returns:
             备份文件的绝对路径
@@ -31,6 +75,10 @@ class DataService:
         # 确保原数据库文件存在
         if not os.path.exists(DB_PATH):
             raise IOError(f"原数据库文件不存在: {DB_PATH}")
+
+        if compress and compress not in COMPRESSION_CODECS:
+            raise ValueError("压缩格式无效，可选值：" + ", ".join(COMPRESSION_CODECS))
+        suffix = ".db" + (COMPRESSION_CODECS[compress][1] if compress else "")
         
         # 确定备份文件路径
         if not output_path:
@@ -39,7 +87,7 @@ class DataService:
             os.makedirs(backup_dir, exist_ok=True)
             
             today = datetime.datetime.now().strftime("%Y%m%d")
-            output_path = os.path.join(backup_dir, f"backup_{today}.db")
+            output_path = os.path.join(backup_dir, f"backup_{today}{suffix}")
         else:
             # 验证输出路径
             output_path = os.path.expanduser(output_path)
@@ -50,27 +98,90 @@ class DataService:
                 raise ValueError(f"输出目录不存在: {output_dir}")
             
             # 验证文件后缀
-            if not output_path.endswith(".db"):
-                raise ValueError("备份文件必须以.db为后缀")
+            if not output_path.endswith(suffix):
+                raise ValueError(f"备份文件必须以{suffix}为后缀")
+
+        if pages == 0 or pages < -1:
+            raise ValueError("每步复制页数必须为正整数或-1")
+        if step_interval < 0:
+            raise ValueError("步间休眠时间不能为负数")
         
         # 检查文件是否已存在
         if os.path.exists(output_path) and not overwrite:
             raise FileExistsError(f"备份文件已存在: {output_path}，使用-f参数覆盖")
         
+        temp_path = output_path + ".part"
+        snapshot_path = temp_path + ".db" if compress else temp_path
         try:
+            for path in (temp_path, snapshot_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
             # 执行备份
-            shutil.copy2(DB_PATH, output_path)
+            DataService._copy_database(DB_PATH, snapshot_path, pages, step_interval, progress, vacuum)
             
             # 验证备份文件是否为有效的SQLite数据库
-            if not DataService._is_valid_sqlite_db(output_path):
-                os.remove(output_path)  # 删除无效的备份文件
+            if not DataService._is_valid_sqlite_db(snapshot_path):
+                os.remove(snapshot_path)  # 删除无效的备份文件
                 raise IOError("创建的备份文件无效")
-            
+
+            if compress:
+                DataService._compress_file(snapshot_path, temp_path, compress)
+                os.remove(snapshot_path)
+
+            os.replace(temp_path, output_path)
             return os.path.abspath(output_path)
         except Exception as e:
+            for path in (temp_path, snapshot_path):
+                if os.path.exists(path):
+                    os.remove(path)
             if isinstance(e, (FileExistsError, ValueError, IOError)):
                 raise
             raise IOError(f"备份失败: {str(e)}")
+
+    @staticmethod
+    def _copy_database(
+        source_path: str,
+        target_path: str,
+        pages: int = DEFAULT_BACKUP_PAGES,
+        step_interval: float = 0.0,
+        progress: Optional[Callable[[int, int], None]] = None,
+        vacuum: bool = False
+    ) -> None:
+        """
+        通过SQLite连接复制数据库
+
+        Args:
+            source_path: 源数据库路径
+            target_path: 目标文件路径，必须不存在
+            pages: 每一步复制的页数
+            step_interval: 每一步之间的休眠秒数
+            progress: 进度回调，参数为 (已复制页数, 总页数)
+            vacuum: 是否使用 VACUUM INTO
+        """
+        def on_step(status: int, remaining: int, total: int) -> None:
+            if progress:
+                progress(total - remaining, total)
+            # 两步之间源库不持有锁，休眠可让并发写入者完成事务
+            if step_interval and remaining:
+                time.sleep(step_interval)
+
+        source = sqlite3.connect(source_path)
+        try:
+            if vacuum:
+                source.execute("VACUUM INTO ?", (target_path,))
+                if progress:
+                    total = source.execute("PRAGMA page_count").fetchone()[0]
+                    progress(total, total)
+                return
+
+            target = sqlite3.connect(target_path)
+            try:
+                source.backup(target, pages=pages, progress=on_step)
+            finally:
+                target.close()
+        finally:
+            source.close()
     
     @staticmethod
     def restore_backup(input_path: str, backup_current: bool = True, confirm: bool = True) -> dict:
@@ -78,7 +189,7 @@ class DataService:
         从备份文件恢复数据库
         
         Args:
-            input_path: 备份文件路径
+            input_path: 备份文件路径，也可以是压缩备份或增量备份的清单文件
             backup_current: 是否先备份当前数据库
             confirm: 是否需要确认
             
@@ -97,10 +208,43 @@ class DataService:
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"备份文件不存在: {input_path}")
         
+        # 压缩备份先流式解压，增量备份清单先从分块存储重建，均得到完整的临时数据库文件
+        temp_path = None
+        source_path = input_path
+        codec = DataService._detect_compression(input_path)
+        if codec:
+            temp_path = DataService._decompress_file(input_path, codec)
+        elif DataService._is_manifest(input_path):
+            temp_path = DataService._rebuild_snapshot(input_path)
+        if temp_path:
+            source_path = temp_path
+
+        try:
+            return DataService._restore_from_file(source_path, input_path, backup_current)
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def _restore_from_file(source_path: str, input_path: str, backup_current: bool) -> dict:
+        """
+        用完整的数据库文件替换当前数据库
+
+        Args:
+            source_path: 用于恢复的SQLite数据库文件
+            input_path: 用户指定的备份路径，用于结果展示
+            backup_current: 是否先备份当前数据库
+
+        Returns:
+            恢复结果信息
+        """
         # 验证备份文件是否为有效的SQLite数据库
-        if not DataService._is_valid_sqlite_db(input_path):
+        if not DataService._is_valid_sqlite_db(source_path):
             raise ValueError("无效的SQLite数据库文件")
         
+        # 直接复制文件前先把WAL内容写回主库文件
+        DataService._checkpoint_wal()
+
         # 如果需要，先备份当前数据库
         current_backup_path = None
         if backup_current and os.path.exists(DB_PATH):
@@ -116,7 +260,7 @@ class DataService:
             before_stats = DataService._get_database_stats() if os.path.exists(DB_PATH) else {}
             
             # 执行恢复
-            shutil.copy2(input_path, DB_PATH)
+            shutil.copy2(source_path, DB_PATH)
             
             # 获取恢复后的数据统计
             after_stats = DataService._get_database_stats()
@@ -138,6 +282,328 @@ class DataService:
             if isinstance(e, (FileNotFoundError, ValueError)):
                 raise
             raise IOError(f"恢复失败: {str(e)}")
+
+    @staticmethod
+    def _checkpoint_wal() -> None:
+        """
+        关闭连接池并将WAL中的内容写回主数据库文件
+
+        数据库处于WAL模式时，已提交的数据可能仍在 -wal 文件中，
+        直接复制或覆盖主库文件会遗漏或混入这些内容。
+        """
+        from cashlog.models.db import engine
+        engine.dispose()
+        if not os.path.exists(DB_PATH):
+            return
+        try:
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def create_incremental_backup(
+        store_dir: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        pages: int = DEFAULT_BACKUP_PAGES,
+        step_interval: float = 0.0,
+        progress: Optional[Callable[[int, int], None]] = None,
+        vacuum: bool = False
+    ) -> dict:
+        """
+        创建增量备份
+
+        先用在线备份API得到一致的快照，再将快照按固定大小切块并计算SHA-256，
+        只有存储中不存在的块才会写入 chunks/ 目录，快照本身记录为 manifests/ 下的清单文件。
+
+        Args:
+            store_dir: 分块存储目录，默认为 data/backups/store
+            chunk_size: 分块大小（字节）
+            pages: 在线备份每一步复制的页数
+            step_interval: 在线备份每一步之间的休眠秒数
+            progress: 在线备份进度回调，参数为 (已复制页数, 总页数)
+            vacuum: 是否使用 VACUUM INTO 生成快照
+
+        Returns:
+            备份结果，包含清单路径、总块数、新增块数和新增字节数
+
+        Raises:
+            ValueError: 当参数无效时
+            IOError: 当备份过程中出现IO错误时
+        """
+        if not os.path.exists(DB_PATH):
+            raise IOError(f"原数据库文件不存在: {DB_PATH}")
+        if chunk_size <= 0:
+            raise ValueError("分块大小必须为正整数")
+
+        store_dir = os.path.expanduser(store_dir) if store_dir else DataService._default_store_dir()
+        chunks_dir = os.path.join(store_dir, "chunks")
+        manifests_dir = os.path.join(store_dir, "manifests")
+        os.makedirs(chunks_dir, exist_ok=True)
+        os.makedirs(manifests_dir, exist_ok=True)
+
+        created_at = datetime.datetime.now()
+        name = f"snapshot_{created_at.strftime('%Y%m%d_%H%M%S_%f')}"
+        snapshot_path = os.path.join(store_dir, f".{name}.db")
+        manifest_path = os.path.join(manifests_dir, f"{name}.json")
+
+        try:
+            DataService._copy_database(DB_PATH, snapshot_path, pages, step_interval, progress, vacuum)
+            if not DataService._is_valid_sqlite_db(snapshot_path):
+                raise IOError("创建的备份快照无效")
+
+            file_hash = hashlib.sha256()
+            chunks = []
+            new_chunks = 0
+            new_bytes = 0
+            with open(snapshot_path, "rb") as f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    file_hash.update(data)
+                    digest = hashlib.sha256(data).hexdigest()
+                    chunks.append(digest)
+                    if DataService._store_chunk(chunks_dir, digest, data):
+                        new_chunks += 1
+                        new_bytes += len(data)
+
+            manifest = {
+                "format": MANIFEST_FORMAT,
+                "created_at": created_at.isoformat(),
+                "size": os.path.getsize(snapshot_path),
+                "sha256": file_hash.hexdigest(),
+                "chunk_size": chunk_size,
+                "chunks": chunks
+            }
+            temp_manifest = manifest_path + ".tmp"
+            with open(temp_manifest, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(temp_manifest, manifest_path)
+
+            return {
+                "manifest_path": os.path.abspath(manifest_path),
+                "total_chunks": len(chunks),
+                "new_chunks": new_chunks,
+                "new_bytes": new_bytes,
+                "size": manifest["size"]
+            }
+        except Exception as e:
+            if isinstance(e, (ValueError, IOError)):
+                raise
+            raise IOError(f"增量备份失败: {str(e)}")
+        finally:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+
+    @staticmethod
+    def gc_chunks(store_dir: Optional[str] = None) -> dict:
+        """
+        清理分块存储中不再被任何清单引用的块
+
+        删除快照时只需删除对应的清单文件，再执行本方法回收空间。
+
+        Args:
+            store_dir: 分块存储目录，默认为 data/backups/store
+
+        Returns:
+            清理结果，包含清单数、保留块数、删除块数和释放字节数
+
+        Raises:
+            ValueError: 当存在无法解析的清单文件时（此时不删除任何块）
+        """
+        store_dir = os.path.expanduser(store_dir) if store_dir else DataService._default_store_dir()
+        chunks_dir = os.path.join(store_dir, "chunks")
+        manifests_dir = os.path.join(store_dir, "manifests")
+
+        referenced = set()
+        manifest_count = 0
+        if os.path.isdir(manifests_dir):
+            for entry in sorted(os.listdir(manifests_dir)):
+                if not entry.endswith(".json"):
+                    continue
+                manifest = DataService._load_manifest(os.path.join(manifests_dir, entry))
+                referenced.update(manifest["chunks"])
+                manifest_count += 1
+
+        kept = 0
+        removed = 0
+        freed_bytes = 0
+        if os.path.isdir(chunks_dir):
+            for root, _, files in os.walk(chunks_dir):
+                for entry in files:
+                    if entry in referenced:
+                        kept += 1
+                        continue
+                    path = os.path.join(root, entry)
+                    freed_bytes += os.path.getsize(path)
+                    os.remove(path)
+                    removed += 1
+
+        return {
+            "manifests": manifest_count,
+            "kept": kept,
+            "removed": removed,
+            "freed_bytes": freed_bytes
+        }
+
+    @staticmethod
+    def _compress_file(source_path: str, target_path: str, codec: str) -> None:
+        """
+        分块流式压缩文件
+
+        Args:
+            source_path: 源文件路径
+            target_path: 压缩文件路径
+            codec: 压缩编码名称
+        """
+        open_func = COMPRESSION_CODECS[codec][0]
+        with open(source_path, "rb") as src, open_func(target_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, STREAM_CHUNK_SIZE)
+
+    @staticmethod
+    def _detect_compression(path: str) -> Optional[str]:
+        """
+        根据文件头魔数判断压缩编码
+
+        Returns:
+            压缩编码名称，未压缩时返回None
+        """
+        try:
+            with open(path, "rb") as f:
+                header = f.read(8)
+        except OSError:
+            return None
+        for codec, (_, _, magic) in COMPRESSION_CODECS.items():
+            if header.startswith(magic):
+                return codec
+        return None
+
+    @staticmethod
+    def _decompress_file(path: str, codec: str) -> str:
+        """
+        分块流式解压备份文件到数据库目录下的临时文件
+
+        Args:
+            path: 压缩备份文件路径
+            codec: 压缩编码名称
+
+        Returns:
+            解压出的临时数据库文件路径，由调用方负责删除
+
+        Raises:
+            ValueError: 当压缩数据损坏时
+        """
+        open_func = COMPRESSION_CODECS[codec][0]
+        fd, temp_path = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(DB_PATH))
+        try:
+            with os.fdopen(fd, "wb") as dst, open_func(path, "rb") as src:
+                shutil.copyfileobj(src, dst, STREAM_CHUNK_SIZE)
+            return temp_path
+        except (OSError, EOFError, lzma.LZMAError) as e:
+            os.remove(temp_path)
+            raise ValueError(f"无法解压{codec}备份文件: {str(e)}")
+
+    @staticmethod
+    def _default_store_dir() -> str:
+        """获取默认的增量备份存储目录"""
+        return os.path.join(os.path.dirname(DB_PATH), "backups", "store")
+
+    @staticmethod
+    def _chunk_path(chunks_dir: str, digest: str) -> str:
+        """获取块文件路径，按哈希前两位分目录"""
+        return os.path.join(chunks_dir, digest[:2], digest)
+
+    @staticmethod
+    def _store_chunk(chunks_dir: str, digest: str, data: bytes) -> bool:
+        """
+        写入一个块，已存在时跳过
+
+        Returns:
+            是否写入了新块
+        """
+        path = DataService._chunk_path(chunks_dir, digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return True
+
+    @staticmethod
+    def _is_manifest(path: str) -> bool:
+        """判断文件是否为增量备份清单"""
+        try:
+            with open(path, "rb") as f:
+                if f.read(1) != b"{":
+                    return False
+            DataService._load_manifest(path)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    @staticmethod
+    def _load_manifest(path: str) -> dict:
+        """
+        读取并校验增量备份清单
+
+        Raises:
+            ValueError: 当清单格式无效时
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"无法读取备份清单 {path}: {str(e)}")
+        if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT \
+                or not isinstance(manifest.get("chunks"), list):
+            raise ValueError(f"无效的备份清单: {path}")
+        return manifest
+
+    @staticmethod
+    def _rebuild_snapshot(manifest_path: str) -> str:
+        """
+        根据清单从分块存储重建数据库文件
+
+        清单所在目录的上一级即为分块存储目录。
+
+        Args:
+            manifest_path: 清单文件路径
+
+        Returns:
+            重建出的临时数据库文件路径，由调用方负责删除
+
+        Raises:
+            ValueError: 当块缺失或内容校验失败时
+        """
+        manifest = DataService._load_manifest(manifest_path)
+        chunks_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(manifest_path))), "chunks")
+
+        fd, temp_path = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(DB_PATH))
+        try:
+            file_hash = hashlib.sha256()
+            with os.fdopen(fd, "wb") as out:
+                for digest in manifest["chunks"]:
+                    try:
+                        with open(DataService._chunk_path(chunks_dir, digest), "rb") as f:
+                            data = f.read()
+                    except OSError:
+                        raise ValueError(f"备份快照缺少数据块: {digest}")
+                    if hashlib.sha256(data).hexdigest() != digest:
+                        raise ValueError(f"备份快照数据块已损坏: {digest}")
+                    file_hash.update(data)
+                    out.write(data)
+            if file_hash.hexdigest() != manifest.get("sha256"):
+                raise ValueError("备份快照校验失败")
+            return temp_path
+        except Exception:
+            os.remove(temp_path)
+            raise
     
     @staticmethod
     def _is_valid_sqlite_db(db_path: str) -> bool:
@@ -0,0 +1,208 @@
+"""数据导出服务"""
+import contextlib
+import enum
+import os
+import sys
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Dict, Iterator, Optional, TextIO
+from sqlalchemy.orm import Session
+from cashlog.models.transaction import Transaction
+from cashlog.models.todo import Todo
+from cashlog.services.transaction_service import TransactionService
+from cashlog.services.todo_service import TodoService
+from cashlog.services.data_service import COMPRESSION_CODECS
+from cashlog.utils.formatter import Formatter
+
+# 将导出ID范围内各行的tags列拆分为 (id, 标签名) 的递归CTE
+_TAG_SPLIT_CTE = """WITH RECURSIVE split(id, name, rest) AS (
+    SELECT id, '', tags || ',' FROM "{owner_table}" WHERE tags IS NOT NULL AND id BETWEEN {first_id} AND {last_id}
+    UNION ALL
+    SELECT id, trim(substr(rest, 1, instr(rest, ',') - 1)), substr(rest, instr(rest, ',') + 1) FROM split WHERE rest <> ''
+)
+"""
+
+# SQL导出末尾根据tags列重建标签关联的语句。目标库中的标签ID与源库不同，
+# 因此不导出关联表本身，而是按标签名重新关联
+_TAG_LINK_SQL = (
+    _TAG_SPLIT_CTE + "INSERT OR IGNORE INTO tags (name) SELECT DISTINCT name FROM split WHERE name <> '';\n"
+    + _TAG_SPLIT_CTE + 'INSERT OR IGNORE INTO "{link_table}" ({owner_column}, tag_id)\n'
+    "SELECT split.id, tags.id FROM split JOIN tags ON tags.name = split.name;\n"
+)
+
+# 导出表对应的标签关联表和关联列
+_TAG_LINKS = {
+    "transactions": ("transaction_tags", "transaction_id"),
+    "todos": ("todo_tags", "todo_id"),
+}
+
+# 可导出的表：表名 -> (模型, 服务类, 支持的筛选条件)
+EXPORT_TABLES = {
+    "transactions": (Transaction, TransactionService, ("month", "category", "tags", "tags_match", "transaction_type")),
+    "todos": (Todo, TodoService, ("status", "category", "tags", "tags_match", "deadline_before", "deadline_after")),
+}
+
+# 支持的导出格式
+EXPORT_FORMATS = ("csv", "jsonl", "sql")
+
+# 每次从数据库游标读取的行数
+DEFAULT_EXPORT_CHUNK_SIZE = 5000
+
+# SQLAlchemy在SQLite中保存DATETIME所用的格式，SQL导出按此格式还原
+_SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+class ExportService:
+    """数据导出服务类"""
+
+    @staticmethod
+    def export_table(
+        db: Session,
+        output_path: Optional[str] = None,
+        table: str = "transactions",
+        file_format: str = "csv",
+        compress: Optional[str] = None,
+        overwrite: bool = False,
+        chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE,
+        **filters
+    ) -> Dict[str, Any]:
+        """
+        导出整张表到文件或标准输出
+
+        数据按ID顺序分批从数据库游标读取并逐行写出，内存占用与数据量无关。
+        写入文件时先写临时文件，完成后再替换为目标文件。
+        未指定compress时根据文件后缀（.gz/.xz/.bz2）自动选择压缩格式。
+
+        Args:
+            db: 数据库会话
+            output_path: 输出文件路径，为None时写到标准输出
+            table: 表名，transactions 或 todos
+            file_format: 导出格式，csv、jsonl 或 sql
+            compress: 压缩编码，可选 gzip、xz、bz2，为None时不压缩
+            overwrite: 是否覆盖已有文件
+            chunk_size: 每次读取的行数
+            filters: 筛选条件，与 get_transactions / get_todos 相同
+
+        Returns:
+            导出结果，包含导出行数rows和文件路径path（标准输出时为None）
+
+        Raises:
+            FileExistsError: 当文件已存在且overwrite为False时
+            ValueError: 当参数无效时
+        """
+        if file_format not in EXPORT_FORMATS:
+            raise ValueError("导出格式无效，可选值：" + ", ".join(EXPORT_FORMATS))
+        if compress and compress not in COMPRESSION_CODECS:
+            raise ValueError("压缩格式无效，可选值：" + ", ".join(COMPRESSION_CODECS))
+
+        if output_path:
+            output_path = os.path.expanduser(output_path)
+            output_dir = os.path.dirname(output_path)
+            if output_dir and not os.path.exists(output_dir):
+                raise ValueError(f"输出目录不存在: {output_dir}")
+            if not compress:
+                compress = next(
+                    (name for name, (_, suffix, _) in COMPRESSION_CODECS.items() if output_path.endswith(suffix)),
+                    None
+                )
+            elif not output_path.endswith(COMPRESSION_CODECS[compress][1]):
+                raise ValueError(f"导出文件必须以{COMPRESSION_CODECS[compress][1]}为后缀")
+            if os.path.exists(output_path) and not overwrite:
+                raise FileExistsError(f"导出文件已存在: {output_path}，使用-f参数覆盖")
+
+        rows = ExportService._iter_rows(db, table, chunk_size, **filters)
+
+        with ExportService._open_output(output_path, compress) as stream:
+            columns = [column.name for column in EXPORT_TABLES[table][0].__table__.columns]
+            if file_format == "sql":
+                count = ExportService._write_sql(rows, table, columns, stream)
+            else:
+                fields = {name: attrgetter(name) for name in columns}
+                count = Formatter.write_rows(rows, fields, file_format, stream)
+
+        return {"rows": count, "path": os.path.abspath(output_path) if output_path else None}
+
+    @staticmethod
+    def _iter_rows(db: Session, table: str, chunk_size: int, **filters) -> Iterator[Any]:
+        """按ID顺序分批读取表中的行，返回不经过ORM对象的行元组"""
+        if table not in EXPORT_TABLES:
+            raise ValueError("表名无效，可选值：" + ", ".join(EXPORT_TABLES))
+        if chunk_size <= 0:
+            raise ValueError("每批读取行数必须为正整数")
+        model, service, allowed = EXPORT_TABLES[table]
+        unsupported = [key for key, value in filters.items() if value and key not in allowed]
+        if unsupported:
+            raise ValueError(f"{table} 不支持的筛选条件: {', '.join(unsupported)}")
+
+        query = service.build_query(db, **filters)
+        query = query.with_entities(*model.__table__.columns).order_by(None).order_by(model.id)
+        return iter(query.yield_per(chunk_size))
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _open_output(output_path: Optional[str], compress: Optional[str]) -> Iterator[TextIO]:
+        """打开导出目标，文件先写入临时文件，成功后再替换"""
+        if not output_path:
+            if not compress:
+                yield sys.stdout
+                sys.stdout.flush()
+                return
+            # 压缩数据写到标准输出的二进制流，关闭压缩流不会关闭标准输出
+            with COMPRESSION_CODECS[compress][0](sys.stdout.buffer, "wt", encoding="utf-8", newline="") as stream:
+                yield stream
+            sys.stdout.buffer.flush()
+            return
+
+        temp_path = output_path + ".part"
+        try:
+            if compress:
+                stream = COMPRESSION_CODECS[compress][0](temp_path, "wt", encoding="utf-8", newline="")
+            else:
+                stream = open(temp_path, "w", encoding="utf-8", newline="")
+            with stream:
+                yield stream
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def _write_sql(rows: Iterator[Any], table: str, columns, stream: TextIO) -> int:
+        """
+        以INSERT语句写出，整个文件包在一个事务中
+
+        行按ID顺序写出，最后根据导出ID范围内各行的tags列重建标签关联，
+        导入后按标签筛选的结果与源库一致。
+        """
+        prefix = f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ('
+        id_index = columns.index("id")
+        count = 0
+        first_id = last_id = None
+        stream.write("BEGIN TRANSACTION;\n")
+        for row in rows:
+            stream.write(prefix + ", ".join(ExportService._sql_literal(value) for value in row) + ");\n")
+            if first_id is None:
+                first_id = row[id_index]
+            last_id = row[id_index]
+            count += 1
+        if count and table in _TAG_LINKS:
+            link_table, owner_column = _TAG_LINKS[table]
+            stream.write(_TAG_LINK_SQL.format(owner_table=table, link_table=link_table, owner_column=owner_column,
+                                              first_id=int(first_id), last_id=int(last_id)))
+        stream.write("COMMIT;\n")
+        return count
+
+    @staticmethod
+    def _sql_literal(value: Any) -> str:
+        """将值转换为SQLite字面量，时间和枚举按数据库中的存储形式输出"""
+        if value is None:
+            return "NULL"
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        if isinstance(value, datetime):
+            value = value.strftime(_SQLITE_DATETIME_FORMAT)
+        elif isinstance(value, enum.Enum):
+            value = value.name
+        return "'" + str(value).replace("'", "''") + "'"
@@ -0,0 +1,44 @@
+"""列表查询的键集分页"""
+from typing import Optional
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query, Session
+
+
+def keyset_paginate(db: Session, query: Query, model, after_id: Optional[int] = None,
+                    limit: Optional[int] = None) -> Query:
+    """
+    按 (created_at, id) 倒序排序，并从游标之后开始取数据
+
+    游标为上一页最后一条记录的ID，查询时定位到该记录的 (created_at, id)
+    并直接从索引中该位置之后继续读取，翻页耗时与页码无关。
+
+    Args:
+        db: 数据库会话
+        query: 已应用筛选条件的查询
+        model: 带有 id 和 created_at 列的模型
+        after_id: 上一页最后一条记录的ID
+        limit: 最多返回的条数
+
+    Returns:
+        排序并分页后的查询
+
+    Raises:
+        ValueError: 游标记录不存在或条数无效
+    """
+    if after_id is not None:
+        cursor = db.query(model.created_at).filter(model.id == after_id).scalar()
+        if cursor is None:
+            raise ValueError(f"游标记录ID {after_id} 不存在")
+        # created_at <= cursor 让SQLite直接在索引上定位起点，OR条件只处理同一时间的记录
+        query = query.filter(and_(
+            model.created_at <= cursor,
+            or_(model.created_at < cursor, model.id < after_id)
+        ))
+
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    if limit is not None:
+        if limit <= 0:
+            raise ValueError("条数必须为正整数")
+        query = query.limit(limit)
+    return query
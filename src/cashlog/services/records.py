@@ -0,0 +1,53 @@
+"""只读列表查询：以Core语句读取所需的列并构造轻量记录"""
+from itertools import starmap
+from typing import Iterator, List
+from sqlalchemy.orm import Query, Session
+
+
+def _record_statement(query: Query, record_class, include_text: bool):
+    """将已应用筛选、排序和分页的ORM查询改写为只选取记录所需列的Core语句"""
+    columns = record_class.columns + record_class.text_columns if include_text else record_class.columns
+    return query.with_entities(*columns).statement
+
+
+def fetch_records(db: Session, query: Query, record_class, include_text: bool = False) -> List:
+    """
+    执行查询并返回只读记录列表
+
+    语句在会话当前的连接上执行，不经过ORM的实体加载和身份映射；
+    同样结构的语句会命中SQLAlchemy的编译缓存，重复查询不再重新编译SQL。
+
+    Args:
+        db: 数据库会话
+        query: 已应用筛选条件、排序和分页的查询，如 build_query 的返回值
+        record_class: 记录类，如 TransactionRecord
+        include_text: 是否读取备注、内容等大文本列
+
+    Returns:
+        记录列表，顺序与查询一致
+    """
+    result = db.connection().execute(_record_statement(query, record_class, include_text))
+    return list(starmap(record_class, result))
+
+
+def iter_records(db: Session, query: Query, record_class, include_text: bool = False,
+                 batch_size: int = 1000) -> Iterator:
+    """
+    流式执行查询，逐条返回只读记录
+
+    每次从数据库游标读取batch_size行，不会一次性加载全部结果。
+
+    Args:
+        db: 数据库会话
+        query: 已应用筛选条件、排序和分页的查询
+        record_class: 记录类
+        include_text: 是否读取备注、内容等大文本列
+        batch_size: 每批读取的行数
+
+    Returns:
+        记录迭代器
+    """
+    statement = _record_statement(query, record_class, include_text).execution_options(yield_per=batch_size)
+    result = db.connection().execute(statement)
+    for partition in result.partitions():
+        yield from starmap(record_class, partition)
@@ -1,9 +1,93 @@
 """报表业务逻辑服务"""
-from datetime import datetime
-from typing import Dict, Any, List
+import csv
+import io
+import unicodedata
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, case, select, insert, delete
 from cashlog.models.transaction import Transaction
+from cashlog.models.rollup import MonthlyCategoryRollup
+from cashlog.utils.formatter import Formatter
+
+# 区间报表支持的统计周期
+RANGE_PERIODS = ("month", "week", "day")
+PERIOD_NAMES = {"month": "月", "week": "周", "day": "日"}
+
+# 区间报表透视表单元格的取值
+RANGE_VALUES = ("net", "income", "expense")
+VALUE_NAMES = {"net": "净额", "income": "收入", "expense": "支出"}
+
+# 区间报表最多包含的周期数，避免按天统计多年数据时生成过大的矩阵
+MAX_RANGE_PERIODS = 1000
+
+
+def _next_month(day: date) -> date:
+    """获取下个月的第一天"""
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _parse_range_bound(value: str, is_end: bool) -> Tuple[date, bool]:
+    """
+    解析区间报表的起止时间
+
+    Args:
+        value: 月份（YYYY-MM）或日期（YYYY-MM-DD）
+        is_end: 是否为结束时间，按月份指定时取该月最后一天
+
+    Returns:
+        (日期, 是否按月份指定)
+    """
+    try:
+        if len(value) == 7:
+            day = datetime.strptime(value + "-01", "%Y-%m-%d").date()
+            return (_next_month(day) - timedelta(days=1) if is_end else day), True
+        return datetime.strptime(value, "%Y-%m-%d").date(), False
+    except ValueError:
+        raise ValueError("时间范围格式应为YYYY-MM或YYYY-MM-DD")
+
+
+def _period_keys(start: date, end: date, by: str) -> List[str]:
+    """
+    列出区间内的全部周期，没有交易的周期也包含在内
+
+    月为 YYYY-MM，日为 YYYY-MM-DD，周以该周周一的日期 YYYY-MM-DD 表示。
+    """
+    if by == "month":
+        current, step = start.replace(day=1), None
+    elif by == "week":
+        current, step = start - timedelta(days=start.weekday()), timedelta(days=7)
+    else:
+        current, step = start, timedelta(days=1)
+
+    keys = []
+    while current <= end:
+        if len(keys) >= MAX_RANGE_PERIODS:
+            raise ValueError(f"统计周期过多（超过{MAX_RANGE_PERIODS}个），请缩小时间范围或改用更长的统计周期")
+        keys.append(current.strftime("%Y-%m") if by == "month" else current.isoformat())
+        current = _next_month(current) if step is None else current + step
+    return keys
+
+
+def _period_expression(by: str):
+    """交易时间所属周期的SQL表达式，取值格式与 _period_keys 一致"""
+    if by == "month":
+        return func.substr(Transaction.created_at, 1, 7)
+    if by == "week":
+        # 'weekday 0' 前进到本周日（当天为周日时不变），再退6天即本周一
+        return func.strftime("%Y-%m-%d", Transaction.created_at, "weekday 0", "-6 days")
+    return func.substr(Transaction.created_at, 1, 10)
+
+
+def _display_width(text: str) -> int:
+    """计算文本在终端中的显示宽度，中文等全角字符占两列"""
+    return sum(2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1 for ch in text)
+
+
+def _pad(text: str, width: int, left: bool) -> str:
+    """按显示宽度补齐空格"""
+    padding = " " * (width - _display_width(text))
+    return text + padding if left else padding + text
 
 
 class ReportService:
@@ -19,7 +103,7 @@ class ReportService:
             month: 月份，格式：YYYY-MM，默认为当前月
 
         Returns:
-            报表数据，包含收入、支出、结余、分类统计等
+            报表数据，包含收入、支出、结余、分类统计等，金额均为以分为单位的整数
         """
         # 如果未指定月份，使用当前月
         if not month:
@@ -29,72 +113,280 @@ class ReportService:
         try:
             if len(month) != 7 or month[4] != "-":
                 raise ValueError("月份格式应为YYYY-MM")
-            start_date = datetime.strptime(month + "-01", "%Y-%m-%d")
-            # 计算下个月的第一天
-            if start_date.month == 12:
-                end_date = datetime.strptime(f"{start_date.year + 1}-01-01", "%Y-%m-%d")
-            else:
-                end_date = datetime.strptime(f"{start_date.year}-{start_date.month + 1:02d}-01", "%Y-%m-%d")
+            datetime.strptime(month + "-01", "%Y-%m-%d")
         except ValueError:
             raise ValueError("月份格式应为YYYY-MM")
 
-        # 查询该月所有交易
-        transactions = db.query(Transaction).filter(
-            and_(Transaction.created_at >= start_date, Transaction.created_at < end_date)
-        ).all()
+        # 读取该月的分类汇总，汇总表由触发器随交易变更增量维护
+        rows = db.query(
+            MonthlyCategoryRollup.category,
+            MonthlyCategoryRollup.income_cents,
+            MonthlyCategoryRollup.expense_cents,
+            MonthlyCategoryRollup.count
+        ).filter(MonthlyCategoryRollup.month == month).all()
 
-        if not transactions:
+        if not rows:
             return {
                 "month": month,
-                "total_income": 0,
-                "total_expense": 0,
-                "balance": 0,
+                "total_income_cents": 0,
+                "total_expense_cents": 0,
+                "balance_cents": 0,
                 "category_stats": {},
                 "has_data": False
             }
 
-        # 计算总收入和支出
-        total_income = sum(t.amount for t in transactions if t.amount > 0)
-        total_expense = -sum(t.amount for t in transactions if t.amount < 0)
-        balance = total_income - total_expense
-
         # 按分类统计
         category_stats = {}
-        for transaction in transactions:
-            if transaction.category not in category_stats:
-                category_stats[transaction.category] = {
-                    "income": 0,
-                    "expense": 0,
-                    "count": 0
-                }
-            
-            if transaction.amount > 0:
-                category_stats[transaction.category]["income"] += transaction.amount
-            else:
-                category_stats[transaction.category]["expense"] += -transaction.amount
-            category_stats[transaction.category]["count"] += 1
+        for category, income_cents, expense_cents, count in rows:
+            category_stats[category] = {
+                "income_cents": income_cents,
+                "expense_cents": expense_cents,
+                "count": count
+            }
+
+        # 计算总收入和支出，整数求和没有舍入误差
+        total_income = sum(stats["income_cents"] for stats in category_stats.values())
+        total_expense = sum(stats["expense_cents"] for stats in category_stats.values())
+        balance = total_income - total_expense
+        transaction_count = sum(stats["count"] for stats in category_stats.values())
 
         # 计算分类占比
         for category, stats in category_stats.items():
             if total_income > 0:
-                stats["income_percentage"] = (stats["income"] / total_income) * 100
+                stats["income_percentage"] = (stats["income_cents"] / total_income) * 100
             else:
                 stats["income_percentage"] = 0
             if total_expense > 0:
-                stats["expense_percentage"] = (stats["expense"] / total_expense) * 100
+                stats["expense_percentage"] = (stats["expense_cents"] / total_expense) * 100
             else:
                 stats["expense_percentage"] = 0
 
         return {
             "month": month,
-            "total_income": total_income,
-            "total_expense": total_expense,
-            "balance": balance,
+            "total_income_cents": total_income,
+            "total_expense_cents": total_expense,
+            "balance_cents": balance,
             "category_stats": category_stats,
-            "transaction_count": len(transactions),
+            "transaction_count": transaction_count,
             "has_data": True
         }
 
+    @staticmethod
+    def rebuild_rollups(db) -> int:
+        """
+        从交易表全量重建月度分类汇总表
+
+        Args:
+            db: 数据库会话或连接，调用方负责提交事务
+
+        Returns:
+            重建后的汇总行数
+        """
+        month = func.substr(Transaction.created_at, 1, 7)
+        aggregate = select(
+            month,
+            Transaction.category,
+            func.sum(case((Transaction.amount_cents > 0, Transaction.amount_cents), else_=0)),
+            func.sum(case((Transaction.amount_cents <= 0, -Transaction.amount_cents), else_=0)),
+            func.count(Transaction.id)
+        ).group_by(month, Transaction.category)
+
+        table = MonthlyCategoryRollup.__table__
+        db.execute(delete(table))
+        db.execute(insert(table).from_select(
+            ["month", "category", "income_cents", "expense_cents", "count"], aggregate
+        ))
+        return db.execute(select(func.count()).select_from(table)).scalar()
+
+    @staticmethod
+    def generate_range_report(db: Session, start: str, end: Optional[str] = None,
+                              by: str = "month") -> Dict[str, Any]:
+        """
+        生成区间收支报表，按周期和分类汇总
+
+        全部周期和分类的统计由一条分组查询得到。按整月统计时直接读取月度汇总表，
+        按周、按日或起止时间精确到日时对交易表按 (周期, 分类) 分组聚合。
+
+        Args:
+            db: 数据库会话
+            start: 起始月份或日期，格式：YYYY-MM 或 YYYY-MM-DD
+            end: 结束月份或日期（含），默认与起始相同
+            by: 统计周期，month、week 或 day
+
+        Returns:
+            报表数据，包含周期列表、分类×周期统计、各周期与各分类合计等，金额均为以分为单位的整数
+
+        Raises:
+            ValueError: 时间格式、范围或统计周期无效
+        """
+        if by not in RANGE_PERIODS:
+            raise ValueError("统计周期应为 month、week 或 day")
+        start_day, start_by_month = _parse_range_bound(start, is_end=False)
+        end_day, end_by_month = _parse_range_bound(end or start, is_end=True)
+        if start_day > end_day:
+            raise ValueError("起始时间不能晚于结束时间")
+        periods = _period_keys(start_day, end_day, by)
+
+        if by == "month" and start_by_month and end_by_month:
+            rows = db.query(
+                MonthlyCategoryRollup.month,
+                MonthlyCategoryRollup.category,
+                MonthlyCategoryRollup.income_cents,
+                MonthlyCategoryRollup.expense_cents,
+                MonthlyCategoryRollup.count
+            ).filter(MonthlyCategoryRollup.month.between(periods[0], periods[-1])).all()
+        else:
+            period = _period_expression(by)
+            rows = db.query(
+                period,
+                Transaction.category,
+                func.sum(case((Transaction.amount_cents > 0, Transaction.amount_cents), else_=0)),
+                func.sum(case((Transaction.amount_cents <= 0, -Transaction.amount_cents), else_=0)),
+                func.count(Transaction.id)
+            ).filter(
+                Transaction.created_at >= datetime(start_day.year, start_day.month, start_day.day),
+                Transaction.created_at < datetime(end_day.year, end_day.month, end_day.day) + timedelta(days=1)
+            ).group_by(period, Transaction.category).all()
+
+        def empty_stats() -> Dict[str, int]:
+            return {"income_cents": 0, "expense_cents": 0, "count": 0}
+
+        category_stats: Dict[str, Dict[str, Dict[str, int]]] = {}
+        period_totals = {key: empty_stats() for key in periods}
+        category_totals: Dict[str, Dict[str, int]] = {}
+        for period_key, category, income_cents, expense_cents, count in rows:
+            stats = {"income_cents": income_cents, "expense_cents": expense_cents, "count": count}
+            category_stats.setdefault(category, {})[period_key] = stats
+            for totals in (period_totals.setdefault(period_key, empty_stats()),
+                           category_totals.setdefault(category, empty_stats())):
+                for name, amount in stats.items():
+                    totals[name] += amount
+
+        total_income = sum(stats["income_cents"] for stats in category_totals.values())
+        total_expense = sum(stats["expense_cents"] for stats in category_totals.values())
+        return {
+            "start": start_day.isoformat(),
+            "end": end_day.isoformat(),
+            "by": by,
+            "periods": periods,
+            "category_stats": category_stats,
+            "period_totals": period_totals,
+            "category_totals": category_totals,
+            "total_income_cents": total_income,
+            "total_expense_cents": total_expense,
+            "balance_cents": total_income - total_expense,
+            "transaction_count": sum(stats["count"] for stats in category_totals.values()),
+            "has_data": bool(rows)
+        }
+
+    @staticmethod
+    def format_range_report(report_data: Dict[str, Any], format_type: str = "text",
+                            pivot: Optional[str] = None, value: str = "net") -> str:
+        """
+        格式化区间报表输出
+
+        Args:
+            report_data: generate_range_report 返回的报表数据
+            format_type: 输出格式，text、markdown 或 csv
+            pivot: 透视维度，category 时输出 分类×周期 矩阵，否则每个周期一行
+            value: 透视表单元格的取值，net(净额)、income(收入) 或 expense(支出)
+
+        Returns:
+            格式化后的报表字符串，csv 格式只包含表格本身
+        """
+        if pivot not in (None, "category"):
+            raise ValueError("透视维度仅支持 category")
+        if value not in RANGE_VALUES:
+            raise ValueError("透视取值应为 net、income 或 expense")
+        headers, rows = ReportService._range_table(report_data, pivot, value)
+
+        if format_type == "csv":
+            stream = io.StringIO()
+            writer = csv.writer(stream, lineterminator="\n")
+            writer.writerow(headers)
+            writer.writerows(rows)
+            return stream.getvalue()
+
+        title = (f"{report_data['start']} 至 {report_data['end']} "
+                 f"收支报表（按{PERIOD_NAMES[report_data['by']]}）")
+        section = f"分类统计（{VALUE_NAMES[value]}）" if pivot else "周期统计"
+        if format_type == "markdown":
+            if not report_data["has_data"]:
+                return f"# {title}\n\n暂无数据"
+            lines = [f"# {title}", "", "## 汇总信息", "| 项目 | 金额 |", "|-----|------|"]
+            lines.append(f"| 总收入 | {Formatter.format_money(report_data['total_income_cents'])} |")
+            lines.append(f"| 总支出 | {Formatter.format_money(report_data['total_expense_cents'])} |")
+            lines.append(f"| 结余 | {Formatter.format_money(report_data['balance_cents'])} |")
+            lines.append(f"| 交易笔数 | {report_data['transaction_count']} |")
+            lines += ["", f"## {section}", "| " + " | ".join(headers) + " |",
+                      "|" + "|".join("-----" for _ in headers) + "|"]
+            lines += ["| " + " | ".join(row) + " |" for row in rows]
+            return "\n".join(lines)
+
+        if not report_data["has_data"]:
+            return f"{title}\n\n暂无数据"
+        lines = [title, "=" * 50]
+        lines.append(f"总收入: {Formatter.format_money(report_data['total_income_cents'])}")
+        lines.append(f"总支出: {Formatter.format_money(report_data['total_expense_cents'])}")
+        lines.append(f"结余: {Formatter.format_money(report_data['balance_cents'])}")
+        lines.append(f"交易笔数: {report_data['transaction_count']}")
+        lines += ["", f"{section}:"]
+        # 首列左对齐，金额列右对齐
+        widths = [max(_display_width(row[i]) for row in [headers] + rows) for i in range(len(headers))]
+        table = [headers] + rows[:-1] + [None, rows[-1]]
+        separator = "-" * (sum(widths) + 2 * (len(widths) - 1))
+        for row in table:
+            if row is None:
+                lines.append(separator)
+                continue
+            lines.append("  ".join(_pad(cell, width, i == 0) for i, (cell, width) in enumerate(zip(row, widths))))
+            if row is headers:
+                lines.append(separator)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _range_table(report_data: Dict[str, Any], pivot: Optional[str],
+                     value: str) -> Tuple[List[str], List[List[str]]]:
+        """将区间报表整理为表头和数据行，最后一行为合计"""
+        money = Formatter.format_money
+
+        def cell(stats: Dict[str, int]) -> str:
+            if value == "income":
+                return money(stats["income_cents"])
+            if value == "expense":
+                return money(stats["expense_cents"])
+            return money(stats["income_cents"] - stats["expense_cents"])
+
+        periods = report_data["periods"]
+        period_totals = report_data["period_totals"]
+        totals = {
+            "income_cents": report_data["total_income_cents"],
+            "expense_cents": report_data["total_expense_cents"],
+            "count": report_data["transaction_count"],
+        }
+
+        if pivot == "category":
+            empty = {"income_cents": 0, "expense_cents": 0, "count": 0}
+            headers = ["分类"] + periods + ["合计"]
+            rows = []
+            for category, category_total in sorted(
+                report_data["category_totals"].items(),
+                key=lambda x: x[1]["income_cents"] + x[1]["expense_cents"],
+                reverse=True
+            ):
+                stats = report_data["category_stats"][category]
+                rows.append([category] + [cell(stats.get(key, empty)) for key in periods] + [cell(category_total)])
+            rows.append(["合计"] + [cell(period_totals[key]) for key in periods] + [cell(totals)])
+            return headers, rows
+
+        headers = ["周期", "收入", "支出", "结余", "笔数"]
+        rows = [
+            [name, money(stats["income_cents"]), money(stats["expense_cents"]),
+             money(stats["income_cents"] - stats["expense_cents"]), str(stats["count"])]
+            for name, stats in [(key, period_totals[key]) for key in periods] + [("合计", totals)]
+        ]
+        return headers, rows
+
     @staticmethod
     def format_report(report_data: Dict[str, Any], format_type: str = "text") -> str:
         """
@@ -124,23 +416,23 @@ class ReportService:
         lines = []
         lines.append(f"{report_data['month']} 月度收支报表")
         lines.append("=" * 50)
-        lines.append(f"总收入: {report_data['total_income']:.2f}")
-        lines.append(f"总支出: {report_data['total_expense']:.2f}")
-        lines.append(f"结余: {report_data['balance']:.2f}")
+        lines.append(f"总收入: {Formatter.format_money(report_data['total_income_cents'])}")
+        lines.append(f"总支出: {Formatter.format_money(report_data['total_expense_cents'])}")
+        lines.append(f"结余: {Formatter.format_money(report_data['balance_cents'])}")
         lines.append(f"交易笔数: {report_data['transaction_count']}")
         lines.append("\n分类统计:")
         lines.append("-" * 50)
 
         for category, stats in sorted(
             report_data["category_stats"].items(),
-            key=lambda x: x[1]["income"] + x[1]["expense"],
+            key=lambda x: x[1]["income_cents"] + x[1]["expense_cents"],
             reverse=True
         ):
-            total = stats["income"] + stats["expense"]
+            total = stats["income_cents"] + stats["expense_cents"]
             lines.append(f"{category}:")
-            lines.append(f"  收入: {stats['income']:.2f} ({stats['income_percentage']:.1f}%)")
-            lines.append(f"  支出: {stats['expense']:.2f} ({stats['expense_percentage']:.1f}%)")
-            lines.append(f"  总金额: {total:.2f}")
+            lines.append(f"  收入: {Formatter.format_money(stats['income_cents'])} ({stats['income_percentage']:.1f}%)")
+            lines.append(f"  支出: {Formatter.format_money(stats['expense_cents'])} ({stats['expense_percentage']:.1f}%)")
+            lines.append(f"  总金额: {Formatter.format_money(total)}")
             lines.append(f"  笔数: {stats['count']}")
             lines.append("-" * 50)
 
@@ -157,9 +449,9 @@ class ReportService:
         lines.append("## 汇总信息")
         lines.append("| 项目 | 金额 |")
         lines.append("|-----|------|")
-        lines.append(f"| 总收入 | {report_data['total_income']:.2f} |")
-        lines.append(f"| 总支出 | {report_data['total_expense']:.2f} |")
-        lines.append(f"| 结余 | {report_data['balance']:.2f} |")
+        lines.append(f"| 总收入 | {Formatter.format_money(report_data['total_income_cents'])} |")
+        lines.append(f"| 总支出 | {Formatter.format_money(report_data['total_expense_cents'])} |")
+        lines.append(f"| 结余 | {Formatter.format_money(report_data['balance_cents'])} |")
         lines.append(f"| 交易笔数 | {report_data['transaction_count']} |")
         lines.append("")
 
@@ -170,17 +462,17 @@ class ReportService:
 
         for category, stats in sorted(
             report_data["category_stats"].items(),
-            key=lambda x: x[1]["income"] + x[1]["expense"],
+            key=lambda x: x[1]["income_cents"] + x[1]["expense_cents"],
             reverse=True
         ):
-            total = stats["income"] + stats["expense"]
+            total = stats["income_cents"] + stats["expense_cents"]
             lines.append(
                 f"| {category} | "
-                f"{stats['income']:.2f} | "
+                f"{Formatter.format_money(stats['income_cents'])} | "
                 f"{stats['income_percentage']:.1f}% | "
-                f"{stats['expense']:.2f} | "
+                f"{Formatter.format_money(stats['expense_cents'])} | "
                 f"{stats['expense_percentage']:.1f}% | "
-                f"{total:.2f} | "
+                f"{Formatter.format_money(total)} | "
                 f"{stats['count']} |"
             )
 
@@ -0,0 +1,99 @@
+"""全文检索查询"""
+import weakref
+from typing import List, Sequence
+from sqlalchemy import func, literal_column, or_, text as sql_text
+from sqlalchemy.orm import Query
+from cashlog.models.search import full_text_search_available
+
+# trigram 分词器能在索引中检索的最短关键词长度
+MIN_INDEXED_TERM_LENGTH = 3
+
+# 各数据库引擎中已存在的全文索引表，避免每次检索都查询 sqlite_master
+_index_tables = weakref.WeakKeyDictionary()
+
+
+def _has_index_table(query: Query, fts_table) -> bool:
+    """
+    判断数据库中是否已建立全文索引表
+
+    SQLite 版本过低时迁移不会建立索引表；在旧版本上迁移过的数据库换到新版本后，
+    索引表同样不存在，两种情况都改用 LIKE 匹配。
+    """
+    if not full_text_search_available():
+        return False
+    bind = query.session.get_bind()
+    tables = _index_tables.setdefault(bind, {})
+    if fts_table.name not in tables:
+        tables[fts_table.name] = query.session.execute(
+            sql_text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": fts_table.name}
+        ).first() is not None
+    return tables[fts_table.name]
+
+
+def clear_index_table_cache() -> None:
+    """
+    清除全文索引表是否存在的缓存
+
+    数据库文件被替换（如 data restore）后索引表可能不再存在或新建出来，
+    由 invalidate_init_cache 一并调用，下一次检索重新查询 sqlite_master。
+    """
+    _index_tables.clear()
+
+
+def parse_search_terms(text: str) -> List[str]:
+    """
+    拆分搜索关键词
+
+    Args:
+        text: 搜索内容，多个关键词用空白分隔
+
+    Returns:
+        去重后的关键词列表
+
+    Raises:
+        ValueError: 搜索内容为空
+    """
+    terms = list(dict.fromkeys((text or "").split()))
+    if not terms:
+        raise ValueError("搜索关键词不能为空")
+    return terms
+
+
+def apply_full_text_search(query: Query, model, fts_table, columns: Sequence[str], text: str) -> Query:
+    """
+    为查询加上全文检索条件并按相关度排序
+
+    所有关键词都需要命中（AND）。三个字符及以上的关键词通过FTS5索引匹配，
+    结果按 bm25 相关度排序；更短的关键词（如两个字的中文词）无法使用trigram索引，
+    改为在原表对应列上做 LIKE 过滤。只有短关键词时需要扫描原表，按时间倒序返回。
+    数据库中没有全文索引表（SQLite 版本不支持 trigram）时，所有关键词都使用 LIKE 过滤。
+
+    Args:
+        query: 已应用其他筛选条件的查询
+        model: 原表模型
+        fts_table: 全文索引表对象
+        columns: 被索引的列名
+        text: 搜索内容
+
+    Returns:
+        加上检索条件和排序的查询
+    """
+    terms = parse_search_terms(text)
+    min_length = MIN_INDEXED_TERM_LENGTH if _has_index_table(query, fts_table) else float("inf")
+    indexed = [term for term in terms if len(term) >= min_length]
+    short = [term for term in terms if len(term) < min_length]
+
+    query = query.order_by(None)
+    if indexed:
+        # 每个关键词作为一个短语，避免用户输入被解析为FTS5查询语法
+        expression = " AND ".join('"' + term.replace('"', '""') + '"' for term in indexed)
+        match_column = fts_table.c[fts_table.name]
+        query = query.join(fts_table, fts_table.c.rowid == model.id).filter(match_column.match(expression))
+        query = query.order_by(func.bm25(literal_column(fts_table.name)))
+
+    for term in short:
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        query = query.filter(or_(*(getattr(model, name).like(pattern, escape="\\") for name in columns)))
+
+    return query.order_by(model.created_at.desc(), model.id.desc())
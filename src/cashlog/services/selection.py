@@ -0,0 +1,67 @@
+"""批量操作的ID选择"""
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import or_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def parse_id_ranges(specs: Iterable[str]) -> List[Tuple[int, int]]:
+    """
+    解析ID列表和范围
+
+    每一项可以是单个ID、逗号分隔的列表或闭区间范围，如 "3"、"1,4,7"、"10-20"。
+    相邻或重叠的范围会被合并。
+
+    Args:
+        specs: ID描述字符串列表
+
+    Returns:
+        按起点排序并合并后的 (起始ID, 结束ID) 列表
+
+    Raises:
+        ValueError: 格式无效或范围起点大于终点
+    """
+    ranges = []
+    for spec in specs:
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            start, sep, end = part.partition("-")
+            try:
+                first = int(start)
+                last = int(end) if sep else first
+            except ValueError:
+                raise ValueError(f"ID格式无效: {part}，应为数字、逗号分隔的列表或范围（如 1,3,5-9）")
+            if first <= 0 or first > last:
+                raise ValueError(f"ID范围无效: {part}")
+            ranges.append((first, last))
+
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def id_condition(column, ranges: List[Tuple[int, int]]) -> Optional[ColumnElement]:
+    """
+    构建按ID列表和范围筛选的条件
+
+    单个ID合并为一个 IN 条件，范围使用 BETWEEN，均可走主键索引。
+
+    Args:
+        column: 主键列
+        ranges: parse_id_ranges 返回的范围列表
+
+    Returns:
+        查询条件，范围为空时返回None
+    """
+    singles = [first for first, last in ranges if first == last]
+    conditions = [column.between(first, last) for first, last in ranges if first != last]
+    if singles:
+        conditions.append(column.in_(singles))
+    if not conditions:
+        return None
+    return or_(*conditions)
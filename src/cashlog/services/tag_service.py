@@ -0,0 +1,119 @@
+"""标签业务逻辑服务"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Column, select, insert, delete, func
+from sqlalchemy.sql import ColumnElement
+from cashlog.models.tag import Tag
+
+
+class TagService:
+    """
+    标签服务类
+
+    标签以逗号分隔的字符串保存在记录的tags字段中用于展示，
+    同时拆分写入标签表和关联表，供筛选时走索引精确匹配。
+    关联表通过其指向记录的外键列（如 transaction_tags.c.transaction_id）指定。
+    """
+
+    @staticmethod
+    def parse_tags(tags: Optional[str]) -> List[str]:
+        """
+        拆分逗号分隔的标签字符串
+
+        Args:
+            tags: 标签字符串
+
+        Returns:
+            去除空白和重复项后的标签列表，保持原有顺序
+        """
+        if not tags:
+            return []
+        names = []
+        for name in tags.split(","):
+            name = name.strip()
+            if name and name not in names:
+                names.append(name)
+        return names
+
+    @staticmethod
+    def get_tag_ids(db, names: List[str]) -> Dict[str, int]:
+        """
+        获取标签ID，不存在的标签会被创建
+
+        Args:
+            db: 数据库会话或连接
+            names: 标签名列表
+
+        Returns:
+            标签名到标签ID的映射
+        """
+        if not names:
+            return {}
+        db.execute(insert(Tag.__table__).prefix_with("OR IGNORE"), [{"name": name} for name in names])
+        rows = db.execute(select(Tag.id, Tag.name).where(Tag.name.in_(names))).all()
+        return {name: tag_id for tag_id, name in rows}
+
+    @staticmethod
+    def link_tags(db, owner_column: Column, links: Iterable[Tuple[int, Optional[str]]]) -> None:
+        """
+        为多条记录批量写入标签关联
+
+        Args:
+            db: 数据库会话或连接
+            owner_column: 关联表中指向记录的列
+            links: (记录ID, 标签字符串) 列表
+        """
+        pairs = [(owner_id, TagService.parse_tags(tags)) for owner_id, tags in links]
+        names = list({name: None for _, tag_names in pairs for name in tag_names})
+        if not names:
+            return
+
+        tag_ids = TagService.get_tag_ids(db, names)
+        rows = [
+            {owner_column.name: owner_id, "tag_id": tag_ids[name]}
+            for owner_id, tag_names in pairs
+            for name in tag_names
+        ]
+        db.execute(insert(owner_column.table).prefix_with("OR IGNORE"), rows)
+
+    @staticmethod
+    def set_tags(db, owner_column: Column, owner_id: int, tags: Optional[str]) -> None:
+        """
+        替换一条记录的全部标签关联
+
+        Args:
+            db: 数据库会话或连接
+            owner_column: 关联表中指向记录的列
+            owner_id: 记录ID
+            tags: 标签字符串
+        """
+        db.execute(delete(owner_column.table).where(owner_column == owner_id))
+        TagService.link_tags(db, owner_column, [(owner_id, tags)])
+
+    @staticmethod
+    def tag_condition(
+        owner_column: Column,
+        id_column: Column,
+        tags: Optional[str],
+        match_all: bool = False
+    ) -> Optional[ColumnElement]:
+        """
+        构建按标签筛选的查询条件
+
+        Args:
+            owner_column: 关联表中指向记录的列
+            id_column: 被筛选记录的主键列
+            tags: 逗号分隔的标签字符串
+            match_all: 为True时要求包含全部标签，否则包含任一标签即可
+
+        Returns:
+            查询条件，没有有效标签时返回None
+        """
+        names = TagService.parse_tags(tags)
+        if not names:
+            return None
+
+        link_table = owner_column.table
+        subquery = select(owner_column).join(Tag, Tag.id == link_table.c.tag_id).where(Tag.name.in_(names))
+        if match_all:
+            subquery = subquery.group_by(owner_column).having(func.count() == len(names))
+        return id_column.in_(subquery)
@@ -1,9 +1,17 @@
 """待办事项业务逻辑服务"""
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Sequence
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
 from cashlog.models.todo import Todo, TodoStatus
+from cashlog.models.tag import todo_tags
+from cashlog.models.records import TodoRecord
+from cashlog.services.tag_service import TagService
+from cashlog.services.pagination import keyset_paginate
+from cashlog.services.records import fetch_records, iter_records
+from cashlog.services.search import apply_full_text_search
+from cashlog.services.selection import id_condition, parse_id_ranges
+from cashlog.models.search import FTS_TABLES, todos_fts
 
 
 class TodoService:
@@ -31,7 +39,7 @@ class TodoService:
         todo = Todo(
             content=todo_data["content"].strip(),
             category=todo_data["category"].strip(),
-            tags=todo_data.get("tags", "").strip() or None
+            tags=",".join(TagService.parse_tags(todo_data.get("tags"))) or None
         )
 
         # 如果提供了截止时间，设置截止时间
@@ -51,6 +59,8 @@ class TodoService:
                 raise e
 
         db.add(todo)
+        db.flush()
+        TagService.set_tags(db, todo_tags.c.todo_id, todo.id, todo.tags)
         db.commit()
         db.refresh(todo)
         return todo
@@ -62,10 +72,130 @@ class TodoService:
 
         Args:
             db: 数据库会话
-            filters: 查询条件，包括status、category、deadline等
+            filters: 查询条件，包括status、category、deadline等，
+                     以及分页参数limit和after_id（上一页最后一条记录的ID）
 
         Returns:
-            待办事项列表
+            待办事项列表，按创建时间倒序
+        """
+        return TodoService.build_query(db, **filters).all()
+
+    @staticmethod
+    def iter_todos(db: Session, batch_size: int = 1000, **filters) -> Iterator[Todo]:
+        """
+        流式查询待办事项列表
+
+        Args:
+            db: 数据库会话
+            batch_size: 每批读取的行数
+            filters: 查询条件，与 get_todos 相同
+
+        Returns:
+            待办事项迭代器，按创建时间倒序
+        """
+        return iter(TodoService.build_query(db, **filters).yield_per(batch_size))
+
+    @staticmethod
+    def search_todos(db: Session, text: str, limit: int = 20, **filters) -> List[Todo]:
+        """
+        全文检索待办事项
+
+        Args:
+            db: 数据库会话
+            text: 搜索内容，多个关键词用空白分隔，需全部命中
+            limit: 最多返回的条数
+            filters: 查询条件，包括status、category、tags、deadline等
+
+        Returns:
+            待办事项列表，按相关度排序
+
+        Raises:
+            ValueError: 搜索内容为空或条数无效
+        """
+        return TodoService.build_search_query(db, text, limit, **filters).all()
+
+    @staticmethod
+    def list_records(db: Session, include_content: bool = False, **filters) -> List[TodoRecord]:
+        """
+        查询待办事项列表，返回只读记录
+
+        与 get_todos 的条件和顺序相同，但只读取所需的列并构造轻量记录，不创建ORM对象。
+
+        Args:
+            db: 数据库会话
+            include_content: 是否读取待办内容，为False时记录的content为None
+            filters: 查询条件，与 get_todos 相同
+
+        Returns:
+            待办事项记录列表，按创建时间倒序
+        """
+        query = TodoService.build_query(db, **filters)
+        return fetch_records(db, query, TodoRecord, include_content)
+
+    @staticmethod
+    def iter_records(db: Session, batch_size: int = 1000, include_content: bool = False,
+                     **filters) -> Iterator[TodoRecord]:
+        """
+        流式查询待办事项列表，逐条返回只读记录
+
+        Args:
+            db: 数据库会话
+            batch_size: 每批读取的行数
+            include_content: 是否读取待办内容
+            filters: 查询条件，与 get_todos 相同
+
+        Returns:
+            待办事项记录迭代器，按创建时间倒序
+        """
+        query = TodoService.build_query(db, **filters)
+        return iter_records(db, query, TodoRecord, include_content, batch_size)
+
+    @staticmethod
+    def search_records(db: Session, text: str, limit: int = 20, include_content: bool = False,
+                       **filters) -> List[TodoRecord]:
+        """
+        全文检索待办事项，返回只读记录，条件和顺序与 search_todos 相同
+
+        Raises:
+            ValueError: 搜索内容为空或条数无效
+        """
+        query = TodoService.build_search_query(db, text, limit, **filters)
+        return fetch_records(db, query, TodoRecord, include_content)
+
+    @staticmethod
+    def build_search_query(db: Session, text: str, limit: int = 20, **filters):
+        """
+        构建全文检索查询
+
+        Args:
+            db: 数据库会话
+            text: 搜索内容
+            limit: 最多返回的条数
+            filters: 查询条件，与 get_todos 相同
+
+        Returns:
+            按相关度排序并限制条数的查询对象
+
+        Raises:
+            ValueError: 搜索内容为空或条数无效
+        """
+        if limit <= 0:
+            raise ValueError("条数必须为正整数")
+        query = TodoService.build_query(db, **filters)
+        query = apply_full_text_search(query, Todo, todos_fts, FTS_TABLES["todos_fts"][1], text)
+        return query.limit(limit)
+
+    @staticmethod
+    def build_query(db: Session, **filters):
+        """
+        根据筛选条件和分页参数构建待办事项查询
+
+        Args:
+            db: 数据库会话
+            filters: 查询条件，与 get_todos 相同
+
+        Returns:
+            按创建时间倒序排列的查询对象
         """
         query = db.query(Todo)
 
@@ -101,17 +231,19 @@ class TodoService:
             except ValueError:
                 raise ValueError("截止时间格式应为YYYY-MM-DD")
 
-        # 按标签筛选（包含任一标签即可）
+        # 按标签筛选（默认包含任一标签即可，tags_match为all时需包含全部标签）
         if filters.get("tags"):
-            tags = filters["tags"].split(",")
-            tag_filters = [Todo.tags.like(f"%{tag.strip()}%") for tag in tags if tag.strip()]
-            if tag_filters:
-                query = query.filter(or_(*tag_filters))
+            condition = TagService.tag_condition(
+                todo_tags.c.todo_id,
+                Todo.id,
+                filters["tags"],
+                match_all=filters.get("tags_match") == "all"
+            )
+            if condition is not None:
+                query = query.filter(condition)
 
-        # 按创建时间排序
-        query = query.order_by(Todo.created_at.desc())
-
-        return query.all()
+        # 按创建时间倒序分页
+        return keyset_paginate(db, query, Todo, filters.get("after_id"), filters.get("limit"))
 
     @staticmethod
     def update_todo_status(db: Session, todo_id: int, status: str) -> Todo:
@@ -148,6 +280,60 @@ class TodoService:
         db.refresh(todo)
         return todo
 
+    @staticmethod
+    def bulk_update_status(db: Session, status: str, todo_ids: Optional[Sequence[str]] = None,
+                           dry_run: bool = False, **filters) -> int:
+        """
+        批量更新待办事项状态
+
+        用一条 UPDATE ... WHERE 语句更新所有命中的待办事项，只提交一次。
+        状态已经是目标状态的待办事项不会被更新，也不计入结果。
+
+        Args:
+            db: 数据库会话
+            status: 新状态
+            todo_ids: ID列表或范围，如 ["1,3", "5-9"]，与筛选条件同时指定时取交集
+            dry_run: 为True时只统计将被更新的条数，不修改数据
+            filters: 筛选条件，与 get_todos 相同（不含分页参数）
+
+        Returns:
+            更新（或将被更新）的条数
+
+        Raises:
+            ValueError: 状态、ID或筛选条件无效，或未指定任何ID和筛选条件
+        """
+        status_map = {
+            "todo": TodoStatus.TODO,
+            "doing": TodoStatus.DOING,
+            "done": TodoStatus.DONE
+        }
+        new_status = status_map.get(status.lower())
+        if not new_status:
+            raise ValueError("状态无效，可选值：todo, doing, done")
+
+        filters = {key: value for key, value in filters.items() if value}
+        ranges = parse_id_ranges(todo_ids or [])
+        if not ranges and not filters:
+            raise ValueError("请指定待办事项ID或筛选条件")
+
+        # 复用列表查询的筛选条件，保证批量更新与 todo list 命中的记录一致
+        conditions = [Todo.status != new_status]
+        where = TodoService.build_query(db, **filters).whereclause
+        if where is not None:
+            conditions.append(where)
+        if ranges:
+            conditions.append(id_condition(Todo.id, ranges))
+
+        if dry_run:
+            return db.query(func.count(Todo.id)).filter(*conditions).scalar()
+
+        result = db.execute(
+            update(Todo).where(*conditions).values(status=new_status, updated_at=datetime.now()),
+            execution_options={"synchronize_session": False}
+        )
+        db.commit()
+        return result.rowcount
+
     @staticmethod
     def get_todo_by_id(db: Session, todo_id: int) -> Optional[Todo]:
         """
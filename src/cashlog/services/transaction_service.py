@@ -1,9 +1,93 @@
 """交易业务逻辑服务"""
+import csv
+import json
+import re
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional, Dict, Any, Iterator, Sequence, TextIO, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, bindparam, delete, insert, select, true, update
 from cashlog.models.transaction import Transaction
+from cashlog.models.tag import Tag, transaction_tags
+from cashlog.models.records import TransactionRecord
+from cashlog.services.tag_service import TagService
+from cashlog.services.pagination import keyset_paginate
+from cashlog.services.records import fetch_records, iter_records
+from cashlog.services.search import apply_full_text_search
+from cashlog.services.selection import id_condition, parse_id_ranges
+from cashlog.models.search import FTS_TABLES, transactions_fts
+
+# 支持的时间格式
+DATETIME_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"]
+
+# 可走fromisoformat快速路径的时间字符串：日期与时间间可用空格或T分隔，秒可带3或6位小数，
+# 不含时区。限定在此范围内，各Python版本的fromisoformat解析结果一致
+_ISO_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d{3}(?:\d{3})?)?)?)?$")
+
+DATETIME_FORMAT_ERROR = (
+    "时间格式不正确，请使用YYYY-MM-DD HH:MM:SS、YYYY-MM-DD HH:MM或YYYY-MM-DD格式"
+    "（日期与时间之间也可用T分隔，秒可带3或6位小数，不支持时区）"
+)
+
+# 批量导入支持的输入格式
+IMPORT_FORMATS = ("csv", "jsonl")
+
+
+def _parse_datetime(value: str) -> datetime:
+    """
+    解析时间字符串
+
+    符合_ISO_DATETIME的字符串使用C实现的datetime.fromisoformat快速解析，
+    其余再依次尝试DATETIME_FORMATS中的格式。带时区偏移的时间不被接受，
+    避免偏移在存为本地时间时被静默丢弃。
+
+    Args:
+        value: 时间字符串
+
+    Returns:
+        解析后的时间对象（不带时区）
+
+    Raises:
+        ValueError: 时间格式不正确
+    """
+    if _ISO_DATETIME.match(value):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(DATETIME_FORMAT_ERROR)
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(DATETIME_FORMAT_ERROR)
+
+
+def _parse_amount_cents(value: Any) -> int:
+    """
+    将金额（元）解析为以分为单位的整数
+
+    经由字符串转换为Decimal，"0.1" 与 0.1 都精确得到10分，不受二进制浮点误差影响。
+
+    Args:
+        value: 金额，字符串或数字
+
+    Returns:
+        金额对应的分数
+
+    Raises:
+        ValueError: 不是有限数字，或小数超过两位
+    """
+    try:
+        amount = Decimal(str(value).strip())
+    except (InvalidOperation, TypeError):
+        raise ValueError("金额需为数字")
+    if not amount.is_finite():
+        raise ValueError("金额需为数字")
+    cents = amount.scaleb(2)
+    if cents != cents.to_integral_value():
+        raise ValueError("金额最多保留两位小数")
+    return int(cents)
 
 
 class TransactionService:
@@ -21,11 +105,8 @@ class TransactionService:
         Returns:
             创建的交易对象
         """
-        # 验证金额格式
-        try:
-            amount = float(transaction_data["amount"])
-        except (ValueError, TypeError):
-            raise ValueError("金额需为数字")
+        # 验证金额格式，转换为以分为单位的整数
+        amount_cents = _parse_amount_cents(transaction_data["amount"])
 
         # 验证必填字段
         if not transaction_data.get("category"):
@@ -33,33 +114,173 @@ class TransactionService:
 
         # 创建交易对象
         transaction = Transaction(
-            amount=amount,
+            amount_cents=amount_cents,
             category=transaction_data["category"].strip(),
-            tags=transaction_data.get("tags", "").strip() or None,
-            notes=transaction_data.get("notes", "").strip() or None
+            tags=",".join(TagService.parse_tags(transaction_data.get("tags"))) or None,
+            notes=(transaction_data.get("notes") or "").strip() or None
         )
 
         # 如果提供了时间，设置时间
         if transaction_data.get("created_at"):
-            try:
-                # 支持多种时间格式
-                formats = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"]
-                for fmt in formats:
-                    try:
-                        transaction.created_at = datetime.strptime(transaction_data["created_at"], fmt)
-                        break
-                    except ValueError:
-                        continue
-                else:
-                    raise ValueError("时间格式不正确，请使用YYYY-MM-DD HH:MM:SS格式")
-            except ValueError as e:
-                raise e
+            # 与批量导入使用同一套时间格式
+            transaction.created_at = _parse_datetime(str(transaction_data["created_at"]).strip())
 
         db.add(transaction)
+        db.flush()
+        TagService.set_tags(db, transaction_tags.c.transaction_id, transaction.id, transaction.tags)
         db.commit()
         db.refresh(transaction)
         return transaction
 
+    @staticmethod
+    def import_transactions(
+        db: Session,
+        stream: TextIO,
+        file_format: str = "csv",
+        batch_size: int = 1000,
+        reject_stream: Optional[TextIO] = None
+    ) -> Dict[str, int]:
+        """
+        批量导入交易记录
+
+        逐行流式读取CSV或JSONL数据，按批次使用executemany写入，
+        整个导入在同一个数据库事务中完成。无法解析的行写入拒绝文件，不会中断导入。
+
+        Args:
+            db: 数据库会话
+            stream: 输入文本流（文件或标准输入），字段与create_transaction一致
+            file_format: 输入格式，csv 或 jsonl
+            batch_size: 每批写入的行数
+            reject_stream: 拒绝行输出流（JSONL格式），为None时丢弃错误行
+
+        Returns:
+            导入结果，包含imported（成功条数）和rejected（拒绝条数）
+        """
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError("导入格式无效，可选值：csv, jsonl")
+        if batch_size <= 0:
+            raise ValueError("批次大小必须为正整数")
+
+        now = datetime.now()
+        table = Transaction.__table__
+        # SQLite 3.35 起支持 RETURNING，一次 executemany 即可按参数顺序取回新ID
+        returning = db.get_bind().dialect.insert_returning
+        statement = insert(table)
+        if returning:
+            statement = statement.returning(table.c.id, sort_by_parameter_order=True)
+        imported = 0
+        rejected = 0
+        batch = []
+
+        try:
+            for line_no, raw in TransactionService._iter_import_rows(stream, file_format):
+                try:
+                    if not isinstance(raw, dict):
+                        raise ValueError("行数据必须为JSON对象")
+                    batch.append(TransactionService._prepare_import_row(raw, now))
+                except ValueError as e:
+                    rejected += 1
+                    if reject_stream is not None:
+                        reject_stream.write(json.dumps(
+                            {"line": line_no, "error": str(e), "row": raw},
+                            ensure_ascii=False
+                        ) + "\n")
+                    continue
+
+                if len(batch) >= batch_size:
+                    TransactionService._insert_import_batch(db, statement, batch, returning)
+                    imported += len(batch)
+                    batch = []
+
+            if batch:
+                TransactionService._insert_import_batch(db, statement, batch, returning)
+                imported += len(batch)
+
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return {"imported": imported, "rejected": rejected}
+
+    @staticmethod
+    def _insert_import_batch(db: Session, statement, batch: List[Dict[str, Any]], returning: bool) -> None:
+        """写入一批导入数据及其标签关联，returning 表示 statement 带有 RETURNING 子句"""
+        if returning:
+            ids = db.execute(statement, batch).scalars().all()
+        else:
+            # 不支持 RETURNING 时逐行插入，从 lastrowid 取得新ID
+            ids = [db.execute(statement, row).inserted_primary_key[0] for row in batch]
+        TagService.link_tags(
+            db,
+            transaction_tags.c.transaction_id,
+            [(transaction_id, row["tags"]) for transaction_id, row in zip(ids, batch) if row["tags"]]
+        )
+
+    @staticmethod
+    def _iter_import_rows(stream: TextIO, file_format: str) -> Iterator[Tuple[int, Any]]:
+        """
+        逐行读取导入数据
+
+        Args:
+            stream: 输入文本流
+            file_format: 输入格式，csv 或 jsonl
+
+        Returns:
+            (行号, 原始行数据) 迭代器，JSON解析失败的行以原始字符串返回
+        """
+        if file_format == "csv":
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError:
+                yield line_no, line
+
+    @staticmethod
+    def _prepare_import_row(raw: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        """
+        校验并转换一行导入数据
+
+        Args:
+            raw: 原始行数据
+            now: 未提供时间时使用的默认时间
+
+        Returns:
+            可直接用于批量插入的字段字典
+        """
+        # 导出文件中的金额列为 amount_cents，手工整理的文件使用以元为单位的 amount
+        if raw.get("amount") in (None, "") and raw.get("amount_cents") not in (None, ""):
+            try:
+                amount_cents = int(raw["amount_cents"])
+            except (ValueError, TypeError):
+                raise ValueError("金额需为数字")
+        else:
+            amount_cents = _parse_amount_cents(raw.get("amount"))
+
+        category = str(raw.get("category") or "").strip()
+        if not category:
+            raise ValueError("分类为必填项")
+
+        created_at = raw.get("created_at")
+        created_at = _parse_datetime(str(created_at).strip()) if created_at else now
+
+        return {
+            "amount_cents": amount_cents,
+            "category": category,
+            "tags": ",".join(TagService.parse_tags(str(raw.get("tags") or ""))) or None,
+            "notes": str(raw.get("notes") or "").strip() or None,
+            "created_at": created_at,
+            "updated_at": now
+        }
+
     @staticmethod
     def get_transactions(db: Session, **filters) -> List[Transaction]:
         """
@@ -67,10 +288,133 @@ class TransactionService:
 
         Args:
             db: 数据库会话
+            filters: 查询条件，包括month、category、tags、transaction_type等，
+                     以及分页参数limit和after_id（上一页最后一条记录的ID）
+
+        Returns:
+            交易列表，按时间倒序
+        """
+        return TransactionService.build_query(db, **filters).all()
+
+    @staticmethod
+    def iter_transactions(db: Session, batch_size: int = 1000, **filters) -> Iterator[Transaction]:
+        """
+        流式查询交易列表
+
+        每次从数据库游标读取batch_size行，不会一次性加载全部交易。
+
+        Args:
+            db: 数据库会话
+            batch_size: 每批读取的行数
+            filters: 查询条件，与 get_transactions 相同
+
+        Returns:
+            交易迭代器，按时间倒序
+        """
+        return iter(TransactionService.build_query(db, **filters).yield_per(batch_size))
+
+    @staticmethod
+    def search_transactions(db: Session, text: str, limit: int = 20, **filters) -> List[Transaction]:
+        """
+        全文检索交易
+
+        Args:
+            db: 数据库会话
+            text: 搜索内容，多个关键词用空白分隔，需全部命中
+            limit: 最多返回的条数
             filters: 查询条件，包括month、category、tags、transaction_type等
 
         Returns:
-            交易列表
+            交易列表，按相关度排序
+
+        Raises:
+            ValueError: 搜索内容为空或条数无效
+        """
+        return TransactionService.build_search_query(db, text, limit, **filters).all()
+
+    @staticmethod
+    def list_records(db: Session, include_notes: bool = False, **filters) -> List[TransactionRecord]:
+        """
+        查询交易列表，返回只读记录
+
+        与 get_transactions 的条件和顺序相同，但只读取所需的列并构造轻量记录，
+        不创建ORM对象，适合只用于展示或导出的大量数据。
+
+        Args:
+            db: 数据库会话
+            include_notes: 是否读取备注，为False时记录的notes为None
+            filters: 查询条件，与 get_transactions 相同
+
+        Returns:
+            交易记录列表，按时间倒序
+        """
+        query = TransactionService.build_query(db, **filters)
+        return fetch_records(db, query, TransactionRecord, include_notes)
+
+    @staticmethod
+    def iter_records(db: Session, batch_size: int = 1000, include_notes: bool = False,
+                     **filters) -> Iterator[TransactionRecord]:
+        """
+        流式查询交易列表，逐条返回只读记录
+
+        Args:
+            db: 数据库会话
+            batch_size: 每批读取的行数
+            include_notes: 是否读取备注
+            filters: 查询条件，与 get_transactions 相同
+
+        Returns:
+            交易记录迭代器，按时间倒序
+        """
+        query = TransactionService.build_query(db, **filters)
+        return iter_records(db, query, TransactionRecord, include_notes, batch_size)
+
+    @staticmethod
+    def search_records(db: Session, text: str, limit: int = 20, include_notes: bool = False,
+                       **filters) -> List[TransactionRecord]:
+        """
+        全文检索交易，返回只读记录，条件和顺序与 search_transactions 相同
+
+        Raises:
+            ValueError: 搜索内容为空或条数无效
+        """
+        query = TransactionService.build_search_query(db, text, limit, **filters)
+        return fetch_records(db, query, TransactionRecord, include_notes)
+
+    @staticmethod
+    def build_search_query(db: Session, text: str, limit: int = 20, **filters):
+        """
+        构建全文检索查询
+
+        Args:
+            db: 数据库会话
+            text: 搜索内容
+            limit: 最多返回的条数
+            filters: 查询条件，与 get_transactions 相同
+
+        Returns:
+            按相关度排序并限制条数的查询对象
+
+        Raises:
+            ValueError: 搜索内容为空或条数无效
+        """
+        if limit <= 0:
+            raise ValueError("条数必须为正整数")
+        query = TransactionService.build_query(db, **filters)
+        query = apply_full_text_search(query, Transaction, transactions_fts, FTS_TABLES["transactions_fts"][1], text)
+        return query.limit(limit)
+
+    @staticmethod
+    def build_query(db: Session, **filters):
+        """
+        根据筛选条件和分页参数构建交易查询
+
+        Args:
+            db: 数据库会话
+            filters: 查询条件，与 get_transactions 相同
+
+        Returns:
+            按创建时间倒序排列的查询对象
         """
         query = db.query(Transaction)
 
@@ -98,24 +442,198 @@ class TransactionService:
         if filters.get("category"):
             query = query.filter(Transaction.category == filters["category"])
 
-        # 按标签筛选（包含任一标签即可）
+        # 按标签筛选（默认包含任一标签即可，tags_match为all时需包含全部标签）
         if filters.get("tags"):
-            tags = filters["tags"].split(",")
-            tag_filters = [Transaction.tags.like(f"%{tag.strip()}%") for tag in tags if tag.strip()]
-            if tag_filters:
-                query = query.filter(or_(*tag_filters))
+            condition = TagService.tag_condition(
+                transaction_tags.c.transaction_id,
+                Transaction.id,
+                filters["tags"],
+                match_all=filters.get("tags_match") == "all"
+            )
+            if condition is not None:
+                query = query.filter(condition)
 
         # 按交易类型筛选
         transaction_type = filters.get("transaction_type")
         if transaction_type == "income":
-            query = query.filter(Transaction.amount > 0)
+            query = query.filter(Transaction.amount_cents > 0)
         elif transaction_type == "expense":
-            query = query.filter(Transaction.amount < 0)
+            query = query.filter(Transaction.amount_cents < 0)
+
+        # 按时间倒序分页
+        return keyset_paginate(db, query, Transaction, filters.get("after_id"), filters.get("limit"))
 
-        # 按时间排序
-        query = query.order_by(Transaction.created_at.desc())
+    @staticmethod
+    def bulk_update(db: Session, transaction_ids: Optional[Sequence[str]] = None, new_category: Optional[str] = None,
+                    add_tags: Optional[str] = None, remove_tags: Optional[str] = None, dry_run: bool = False,
+                    batch_size: int = 1000, **filters) -> int:
+        """
+        批量修改交易的分类和标签
+
+        先按ID和筛选条件取出命中的交易ID，再按批次对每批ID执行集合语句：
+        一条 UPDATE 修改分类，关联表用一条 DELETE 和一条 INSERT ... SELECT 增删标签，
+        随后按关联表重写这批交易的标签字段。月度汇总和全文索引由触发器
+        在同一事务中随之更新，全部批次完成后只提交一次，出错时整体回滚。
+
+        Args:
+            db: 数据库会话
+            transaction_ids: ID列表或范围，如 ["1,3", "5-9"]，与筛选条件同时指定时取交集
+            new_category: 新分类
+            add_tags: 要添加的标签，多个标签用逗号分隔
+            remove_tags: 要移除的标签，多个标签用逗号分隔
+            dry_run: 为True时只统计命中的条数，不修改数据
+            batch_size: 每批处理的交易条数
+            filters: 筛选条件，与 get_transactions 相同（不含分页参数）
+
+        Returns:
+            命中（或将被修改）的交易条数
+
+        Raises:
+            ValueError: 未指定修改内容、选择条件无效或同一标签既添加又移除
+        """
+        new_category = (new_category or "").strip() or None
+        added = TagService.parse_tags(add_tags)
+        removed = TagService.parse_tags(remove_tags)
+        if not new_category and not added and not removed:
+            raise ValueError("请指定新分类或要添加、移除的标签")
+        if set(added) & set(removed):
+            raise ValueError("同一标签不能同时添加和移除")
+
+        ids = TransactionService._select_ids(db, transaction_ids, filters, batch_size)
+        if dry_run or not ids:
+            return len(ids)
+
+        values = {"updated_at": datetime.now()}
+        if new_category:
+            values["category"] = new_category
+
+        link_table = transaction_tags
+        try:
+            added_ids = list(TagService.get_tag_ids(db, added).values())
+            removed_ids = db.execute(select(Tag.id).where(Tag.name.in_(removed))).scalars().all()
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size]
+                in_batch = Transaction.id.in_(batch)
+                db.execute(update(Transaction).where(in_batch).values(**values))
+                if removed_ids:
+                    db.execute(delete(link_table).where(
+                        link_table.c.transaction_id.in_(batch), link_table.c.tag_id.in_(removed_ids)
+                    ))
+                if added_ids:
+                    db.execute(insert(link_table).prefix_with("OR IGNORE").from_select(
+                        ["transaction_id", "tag_id"],
+                        select(Transaction.id, Tag.id).join_from(Transaction, Tag, true())
+                        .where(in_batch, Tag.id.in_(added_ids))
+                    ))
+                if added or removed:
+                    TransactionService._sync_tags_column(db, batch, added)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(ids)
+
+    @staticmethod
+    def _sync_tags_column(db: Session, batch: Sequence[int], added: Sequence[str]) -> None:
+        """
+        按关联表重写一批交易的标签字段
+
+        旧数据的标签字段可能带有空白或重复项，不能按字符串增删标签；这里以关联表为准，
+        保留原字段中的标签顺序，新增的标签依次追加在后，只更新内容有变化的行。
+
+        Args:
+            db: 数据库会话
+            batch: 交易ID列表
+            added: 本次新增的标签，决定追加顺序
+        """
+        linked: Dict[int, set] = {transaction_id: set() for transaction_id in batch}
+        for transaction_id, name in db.execute(
+            select(transaction_tags.c.transaction_id, Tag.name)
+            .join(Tag, Tag.id == transaction_tags.c.tag_id)
+            .where(transaction_tags.c.transaction_id.in_(batch))
+        ):
+            linked[transaction_id].add(name)
+
+        changes = []
+        for transaction_id, tags in db.execute(select(Transaction.id, Transaction.tags).where(Transaction.id.in_(batch))):
+            names = linked[transaction_id]
+            ordered = [name for name in TagService.parse_tags(tags) if name in names]
+            ordered += [name for name in added if name in names and name not in ordered]
+            ordered += sorted(names - set(ordered))
+            value = ",".join(ordered) or None
+            if value != tags:
+                changes.append({"transaction_id": transaction_id, "new_tags": value})
+        if changes:
+            table = Transaction.__table__
+            db.execute(
+                update(table).where(table.c.id == bindparam("transaction_id")).values(tags=bindparam("new_tags")),
+                changes
+            )
+
+    @staticmethod
+    def bulk_delete(db: Session, transaction_ids: Optional[Sequence[str]] = None, dry_run: bool = False,
+                    batch_size: int = 1000, **filters) -> int:
+        """
+        批量删除交易
+
+        按批次对命中的交易ID执行 DELETE，并删除对应的标签关联；月度汇总和全文索引
+        由触发器在同一事务中更新，全部批次完成后只提交一次，出错时整体回滚。
+
+        Args:
+            db: 数据库会话
+            transaction_ids: ID列表或范围，与筛选条件同时指定时取交集
+            dry_run: 为True时只统计将被删除的条数，不修改数据
+            batch_size: 每批删除的交易条数
+            filters: 筛选条件，与 get_transactions 相同（不含分页参数）
+
+        Returns:
+            删除（或将被删除）的交易条数
+
+        Raises:
+            ValueError: 未指定选择条件或选择条件无效
+        """
+        ids = TransactionService._select_ids(db, transaction_ids, filters, batch_size)
+        if dry_run or not ids:
+            return len(ids)
+
+        try:
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start:start + batch_size]
+                # SQLite默认不启用外键约束，关联表需要显式删除
+                db.execute(delete(transaction_tags).where(transaction_tags.c.transaction_id.in_(batch)))
+                db.execute(delete(Transaction).where(Transaction.id.in_(batch)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(ids)
+
+    @staticmethod
+    def _select_ids(db: Session, transaction_ids: Optional[Sequence[str]], filters: Dict[str, Any],
+                    batch_size: int) -> List[int]:
+        """
+        取出批量操作命中的交易ID
+
+        修改前一次性确定目标记录，避免按标签或分类筛选时，前面批次的修改影响后续批次的命中范围。
+
+        Raises:
+            ValueError: 未指定任何ID和筛选条件、选择条件无效或批次大小无效
+        """
+        if batch_size <= 0:
+            raise ValueError("批次大小必须为正整数")
+        filters = {key: value for key, value in filters.items() if value}
+        ranges = parse_id_ranges(transaction_ids or [])
+        if not ranges and not filters:
+            raise ValueError("请指定交易ID或筛选条件")
 
-        return query.all()
+        # 复用列表查询的筛选条件，保证批量操作与 transaction list 命中的记录一致
+        conditions = []
+        where = TransactionService.build_query(db, **filters).whereclause
+        if where is not None:
+            conditions.append(where)
+        if ranges:
+            conditions.append(id_condition(Transaction.id, ranges))
+        return db.execute(select(Transaction.id).where(*conditions).order_by(Transaction.id)).scalars().all()
 
     @staticmethod
     def get_transaction_by_id(db: Session, transaction_id: int) -> Optional[Transaction]:
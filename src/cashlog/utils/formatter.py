@@ -1,27 +1,116 @@
 """格式化工具类"""
-from typing import List, Dict, Any
+import contextlib
+import csv
+import enum
+import json
+import os
+import sys
+from itertools import islice
+from operator import attrgetter, itemgetter
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, TextIO, TYPE_CHECKING
 from datetime import datetime
-from rich.console import Console
-from rich.table import Table
-from rich.text import Text
+
+# rich 的导入较重，在真正输出时才导入，保证命令行启动速度
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.table import Table
+
+# 列表类命令支持的输出格式，table 之外的格式不经过rich，逐行直接写出
+OUTPUT_FORMATS = ("table", "tsv", "csv", "jsonl")
+
+# 机器可读输出的字段及取值方式，字段名与 transaction import 的输入一致。
+# 金额在库中以分为单位保存，输出为两位小数的字符串，不经过浮点数
+TRANSACTION_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "id": attrgetter("id"),
+    "amount": lambda t: Formatter.format_money(t.amount_cents),
+    "type": lambda t: "income" if t.amount_cents > 0 else "expense",
+    "category": attrgetter("category"),
+    "tags": attrgetter("tags"),
+    "notes": attrgetter("notes"),
+    "created_at": attrgetter("created_at"),
+}
+
+TODO_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "id": attrgetter("id"),
+    "content": attrgetter("content"),
+    "category": attrgetter("category"),
+    "status": attrgetter("status"),
+    "tags": attrgetter("tags"),
+    "deadline": attrgetter("deadline"),
+    "created_at": attrgetter("created_at"),
+}
+
+REPORT_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "month": itemgetter("month"),
+    "category": itemgetter("category"),
+    "income": lambda r: Formatter.format_money(r["income_cents"]),
+    "expense": lambda r: Formatter.format_money(r["expense_cents"]),
+    "count": itemgetter("count"),
+    "income_percentage": itemgetter("income_percentage"),
+    "expense_percentage": itemgetter("expense_percentage"),
+}
+
+# TSV中需要转义的字符
+_TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+_console_instance = None
 
 
 class Formatter:
     """格式化工具类"""
+
+    # print_error 的调用次数。命令出错时只打印错误而不抛出异常，批处理模式据此判断命令是否失败
+    errors_printed = 0
+
+    @staticmethod
+    def _console() -> "Console":
+        """获取rich控制台对象，进程内只创建一次"""
+        global _console_instance
+        if _console_instance is None:
+            from rich.console import Console
+            _console_instance = Console()
+        return _console_instance
+
+    @staticmethod
+    @contextlib.contextmanager
+    def use_console(**console_options) -> Iterator["Console"]:
+        """
+        临时替换rich控制台对象
+
+        常驻服务在一个进程内为不同终端执行命令，需要按请求方的终端宽度和颜色支持输出。
+
+        Args:
+            console_options: 传给 rich.console.Console 的参数，如 file、width、force_terminal
+
+        Yields:
+            新的控制台对象，退出时恢复原来的控制台
+        """
+        global _console_instance
+        from rich.console import Console
+        previous = _console_instance
+        _console_instance = Console(**console_options)
+        try:
+            yield _console_instance
+        finally:
+            _console_instance = previous
     
     @staticmethod
-    def format_table(data: List[Dict[str, Any]], headers: Dict[str, str]) -> Table:
+    def format_table(data: List[Dict[str, Any]], headers: Dict[str, str], **table_options) -> "Table":
         """
         格式化数据为表格
 
         Args:
             data: 数据列表
             headers: 表头映射，格式为 {"字段名": "显示名称"}
+            table_options: 传给 rich Table 的其他参数
 
         Returns:
             Rich表格对象
         """
-        table = Table(show_header=True, header_style="bold magenta")
+        from rich.table import Table
+
+        table_options.setdefault("show_header", True)
+        table = Table(header_style="bold magenta", **table_options)
         
         # 添加表头
         for field, display_name in headers.items():
@@ -55,7 +144,7 @@ class Formatter:
             data: 数据列表
             headers: 表头映射
         """
-        console = Console()
+        console = Formatter._console()
         if not data:
             console.print("[yellow]暂无数据[/yellow]")
             return
@@ -63,6 +152,137 @@ class Formatter:
         table = Formatter.format_table(data, headers)
         console.print(table)
     
+    @staticmethod
+    def print_table_stream(items: Iterable[Any], headers: Dict[str, str],
+                           format_rows: Callable[[List[Any]], List[Dict[str, Any]]],
+                           chunk_size: int = 200) -> int:
+        """
+        分块打印表格
+
+        每凑满chunk_size条就输出一块，第一块立即显示，内存中最多只保留一块数据。
+        表格不带边框，后续各块沿用第一块的列宽并省略表头，拼接后仍是一张表。
+
+        Args:
+            items: 数据对象迭代器
+            headers: 表头映射
+            format_rows: 将一块数据对象转换为字典列表的函数
+            chunk_size: 每块的行数
+
+        Returns:
+            打印的总行数
+        """
+        from rich import box
+        from rich.cells import cell_len
+
+        console = Formatter._console()
+        iterator = iter(items)
+        total = 0
+        widths = None
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            table = Formatter.format_table(format_rows(chunk), headers, show_header=total == 0,
+                                           box=box.SIMPLE_HEAD, show_edge=False)
+            # 以第一块的实际列宽为准固定各列宽度，超出的内容折行
+            if widths is None:
+                widths = [
+                    max(cell_len(str(cell)) for cell in (column.header, *column.cells))
+                    for column in table.columns
+                ]
+            for column, width in zip(table.columns, widths):
+                column.min_width = column.max_width = width
+                column.overflow = "fold"
+            console.print(table)
+            total += len(chunk)
+        if total == 0:
+            console.print("[yellow]暂无数据[/yellow]")
+        return total
+
+    @staticmethod
+    def write_rows(items: Iterable[Any], fields: Dict[str, Callable[[Any], Any]], output_format: str,
+                   stream: Optional[TextIO] = None) -> int:
+        """
+        以机器可读格式逐行写出数据
+
+        每取到一条数据就立即写出，不经过rich，也不生成中间的字典列表。
+        时间按 YYYY-MM-DD HH:MM:SS[.ffffff] 输出，空值在tsv/csv中为空串，在jsonl中为null。
+
+        Args:
+            items: 数据对象迭代器
+            fields: 字段名到取值函数的映射
+            output_format: 输出格式，tsv、csv 或 jsonl
+            stream: 输出流，默认为标准输出
+
+        Returns:
+            写出的行数
+
+        Raises:
+            ValueError: 输出格式不支持
+        """
+        if output_format not in OUTPUT_FORMATS or output_format == "table":
+            raise ValueError(f"不支持的输出格式: {output_format}，可选值：tsv, csv, jsonl")
+        stream = stream or sys.stdout
+        names = list(fields)
+        getters = list(fields.values())
+        count = 0
+
+        try:
+            if output_format == "jsonl":
+                for item in items:
+                    row = {name: Formatter._plain_value(getter(item)) for name, getter in zip(names, getters)}
+                    stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    count += 1
+            elif output_format == "csv":
+                writer = csv.writer(stream, lineterminator="\n")
+                writer.writerow(names)
+                for item in items:
+                    writer.writerow(["" if v is None else v for v in
+                                     (Formatter._plain_value(getter(item)) for getter in getters)])
+                    count += 1
+            else:
+                stream.write("\t".join(names) + "\n")
+                for item in items:
+                    stream.write("\t".join(
+                        "" if v is None else str(v).translate(_TSV_ESCAPES)
+                        for v in (Formatter._plain_value(getter(item)) for getter in getters)
+                    ) + "\n")
+                    count += 1
+            stream.flush()
+        except BrokenPipeError:
+            if stream is not sys.stdout:
+                raise
+            # 下游（如 head）提前关闭了管道，后续输出全部丢弃，避免退出时再次报错
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+        return count
+
+    @staticmethod
+    def _plain_value(value: Any) -> Any:
+        """将时间和枚举转换为机器可读的基本类型"""
+        if isinstance(value, datetime):
+            return value.isoformat(sep=" ")
+        if isinstance(value, enum.Enum):
+            return value.value
+        return value
+
+    @staticmethod
+    def format_money(cents: int) -> str:
+        """
+        将以分为单位的整数金额格式化为两位小数的字符串
+
+        全程使用整数运算，不经过浮点数，如 -1250 格式化为 "-12.50"。
+
+        Args:
+            cents: 金额（分）
+
+        Returns:
+            金额字符串（元）
+        """
+        sign = "-" if cents < 0 else ""
+        yuan, fen = divmod(abs(cents), 100)
+        return f"{sign}{yuan}.{fen:02d}"
+
     @staticmethod
     def format_transactions(transactions: List[Any]) -> List[Dict[str, Any]]:
         """
@@ -77,7 +297,7 @@ class Formatter:
         return [
             {
                 "id": t.id,
-                "amount": t.amount,
+                "amount": Formatter.format_money(t.amount_cents),
                 "type": t.transaction_type,
                 "category": t.category,
                 "tags": t.tags or "-",
@@ -111,6 +331,16 @@ class Formatter:
             for t in todos
         ]
     
+    @staticmethod
+    def print_text(text: str) -> None:
+        """
+        打印文本，支持rich标记
+
+        Args:
+            text: 文本内容
+        """
+        Formatter._console().print(text)
+
     @staticmethod
     def print_success(message: str) -> None:
         """
@@ -119,7 +349,7 @@ class Formatter:
         Args:
             message: 消息内容
         """
-        console = Console()
+        console = Formatter._console()
         console.print(f"[green]✓ {message}[/green]")
     
     @staticmethod
@@ -130,7 +360,8 @@ class Formatter:
         Args:
             message: 消息内容
         """
-        console = Console()
+        Formatter.errors_printed += 1
+        console = Formatter._console()
         console.print(f"[red]✗ {message}[/red]")
     
     @staticmethod
@@ -141,5 +372,16 @@ class Formatter:
         Args:
             message: 消息内容
         """
-        console = Console()
+        console = Formatter._console()
         console.print(f"[blue]ℹ {message}[/blue]")
+
+    @staticmethod
+    def print_warning(message: str) -> None:
+        """
+        打印警告消息
+
+        Args:
+            message: 消息内容，通常以 ⚠️ 开头
+        """
+        console = Formatter._console()
+        console.print(f"[yellow]{message}[/yellow]")
@@ -0,0 +1,448 @@
+"""
+命令耗时分析
+
+通过 cashlog --profile / --trace-sql 启用。分析期间：
+
+- 监听 SQLAlchemy 的 before_cursor_execute / after_cursor_execute 事件，记录每条SQL的
+  执行次数、耗时和返回行数。SQLite的查询在取数时才逐行执行，因此结果游标会被包装，
+  取数耗时也计入该语句。
+- 按阶段统计耗时：模块导入、数据库初始化、SQL、输出渲染，其余时间归为ORM与其他代码。
+  阶段可以嵌套，每个阶段只统计自身的时间，例如流式输出时读取数据库的时间计入SQL而不是渲染。
+- 可选开启 cProfile 和 tracemalloc。
+
+命令结束后自动标出重复执行的相同查询（N+1）和全表扫描的查询，
+汇总输出到标准错误，不影响标准输出中的 tsv/csv/jsonl 数据，也可以写入JSON文件。
+"""
+import builtins
+import json
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import click
+
+# 同一条查询语句执行次数达到该值时视为N+1查询
+N_PLUS_ONE_THRESHOLD = 5
+
+# 汇总中列出的语句、函数和内存分配位置的数量
+SUMMARY_TOP = 10
+
+# 阶段名称及汇总中的显示名称
+PHASE_LABELS = {
+    "import": "模块导入",
+    "init_db": "数据库初始化",
+    "sql": "SQL执行与取数",
+    "render": "输出渲染",
+    "other": "ORM与其他代码",
+}
+
+# 计入渲染阶段的 Formatter 方法
+_RENDER_METHODS = (
+    "print_table", "print_table_stream", "write_rows", "print_text",
+    "print_success", "print_error", "print_info",
+)
+
+# 查询计划中的全表扫描，SQLite 3.36 起为 "SCAN transactions"，更早的版本为
+# "SCAN TABLE transactions [AS t]"；使用索引的扫描和虚拟表不在此列
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+
+def _short_sql(statement: str, width: int = 100) -> str:
+    """压缩空白并截断SQL，用于单行展示"""
+    text = " ".join(statement.split())
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+class _TracedCursor:
+    """包装DBAPI游标，统计取数耗时和返回行数"""
+
+    def __init__(self, cursor, profiler: "CommandProfiler", record: Dict[str, Any]):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._record = record
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _fetch(self, method: Callable, *args) -> Any:
+        with self._profiler.phase("sql") as timing:
+            result = method(*args)
+        self._record["ms"] += timing["elapsed"] * 1000
+        if isinstance(result, list):
+            self._record["rows"] += len(result)
+        elif result is not None:
+            self._record["rows"] += 1
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def close(self) -> None:
+        self._cursor.close()
+        self._profiler._statement_done(self._record)
+
+
+class CommandProfiler:
+    """单次命令的耗时分析器"""
+
+    def __init__(self, cpu: bool = False, memory: bool = False, trace_sql: bool = False):
+        """
+        Args:
+            cpu: 是否使用cProfile统计函数耗时
+            memory: 是否使用tracemalloc统计内存分配
+            trace_sql: 是否在每条SQL完成时输出到标准错误
+        """
+        self.cpu = cpu
+        self.memory = memory
+        self.trace_sql = trace_sql
+        self.label: Optional[str] = None
+        self.phases: Dict[str, float] = {name: 0.0 for name in PHASE_LABELS}
+        self.statements: List[Dict[str, Any]] = []
+        self.orm_objects = 0
+        self._stack: List[Dict[str, Any]] = []
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._restore: List[Callable[[], None]] = []
+        self._started = 0.0
+        self._total = 0.0
+        self._cprofile = None
+        self._memory_result: Optional[Dict[str, Any]] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Dict[str, float]]:
+        """
+        统计一个阶段的耗时，嵌套阶段的时间从外层阶段中扣除
+
+        Yields:
+            计时结果，退出时写入 elapsed（秒，含嵌套阶段）
+        """
+        frame = {"start": time.perf_counter(), "children": 0.0}
+        self._stack.append(frame)
+        try:
+            yield frame
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame["start"]
+            frame["elapsed"] = elapsed
+            self.phases[name] += elapsed - frame["children"]
+            if self._stack:
+                self._stack[-1]["children"] += elapsed
+
+    def start(self) -> None:
+        """开始分析，安装导入、SQL和渲染的计时钩子"""
+        self._started = time.perf_counter()
+        self._install_import_hook()
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.cpu:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+        with self.phase("import"):
+            from sqlalchemy import event
+            from sqlalchemy.engine import Engine
+            from sqlalchemy.orm import Mapper
+            import cashlog.models.db as db_module
+            from cashlog.utils.formatter import Formatter
+
+        listeners = [
+            (Engine, "before_cursor_execute", self._before_cursor_execute),
+            (Engine, "after_cursor_execute", self._after_cursor_execute),
+            (Engine, "handle_error", self._handle_error),
+            (Mapper, "load", self._on_load),
+        ]
+        for target, name, listener in listeners:
+            event.listen(target, name, listener)
+            self._restore.append(lambda t=target, n=name, f=listener: event.remove(t, n, f))
+
+        self._wrap(db_module, "init_db", "init_db")
+        for method in _RENDER_METHODS:
+            self._wrap(Formatter, method, "render")
+
+    def finish(self, summary: bool = True, output_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        结束分析，移除钩子并输出结果
+
+        Args:
+            summary: 是否将汇总输出到标准错误
+            output_path: JSON结果文件路径，为None时不写文件
+
+        Returns:
+            分析结果
+        """
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self._total = time.perf_counter() - self._started
+        if self.memory:
+            self._memory_result = self._collect_memory()
+        for restore in reversed(self._restore):
+            restore()
+        self._restore = []
+        for record in list(self._pending.values()):
+            self._statement_done(record)
+
+        result = self.result()
+        if summary:
+            click.echo(self.format_summary(result), err=True)
+        if output_path:
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        return result
+
+    def result(self) -> Dict[str, Any]:
+        """
+        汇总分析结果
+
+        Returns:
+            包含总耗时、各阶段耗时、按语句聚合的SQL统计、警告，以及可选的函数和内存统计
+        """
+        phases = dict(self.phases)
+        phases["other"] = max(self._total - sum(v for k, v in phases.items() if k != "other"), 0.0)
+
+        queries: Dict[str, Dict[str, Any]] = {}
+        for record in self.statements:
+            query = queries.setdefault(record["sql"], {
+                "sql": record["sql"], "count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+            })
+            query["count"] += 1
+            query["total_ms"] += record["ms"]
+            query["max_ms"] = max(query["max_ms"], record["ms"])
+            query["rows"] += record["rows"] or 0
+        ranked = sorted(queries.values(), key=lambda q: q["total_ms"], reverse=True)
+        for query in ranked:
+            query["total_ms"] = round(query["total_ms"], 3)
+            query["max_ms"] = round(query["max_ms"], 3)
+
+        result = {
+            "command": self.label,
+            "total_ms": round(self._total * 1000, 3),
+            "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in phases.items()},
+            "sql": {
+                "statements": len(self.statements),
+                "rows": sum(record["rows"] or 0 for record in self.statements),
+                "orm_objects": self.orm_objects,
+                "queries": ranked,
+            },
+            "warnings": self._n_plus_one(ranked) + self._full_scans(),
+        }
+        if self._cprofile is not None:
+            result["functions"] = self._top_functions()
+        if self._memory_result is not None:
+            result["memory"] = self._memory_result
+        return result
+
+    def format_summary(self, result: Dict[str, Any]) -> str:
+        """将分析结果格式化为文本"""
+        total = result["total_ms"]
+        lines = [f"耗时分析: {result['command'] or 'cashlog'}  总计 {total:.1f}ms", "阶段:"]
+        for name, ms in result["phases_ms"].items():
+            share = ms / total if total else 0.0
+            lines.append(f"  {PHASE_LABELS[name]:<10}{ms:>10.1f}ms{share:>8.1%}")
+
+        sql = result["sql"]
+        lines.append(f"SQL: {sql['statements']} 条语句，返回 {sql['rows']} 行，加载ORM对象 {sql['orm_objects']} 个")
+        if sql["queries"]:
+            lines.append(f"  {'次数':>4}{'总耗时ms':>10}{'最大ms':>9}{'行数':>8}  语句")
+            for query in sql["queries"][:SUMMARY_TOP]:
+                lines.append(
+                    f"  {query['count']:>6}{query['total_ms']:>12.2f}{query['max_ms']:>10.2f}"
+                    f"{query['rows']:>10}  {_short_sql(query['sql'])}"
+                )
+
+        for warning in result["warnings"]:
+            lines.append(f"警告 [{warning['type']}] {warning['message']}: {_short_sql(warning['sql'])}")
+
+        for function in result.get("functions", []):
+            if function is result["functions"][0]:
+                lines.append(f"函数耗时（cProfile，按累计耗时）:\n  {'调用次数':>8}{'自身ms':>10}{'累计ms':>10}  函数")
+            lines.append(
+                f"  {function['calls']:>12}{function['self_ms']:>12.1f}{function['cumulative_ms']:>12.1f}"
+                f"  {function['function']}"
+            )
+
+        memory = result.get("memory")
+        if memory:
+            lines.append(f"内存: 峰值 {memory['peak_kb']:.1f}KB，结束时 {memory['current_kb']:.1f}KB")
+            for site in memory["top"]:
+                lines.append(f"  {site['size_kb']:>10.1f}KB{site['count']:>8}次  {site['location']}")
+        return "\n".join(lines)
+
+    def _install_import_hook(self) -> None:
+        """统计 import 语句的耗时，只计最外层导入"""
+        original_import = builtins.__import__
+        profiler = self
+
+        def timed_import(name, *args, **kwargs):
+            if profiler._stack and profiler._stack[-1].get("importing"):
+                return original_import(name, *args, **kwargs)
+            with profiler.phase("import") as frame:
+                frame["importing"] = True
+                return original_import(name, *args, **kwargs)
+
+        builtins.__import__ = timed_import
+        self._restore.append(lambda: setattr(builtins, "__import__", original_import))
+
+    def _wrap(self, owner: Any, attribute: str, phase_name: str) -> None:
+        """将对象上的函数包装为计入指定阶段，结束时还原"""
+        original = owner.__dict__[attribute] if isinstance(owner, type) else getattr(owner, attribute)
+        function = original.__func__ if isinstance(original, staticmethod) else original
+        profiler = self
+
+        def timed(*args, **kwargs):
+            if phase_name == "init_db" and profiler.label is None:
+                ctx = click.get_current_context(silent=True)
+                profiler.label = ctx.command_path if ctx else None
+            with profiler.phase(phase_name):
+                return function(*args, **kwargs)
+
+        setattr(owner, attribute, staticmethod(timed) if isinstance(original, staticmethod) else timed)
+        self._restore.append(lambda: setattr(owner, attribute, original))
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        frame = {"start": time.perf_counter(), "children": 0.0}
+        self._stack.append(frame)
+        self._pending[id(cursor)] = {
+            "sql": statement,
+            "parameters": None if executemany else parameters,
+            "engine": conn.engine,
+            "ms": 0.0,
+            "rows": 0,
+            "frame": frame,
+        }
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        record = self._pending.get(id(cursor))
+        if record is None:
+            return
+        self._end_execute(record)
+        if cursor.description is None or executemany or context is None or context.is_crud:
+            # 增删改语句只有影响行数，执行完成即结束
+            record["rows"] = cursor.rowcount if cursor.rowcount >= 0 else None
+            self._statement_done(record)
+        elif context.cursor is cursor:
+            context.cursor = _TracedCursor(cursor, self, record)
+
+    def _handle_error(self, exception_context) -> None:
+        record = self._pending.get(id(exception_context.cursor))
+        if record is not None:
+            self._end_execute(record)
+            self._statement_done(record)
+
+    def _end_execute(self, record: Dict[str, Any]) -> None:
+        frame = record.pop("frame", None)
+        if frame is None or frame not in self._stack:
+            return
+        while self._stack and self._stack[-1] is not frame:
+            self._stack.pop()
+        self._stack.pop()
+        elapsed = time.perf_counter() - frame["start"]
+        self.phases["sql"] += elapsed - frame["children"]
+        if self._stack:
+            self._stack[-1]["children"] += elapsed
+        record["ms"] += elapsed * 1000
+
+    def _statement_done(self, record: Dict[str, Any]) -> None:
+        for key, value in list(self._pending.items()):
+            if value is record:
+                del self._pending[key]
+                break
+        else:
+            return
+        self.statements.append(record)
+        if self.trace_sql:
+            rows = "-" if record["rows"] is None else record["rows"]
+            click.echo(f"[SQL {record['ms']:.2f}ms {rows}行] {_short_sql(record['sql'], 200)}", err=True)
+
+    def _on_load(self, target, context) -> None:
+        self.orm_objects += 1
+
+    @staticmethod
+    def _n_plus_one(queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """相同的查询语句重复执行，通常是逐条加载关联数据"""
+        return [
+            {
+                "type": "N+1",
+                "message": f"同一查询执行了 {query['count']} 次，考虑批量加载",
+                "sql": query["sql"],
+            }
+            for query in queries
+            if query["count"] >= N_PLUS_ONE_THRESHOLD and query["sql"].lstrip().upper().startswith("SELECT")
+        ]
+
+    def _full_scans(self) -> List[Dict[str, Any]]:
+        """用每条查询首次执行时的参数获取查询计划，找出全表扫描"""
+        warnings = []
+        seen = set()
+        for record in self.statements:
+            sql = record["sql"]
+            if sql in seen or record["parameters"] is None or not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            seen.add(sql)
+            try:
+                connection = record["engine"].raw_connection()
+            except Exception:
+                continue
+            try:
+                cursor = connection.cursor()
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, record["parameters"])
+                plan = [row[-1] for row in cursor.fetchall()]
+                cursor.close()
+            except Exception:
+                plan = []
+            finally:
+                connection.close()
+            for detail in plan:
+                match = _FULL_SCAN.match(detail)
+                if match:
+                    warnings.append({
+                        "type": "全表扫描",
+                        "message": f"{match.group(1)} 表未使用索引",
+                        "sql": sql,
+                    })
+        return warnings
+
+    def _top_functions(self) -> List[Dict[str, Any]]:
+        """cProfile中累计耗时最多的函数"""
+        import pstats
+        stats = pstats.Stats(self._cprofile)
+        rows = []
+        for (filename, line, name), (_, calls, self_time, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "self_ms": round(self_time * 1000, 3),
+                "cumulative_ms": round(cumulative * 1000, 3),
+            })
+        rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+        return rows[:SUMMARY_TOP]
+
+    @staticmethod
+    def _collect_memory() -> Dict[str, Any]:
+        """tracemalloc的峰值内存和分配最多的代码位置"""
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        top = snapshot.statistics("lineno")[:SUMMARY_TOP]
+        return {
+            "current_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top": [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                }
+                for stat in top
+            ],
+        }
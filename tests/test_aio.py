@@ -0,0 +1,94 @@
+"""异步服务单元测试"""
+import asyncio
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from cashlog.aio import (  # noqa: E402
+    AsyncReportService,
+    AsyncTodoService,
+    AsyncTransactionService,
+    create_async_db_engine,
+    create_async_session_factory,
+    init_async_db,
+)
+from cashlog.models.migrations import latest_version  # noqa: E402
+from cashlog.models.todo import TodoStatus  # noqa: E402
+
+
+def _run(tmp_path, scenario):
+    """在临时数据库上运行一个异步测试场景"""
+    async def runner():
+        engine = create_async_db_engine(tmp_path / "cashlog.db")
+        try:
+            await init_async_db(engine)
+            session_factory = create_async_session_factory(engine)
+            async with session_factory() as db:
+                return await scenario(db)
+        finally:
+            await engine.dispose()
+    return asyncio.run(runner())
+
+
+def test_init_async_db_migrates_schema(tmp_path):
+    """测试异步初始化建表并迁移到最新版本"""
+    async def scenario(db):
+        result = await (await db.connection()).exec_driver_sql("PRAGMA user_version")
+        return result.scalar()
+
+    assert _run(tmp_path, scenario) == latest_version()
+
+
+def test_async_transaction_service(tmp_path):
+    """测试异步创建、导入、查询、流式读取和全文检索交易"""
+    async def scenario(db):
+        created = await AsyncTransactionService.create_transaction(
+            db, {"amount": -25.5, "category": "餐饮", "notes": "牛肉面", "tags": "午餐"}
+        )
+        result = await AsyncTransactionService.import_transactions(db, [
+            '{"amount": 8000, "category": "工资", "notes": "十月工资"}\n',
+            '{"amount": "abc", "category": "餐饮"}\n',
+        ], file_format="jsonl")
+        assert result == {"imported": 1, "rejected": 1}
+
+        with pytest.raises(ValueError):
+            await AsyncTransactionService.create_transaction(db, {"amount": -1, "category": ""})
+
+        found = await AsyncTransactionService.get_transaction_by_id(db, created.id)
+        assert found.notes == "牛肉面"
+        assert [t.category for t in await AsyncTransactionService.get_transactions(db, tags="午餐")] == ["餐饮"]
+        streamed = [t.amount async for t in AsyncTransactionService.iter_transactions(db, batch_size=1)]
+        assert sorted(streamed) == [-25.5, 8000]
+        hits = await AsyncTransactionService.search_transactions(db, "工资")
+        assert [t.amount for t in hits] == [8000]
+
+        assert await AsyncTransactionService.bulk_update(db, new_category="收入", category="工资") == 1
+        assert await AsyncTransactionService.bulk_delete(db, [str(created.id)]) == 1
+        assert [t.category for t in await AsyncTransactionService.get_transactions(db)] == ["收入"]
+
+    _run(tmp_path, scenario)
+
+
+def test_async_todo_and_report_services(tmp_path):
+    """测试异步待办事项和报表服务"""
+    async def scenario(db):
+        todo = await AsyncTodoService.create_todo(db, {"content": "写周报", "category": "工作"})
+        await AsyncTodoService.create_todo(db, {"content": "买菜", "category": "生活"})
+        updated = await AsyncTodoService.update_todo_status(db, todo.id, "done")
+        assert updated.status == TodoStatus.DONE
+        assert await AsyncTodoService.bulk_update_status(db, "doing", ["1-2"], category="生活") == 1
+
+        with pytest.raises(ValueError):
+            await AsyncTodoService.update_todo_status(db, 999, "done")
+
+        assert [t.content for t in await AsyncTodoService.get_todos(db, category="生活")] == ["买菜"]
+        assert [t.content async for t in AsyncTodoService.iter_todos(db, status="done")] == ["写周报"]
+        assert [t.content async for t in AsyncTodoService.iter_todos(db, status="doing")] == ["买菜"]
+        assert [t.content for t in await AsyncTodoService.search_todos(db, "周报")] == ["写周报"]
+
+        transaction = await AsyncTransactionService.create_transaction(db, {"amount": -30, "category": "交通"})
+        report = await AsyncReportService.generate_monthly_report(db, transaction.created_at.strftime("%Y-%m"))
+        assert report["total_expense_cents"] == 3000
+        assert await AsyncReportService.rebuild_rollups(db) == 1
+
+    _run(tmp_path, scenario)
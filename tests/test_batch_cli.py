@@ -0,0 +1,139 @@
+"""批处理与交互模式单元测试"""
+import pytest
+from click.testing import CliRunner
+import cashlog.models.db as db_module
+from cashlog.cli.main_cli import cli
+from cashlog.models.db import create_db_engine
+from cashlog.models.todo import Todo, TodoStatus
+from cashlog.models.transaction import Transaction
+from cashlog.services.tag_service import TagService
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """让命令使用临时数据库文件"""
+    engine = create_db_engine(tmp_path / "cashlog.db")
+    original_bind = db_module.SessionLocal.kw["bind"]
+    monkeypatch.setattr(db_module, "engine", engine)
+    db_module.SessionLocal.configure(bind=engine)
+    try:
+        yield db_module.SessionLocal
+    finally:
+        db_module.SessionLocal.configure(bind=original_bind)
+        engine.dispose()
+
+
+def _counts(session_factory):
+    with session_factory() as db:
+        return db.query(Transaction).count(), db.query(Todo).count()
+
+
+def test_batch_runs_commands_in_one_session(temp_db):
+    """测试批量执行新增和更新命令"""
+    commands = "\n".join([
+        "# 注释和空行会被忽略",
+        "",
+        "transaction add -a -20 -c 餐饮 -t 午餐 -n 面",
+        "cashlog transaction add -a 5000 -c 工资 -n 十月",
+        "todo add -c 写周报 -C 工作",
+        "todo update 1 done",
+    ])
+    result = CliRunner().invoke(cli, ["batch"], input=commands)
+    assert result.exit_code == 0, result.output
+    assert "执行 4 条命令，失败 0 条" in result.output
+    assert _counts(temp_db) == (2, 1)
+    with temp_db() as db:
+        assert db.query(Todo).one().status == TodoStatus.DONE
+
+
+def test_batch_atomic_rolls_back_on_failure(temp_db):
+    """测试 --atomic 模式下任一命令失败时全部回滚"""
+    commands = "transaction add -a -20 -c 餐饮 -n 面\ntodo add -c 写周报 -C 工作\ntodo update 99 done\n"
+    result = CliRunner().invoke(cli, ["batch", "--atomic"], input=commands)
+    assert result.exit_code == 1
+    assert "第 3 行执行失败，全部 3 条命令已回滚" in result.output
+    assert _counts(temp_db) == (0, 0)
+
+    result = CliRunner().invoke(cli, ["batch", "--atomic"], input=commands.rsplit("todo update", 1)[0])
+    assert result.exit_code == 0, result.output
+    assert "已在一个事务中提交" in result.output
+    assert _counts(temp_db) == (1, 1)
+
+
+def test_batch_stops_on_error_unless_keep_going(temp_db):
+    """测试命令失败时默认停止，--keep-going 继续执行"""
+    commands = "todo update 1 done\ntransaction add -a -1 -c 交通 -n 地铁\nshell\n"
+    result = CliRunner().invoke(cli, ["batch"], input=commands)
+    assert result.exit_code == 1
+    assert "第 1 行执行失败，已停止" in result.output
+    assert _counts(temp_db) == (0, 0)
+
+    result = CliRunner().invoke(cli, ["batch", "--keep-going"], input=commands)
+    assert result.exit_code == 1
+    assert "shell 不能在批处理或交互模式中执行" in result.output
+    assert "执行 3 条命令，失败 2 条" in result.output
+    assert _counts(temp_db) == (1, 0)
+
+
+def test_shell_atomic_commit_and_rollback(temp_db):
+    """测试交互模式下的 rollback 和退出时提交"""
+    commands = "todo add -c 丢弃 -C 工作\nrollback\ntodo add -c 保留 -C 工作\nexit\n"
+    result = CliRunner().invoke(cli, ["shell", "--atomic"], input=commands)
+    assert result.exit_code == 0, result.output
+    assert "已回滚" in result.output and "已提交" in result.output
+    with temp_db() as db:
+        assert [todo.content for todo in db.query(Todo)] == ["保留"]
+
+
+def _fail_first_set_tags(monkeypatch):
+    """让第一次写入交易标签关联时失败，此时交易已 flush 但未提交"""
+    original = TagService.set_tags
+    calls = []
+
+    def set_tags(db, owner_column, *args, **kwargs):
+        if owner_column.table.name == "transaction_tags":
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError("写入标签失败")
+        return original(db, owner_column, *args, **kwargs)
+
+    monkeypatch.setattr(TagService, "set_tags", staticmethod(set_tags))
+
+
+def test_batch_keep_going_discards_failed_command(temp_db, monkeypatch):
+    """测试 --keep-going 时失败命令未提交的修改被回滚，不会随下一条命令提交"""
+    _fail_first_set_tags(monkeypatch)
+    commands = "transaction add -a -1 -c 交通 -n 地铁\ntransaction add -a -2 -c 餐饮 -n 早餐\n"
+    result = CliRunner().invoke(cli, ["batch", "--keep-going"], input=commands)
+    assert result.exit_code == 1
+    assert "执行 2 条命令，失败 1 条" in result.output
+    with temp_db() as db:
+        assert [t.category for t in db.query(Transaction)] == ["餐饮"]
+
+
+def test_shell_atomic_discards_failed_command(temp_db, monkeypatch):
+    """测试交互事务模式下只撤销失败命令的修改，之前的修改保留在事务中"""
+    commands = "todo add -c 保留 -C 工作\ntransaction add -a -1 -c 交通\ntransaction add -a -2 -c 餐饮\nexit\n"
+    _fail_first_set_tags(monkeypatch)
+    result = CliRunner().invoke(cli, ["shell", "--atomic"], input=commands)
+    assert result.exit_code == 0, result.output
+    with temp_db() as db:
+        assert [t.content for t in db.query(Todo)] == ["保留"]
+        assert [t.category for t in db.query(Transaction)] == ["餐饮"]
+
+
+def test_batch_confirmation_requires_yes_flag(temp_db):
+    """测试批处理中需要二次确认的命令不读取下一行作为回答，而是提示加上 -y"""
+    commands = (
+        "transaction add -a -1 -c 交通\n"
+        "transaction bulk-delete -c 交通\n"
+        "y\n"
+        "transaction bulk-delete -c 交通 -y\n"
+    )
+    result = CliRunner().invoke(cli, ["batch", "--keep-going"], input=commands)
+    assert result.exit_code == 1
+    assert "请为该命令加上 -y" in result.output
+    # "y" 行作为命令执行而失败，没有被确认提示读走
+    assert "执行 4 条命令，失败 2 条" in result.output
+    assert "已删除 1 条交易记录" in result.output
+    assert _counts(temp_db) == (0, 0)
@@ -0,0 +1,48 @@
+"""命令行启动开销测试"""
+import subprocess
+import sys
+import click
+import pytest
+from click.testing import CliRunner
+from cashlog.cli.main_cli import cli
+
+
+def _loaded_modules(args):
+    """在独立进程中执行命令，返回重量级依赖的加载情况"""
+    code = (
+        "import sys\n"
+        "from cashlog.cli.main_cli import cli\n"
+        "try:\n"
+        f"    cli({args!r}, prog_name='cashlog')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print('LOADED:' + ','.join(m for m in ('sqlalchemy', 'rich', 'cashlog.services', 'cashlog.cli.data_cli') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    loaded = result.stdout.rsplit("LOADED:", 1)[1].strip()
+    return set(filter(None, loaded.split(",")))
+
+
+def test_help_does_not_import_heavy_dependencies():
+    """顶层帮助和子命令帮助不加载SQLAlchemy、rich和业务服务"""
+    assert _loaded_modules(["--help"]) == set()
+    assert _loaded_modules(["todo", "--help"]) == set()
+    assert _loaded_modules(["todo", "update", "--help"]) == set()
+
+
+@pytest.mark.parametrize("name", ["transaction", "todo", "report", "data"])
+def test_lazy_subcommands_resolve(name):
+    """登记的子命令可以正常加载，且简短帮助与命令组文档一致"""
+    ctx = click.Context(cli)
+    command = cli.get_command(ctx, name)
+    assert isinstance(command, click.Group)
+    assert command.name == name
+    assert command.help.strip().splitlines()[0] == cli.lazy_subcommands[name][1]
+
+
+def test_top_level_help_lists_all_commands():
+    """顶层帮助列出全部子命令"""
+    result = CliRunner().invoke(cli, ["--help"])
+    assert result.exit_code == 0
+    for name in ("transaction", "todo", "report", "data"):
+        assert name in result.output
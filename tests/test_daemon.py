@@ -0,0 +1,123 @@
+"""常驻服务与客户端单元测试"""
+import io
+import threading
+import pytest
+from cashlog.cli import server as server_module
+from cashlog.cli.client import forward_command, send_request, should_forward
+from cashlog.cli.server import CommandServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    """在后台线程中运行常驻服务"""
+    socket_path = tmp_path / "cashlog.sock"
+    command_server = CommandServer(socket_path)
+    thread = threading.Thread(target=command_server.serve, daemon=True)
+    thread.start()
+    try:
+        yield command_server
+    finally:
+        send_request({"action": "shutdown"}, socket_path, timeout=5.0)
+        thread.join(timeout=5.0)
+
+
+@pytest.mark.parametrize("argv, expected", [
+    (["transaction", "add", "-a", "10", "-c", "餐饮"], True),
+    (["--output", "tsv", "todo", "list"], True),
+    (["--output=jsonl", "report", "monthly"], True),
+    (["transaction", "import", "a.csv"], False),
+    (["data", "restore", "-i", "a.db"], False),
+    (["--profile", "todo", "list"], False),
+    (["todo"], False),
+    ([], False),
+])
+def test_should_forward(argv, expected, monkeypatch):
+    """测试只转发非交互、不替换数据库文件的命令"""
+    monkeypatch.delenv("CASHLOG_NO_DAEMON", raising=False)
+    assert should_forward(argv) is expected
+
+
+def test_forward_falls_back_without_server(tmp_path, monkeypatch):
+    """测试服务未运行、套接字文件残留或禁用转发时返回None"""
+    monkeypatch.delenv("CASHLOG_NO_DAEMON", raising=False)
+    socket_path = tmp_path / "cashlog.sock"
+    assert forward_command(["todo", "list"], socket_path) is None
+
+    socket_path.write_text("")
+    assert forward_command(["todo", "list"], socket_path) is None
+
+    monkeypatch.setenv("CASHLOG_NO_DAEMON", "1")
+    assert should_forward(["todo", "list"]) is False
+
+
+def test_server_runs_forwarded_commands(server, monkeypatch):
+    """测试服务执行命令并返回输出和退出码"""
+    monkeypatch.delenv("CASHLOG_NO_DAEMON", raising=False)
+    response = forward_command(["transaction", "add", "--help"], server.socket_path)
+    assert response["exit_code"] == 0
+    assert "添加交易记录" in response["stdout"]
+
+    response = forward_command(["todo", "update"], server.socket_path)
+    assert response["exit_code"] == 2
+    assert "Missing argument" in response["stderr"]
+
+    assert send_request({"action": "ping"}, server.socket_path)["requests"] == 2
+
+
+def test_server_rejects_second_instance_and_cleans_up(server):
+    """测试同一套接字上不能启动第二个服务，停止后删除套接字文件"""
+    with pytest.raises(RuntimeError, match="已在运行"):
+        CommandServer(server.socket_path)
+
+    assert send_request({"action": "shutdown"}, server.socket_path, timeout=5.0) is not None
+    for _ in range(100):
+        if not server.socket_path.exists():
+            break
+        threading.Event().wait(0.01)
+    assert not server.socket_path.exists()
+
+
+class _RecordingStream(io.StringIO):
+    """记录每次写入的输出流"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_server_streams_output_in_chunks(server, monkeypatch):
+    """测试标准输出分块发回并逐块写到客户端的输出流"""
+    monkeypatch.delenv("CASHLOG_NO_DAEMON", raising=False)
+    monkeypatch.setattr(server_module, "STREAM_CHUNK_SIZE", 64)
+    stream = _RecordingStream()
+    response = forward_command(["transaction", "add", "--help"], server.socket_path, stdout=stream)
+    assert response["exit_code"] == 0
+    assert response["stdout"] == ""
+    assert "添加交易记录" in stream.getvalue()
+    assert stream.writes > 1
+
+
+def test_server_falls_back_for_different_engine_settings(server, monkeypatch):
+    """测试连接参数预设或配置文件与服务不同时回退为本进程执行"""
+    monkeypatch.delenv("CASHLOG_NO_DAEMON", raising=False)
+    monkeypatch.setitem(server.engine_env, "CASHLOG_PRAGMA_PROFILE", None)
+    monkeypatch.setenv("CASHLOG_PRAGMA_PROFILE", "fast")
+    assert forward_command(["transaction", "add", "--help"], server.socket_path) is None
+    assert send_request({"action": "ping"}, server.socket_path)["requests"] == 0
+
+
+def test_socket_writer_discards_output_after_disconnect():
+    """测试客户端断开后输出被丢弃而不是抛出异常"""
+    class ClosedPipe(io.BytesIO):
+        def write(self, data):
+            raise BrokenPipeError()
+
+    writer = server_module._SocketWriter(ClosedPipe())
+    writer.write("x" * (server_module.STREAM_CHUNK_SIZE + 1))
+    assert writer.disconnected
+    assert writer.write("more") == 4
+    writer.flush()
@@ -1,6 +1,7 @@
 """数据服务单元测试"""
 import os
 import shutil
+import sqlite3
 import tempfile
 import unittest
 from pathlib import Path
@@ -102,6 +103,153 @@ class TestDataService(unittest.TestCase):
         with self.assertRaises(ValueError):
             DataService.create_backup(output_path=invalid_path)
     
+    def _create_sqlite_db(self, path, rows=200):
+        """创建包含测试数据的SQLite数据库"""
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, payload TEXT)")
+        conn.executemany("INSERT INTO items (payload) VALUES (?)", [("x" * 500,)] * rows)
+        conn.commit()
+        conn.close()
+
+    def _count_items(self, path):
+        """读取测试数据库中的记录数"""
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_create_backup_online_with_progress(self):
+        """测试使用在线备份API分步备份并报告进度"""
+        source_db = os.path.join(self.temp_dir, "source.db")
+        self._create_sqlite_db(source_db)
+        backup_path = os.path.join(self.temp_dir, "online_backup.db")
+        steps = []
+
+        with patch('cashlog.services.data_service.DB_PATH', source_db):
+            result = DataService.create_backup(
+                output_path=backup_path,
+                pages=4,
+                progress=lambda copied, total: steps.append((copied, total))
+            )
+
+        self.assertEqual(result, os.path.abspath(backup_path))
+        self.assertEqual(self._count_items(backup_path), 200)
+        # 分多步完成，最后一步复制完全部页
+        self.assertGreater(len(steps), 1)
+        self.assertEqual(steps[-1][0], steps[-1][1])
+        self.assertFalse(os.path.exists(backup_path + ".part"))
+
+    def test_create_backup_vacuum(self):
+        """测试使用VACUUM INTO生成压缩整理后的备份"""
+        source_db = os.path.join(self.temp_dir, "source.db")
+        self._create_sqlite_db(source_db)
+        conn = sqlite3.connect(source_db)
+        conn.execute("DELETE FROM items WHERE id > 20")
+        conn.commit()
+        conn.close()
+        backup_path = os.path.join(self.temp_dir, "vacuum_backup.db")
+
+        with patch('cashlog.services.data_service.DB_PATH', source_db):
+            DataService.create_backup(output_path=backup_path, vacuum=True)
+
+        self.assertEqual(self._count_items(backup_path), 20)
+        self.assertLess(os.path.getsize(backup_path), os.path.getsize(source_db))
+
+    def test_create_backup_invalid_pages(self):
+        """测试无效的每步页数"""
+        with self.assertRaises(ValueError):
+            DataService.create_backup(output_path=os.path.join(self.temp_dir, "backup.db"), pages=0)
+
+    def test_incremental_backup_dedup_restore_and_gc(self):
+        """测试增量备份去重、从清单恢复以及清理未引用的块"""
+        source_db = os.path.join(self.test_data_dir, "source.db")
+        store_dir = os.path.join(self.temp_dir, "store")
+        self._create_sqlite_db(source_db)
+
+        with patch('cashlog.services.data_service.DB_PATH', source_db):
+            first = DataService.create_incremental_backup(store_dir=store_dir, chunk_size=4096)
+            self.assertEqual(first["new_chunks"], first["total_chunks"])
+
+            # 修改少量数据后再次备份，只有变化的块被写入
+            conn = sqlite3.connect(source_db)
+            conn.execute("UPDATE items SET payload = 'changed' WHERE id = 1")
+            conn.commit()
+            conn.close()
+            second = DataService.create_incremental_backup(store_dir=store_dir, chunk_size=4096)
+            self.assertGreater(second["new_chunks"], 0)
+            self.assertLess(second["new_chunks"], second["total_chunks"] // 2)
+
+            # 从第一个快照恢复
+            with patch('cashlog.services.data_service.DataService._get_database_stats', return_value={}):
+                result = DataService.restore_backup(first["manifest_path"], backup_current=False)
+            self.assertEqual(result["restored_from"], first["manifest_path"])
+
+        conn = sqlite3.connect(source_db)
+        self.assertEqual(conn.execute("SELECT payload FROM items WHERE id = 1").fetchone()[0], "x" * 500)
+        conn.close()
+
+        # 删除第一个快照的清单后，仅被它引用的块会被清理
+        os.remove(first["manifest_path"])
+        gc_result = DataService.gc_chunks(store_dir=store_dir)
+        self.assertEqual(gc_result["manifests"], 1)
+        self.assertEqual(gc_result["removed"], second["new_chunks"])
+        self.assertEqual(gc_result["kept"], second["total_chunks"])
+
+    def test_restore_incremental_backup_missing_chunk(self):
+        """测试增量备份缺少数据块时拒绝恢复"""
+        source_db = os.path.join(self.test_data_dir, "source.db")
+        store_dir = os.path.join(self.temp_dir, "store")
+        self._create_sqlite_db(source_db)
+
+        with patch('cashlog.services.data_service.DB_PATH', source_db):
+            result = DataService.create_incremental_backup(store_dir=store_dir)
+            shutil.rmtree(os.path.join(store_dir, "chunks"))
+            with self.assertRaises(ValueError):
+                DataService.restore_backup(result["manifest_path"], backup_current=False)
+
+        self.assertEqual(self._count_items(source_db), 200)
+
+    def test_compressed_backup_and_restore(self):
+        """测试各压缩格式的备份与自动识别恢复"""
+        source_db = os.path.join(self.test_data_dir, "source.db")
+        self._create_sqlite_db(source_db)
+
+        for codec, suffix in (("gzip", ".db.gz"), ("xz", ".db.xz"), ("bz2", ".db.bz2")):
+            backup_path = os.path.join(self.temp_dir, "compressed" + suffix)
+            with patch('cashlog.services.data_service.DB_PATH', source_db):
+                DataService.create_backup(output_path=backup_path, compress=codec)
+                self.assertLess(os.path.getsize(backup_path), os.path.getsize(source_db))
+                self.assertEqual(DataService._detect_compression(backup_path), codec)
+
+                conn = sqlite3.connect(source_db)
+                conn.execute("DELETE FROM items")
+                conn.commit()
+                conn.close()
+
+                with patch('cashlog.services.data_service.DataService._get_database_stats', return_value={}):
+                    DataService.restore_backup(backup_path, backup_current=False)
+
+            self.assertEqual(self._count_items(source_db), 200)
+        # 解压用的临时文件已清理
+        self.assertEqual(sorted(os.listdir(self.test_data_dir)), ["source.db", "test.db"])
+
+    def test_create_compressed_backup_invalid_suffix(self):
+        """测试压缩备份的文件后缀与压缩格式不符"""
+        with self.assertRaises(ValueError):
+            DataService.create_backup(output_path=os.path.join(self.temp_dir, "backup.db"), compress="gzip")
+
+    def test_restore_corrupt_compressed_backup(self):
+        """测试恢复损坏的压缩备份"""
+        corrupt_path = os.path.join(self.temp_dir, "corrupt.db.gz")
+        with open(corrupt_path, "wb") as f:
+            f.write(b"\x1f\x8b" + b"garbage" * 10)
+
+        with patch('cashlog.services.data_service.DB_PATH', self.test_db_path):
+            with self.assertRaises(ValueError):
+                DataService.restore_backup(corrupt_path, backup_current=False)
+        self.assertEqual(os.listdir(self.test_data_dir), ["test.db"])
+
     @patch('cashlog.services.data_service.sqlite3.connect')
     def test_is_valid_sqlite_db(self, mock_connect):
         """测试SQLite数据库文件验证"""
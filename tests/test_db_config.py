@@ -0,0 +1,119 @@
+"""数据库连接参数单元测试"""
+import pytest
+from sqlalchemy import event, text
+from cashlog.models import db as db_module
+from cashlog.models.db import load_pragma_settings, create_db_engine, PRAGMA_PROFILES
+from cashlog.models.migrations import latest_version
+
+
+def test_load_pragma_settings_default(tmp_path, monkeypatch):
+    """测试未配置时使用safe预设"""
+    monkeypatch.delenv("CASHLOG_PRAGMA_PROFILE", raising=False)
+    settings = load_pragma_settings(config_path=tmp_path / "missing.ini")
+    assert settings == PRAGMA_PROFILES["safe"]
+
+
+def test_load_pragma_settings_env_and_config(tmp_path, monkeypatch):
+    """测试环境变量优先于配置文件，配置文件可覆盖单项"""
+    config_path = tmp_path / "cashlog.ini"
+    config_path.write_text(
+        "[database]\nprofile = bulk\n\n[pragmas]\ncache_size = -1000\n",
+        encoding="utf-8"
+    )
+    monkeypatch.delenv("CASHLOG_PRAGMA_PROFILE", raising=False)
+    settings = load_pragma_settings(config_path=config_path)
+    assert settings["synchronous"] == "OFF"
+    assert settings["cache_size"] == "-1000"
+
+    monkeypatch.setenv("CASHLOG_PRAGMA_PROFILE", "fast")
+    settings = load_pragma_settings(config_path=config_path)
+    assert settings["synchronous"] == "NORMAL"
+    assert settings["cache_size"] == "-1000"
+
+
+def test_load_pragma_settings_invalid(tmp_path, monkeypatch):
+    """测试无效的预设和配置项"""
+    monkeypatch.delenv("CASHLOG_PRAGMA_PROFILE", raising=False)
+    with pytest.raises(ValueError, match="未知的连接参数预设"):
+        load_pragma_settings("turbo", config_path=tmp_path / "missing.ini")
+
+    config_path = tmp_path / "cashlog.ini"
+    config_path.write_text("[pragmas]\ncache_size = 1; DROP TABLE todos\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="取值无效"):
+        load_pragma_settings(config_path=config_path)
+
+    config_path.write_text("[pragmas]\nforeign_keys = ON\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="不支持的PRAGMA配置项"):
+        load_pragma_settings(config_path=config_path)
+
+
+def test_create_db_engine_applies_pragmas(tmp_path):
+    """测试新连接上应用了预设的PRAGMA"""
+    engine = create_db_engine(tmp_path / "fast.db", PRAGMA_PROFILES["fast"])
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == -65536
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    engine.dispose()
+
+
+@pytest.fixture
+def temp_engine(tmp_path, monkeypatch):
+    """将全局引擎替换为临时数据库"""
+    engine = create_db_engine(tmp_path / "init.db")
+    monkeypatch.setattr(db_module, "engine", engine)
+    monkeypatch.setattr(db_module, "_initialized_engine", None)
+    yield engine
+    engine.dispose()
+
+
+def _capture_statements(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return statements, lambda: event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_init_db_creates_schema_and_sets_version(temp_engine):
+    """测试新数据库初始化后结构版本为最新"""
+    db_module.init_db()
+    with temp_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA user_version")).scalar() == latest_version()
+        tables = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))}
+    assert {"transactions", "todos", "tags", "monthly_category_rollup"} <= tables
+
+
+def test_init_db_fast_path(temp_engine, monkeypatch):
+    """测试结构已是最新版本时只读取一次版本号，同一进程内不再访问数据库"""
+    db_module.init_db()
+    # 模拟新进程启动
+    monkeypatch.setattr(db_module, "_initialized_engine", None)
+
+    statements, stop = _capture_statements(temp_engine)
+    try:
+        db_module.init_db()
+        assert statements == ["PRAGMA user_version"]
+        db_module.init_db()
+        assert statements == ["PRAGMA user_version"]
+    finally:
+        stop()
+
+
+def test_init_db_upgrades_outdated_schema(temp_engine, monkeypatch):
+    """测试结构版本落后时执行迁移"""
+    db_module.init_db()
+    with temp_engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_transactions_created_at"))
+        conn.execute(text("PRAGMA user_version = 0"))
+    monkeypatch.setattr(db_module, "_initialized_engine", None)
+
+    db_module.init_db()
+    with temp_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA user_version")).scalar() == latest_version()
+        indexes = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    assert "ix_transactions_created_at" in indexes
@@ -0,0 +1,139 @@
+"""导出服务单元测试"""
+import csv
+import gzip
+import io
+import json
+import sqlite3
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base
+from cashlog.models.todo import TodoStatus
+from cashlog.services.export_service import ExportService
+from cashlog.services.todo_service import TodoService
+from cashlog.services.transaction_service import TransactionService
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def db_session():
+    """创建测试数据库会话，并写入几条交易和待办"""
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    TransactionService.import_transactions(db, io.StringIO(
+        "amount,category,tags,notes,created_at\n"
+        "5000,工资,收入,,2023-11-30 09:00:00\n"
+        "-30.5,餐饮,\"午餐,工作日\",O'Brien的店,2023-12-01 12:00:00\n"
+        "-12,交通,,,2023-12-02 08:00:00\n"
+    ))
+    TodoService.create_todo(db, {"content": "写周报", "category": "工作", "tags": "重要"})
+
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def test_export_csv_with_filters(db_session, tmp_path):
+    """测试按月份和标签筛选导出CSV"""
+    output_path = tmp_path / "ledger.csv"
+    result = ExportService.export_table(db_session, str(output_path), month="2023-12", tags="午餐", chunk_size=1)
+    assert result == {"rows": 1, "path": str(output_path)}
+
+    with open(output_path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 1
+    assert rows[0]["category"] == "餐饮"
+    assert rows[0]["tags"] == "午餐,工作日"
+    assert rows[0]["created_at"] == "2023-12-01 12:00:00"
+    assert not (tmp_path / "ledger.csv.part").exists()
+
+
+def test_export_jsonl_gzip_by_suffix(db_session, tmp_path):
+    """测试根据文件后缀自动压缩，并按ID顺序导出"""
+    output_path = tmp_path / "ledger.jsonl.gz"
+    result = ExportService.export_table(db_session, str(output_path), file_format="jsonl")
+    assert result["rows"] == 3
+
+    with gzip.open(output_path, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["id"] for row in rows] == [1, 2, 3]
+    assert rows[0]["notes"] is None
+
+
+def test_export_sql_roundtrip(db_session, tmp_path):
+    """测试SQL导出可以导入到新的数据库，时间和枚举保持存储形式"""
+    for table in ("transactions", "todos"):
+        ExportService.export_table(db_session, str(tmp_path / f"{table}.sql"), table=table, file_format="sql")
+
+    target_path = tmp_path / "target.db"
+    engine = create_engine(f"sqlite:///{target_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    conn = sqlite3.connect(target_path)
+    try:
+        for table in ("transactions", "todos"):
+            conn.executescript((tmp_path / f"{table}.sql").read_text(encoding="utf-8"))
+    finally:
+        conn.close()
+
+    db = sessionmaker(bind=create_engine(f"sqlite:///{target_path}"))()
+    transactions = TransactionService.get_transactions(db)
+    assert [t.notes for t in transactions if t.category == "餐饮"] == ["O'Brien的店"]
+    assert TransactionService.get_transactions(db, month="2023-11")[0].amount == 5000
+    assert TodoService.get_todos(db)[0].status == TodoStatus.TODO
+    db.close()
+
+
+def test_export_roundtrip_keeps_tag_links(db_session, tmp_path):
+    """测试SQL和CSV导出重新导入后，按标签筛选的结果与源库一致"""
+    for table in ("transactions", "todos"):
+        ExportService.export_table(db_session, str(tmp_path / f"{table}.sql"), table=table, file_format="sql")
+    ExportService.export_table(db_session, str(tmp_path / "transactions.csv"))
+
+    target_path = tmp_path / "target.db"
+    engine = create_engine(f"sqlite:///{target_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    conn = sqlite3.connect(target_path)
+    try:
+        for table in ("transactions", "todos"):
+            conn.executescript((tmp_path / f"{table}.sql").read_text(encoding="utf-8"))
+    finally:
+        conn.close()
+
+    db = sessionmaker(bind=create_engine(f"sqlite:///{target_path}"))()
+    assert [t.category for t in TransactionService.get_transactions(db, tags="午餐")] == ["餐饮"]
+    assert [t.category for t in TransactionService.get_transactions(
+        db, tags="午餐,收入", tags_match="any")] == ["餐饮", "工资"]
+    assert [t.content for t in TodoService.get_todos(db, tags="重要")] == ["写周报"]
+    db.close()
+
+    csv_engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=csv_engine)
+    csv_db = sessionmaker(bind=csv_engine)()
+    with open(tmp_path / "transactions.csv", encoding="utf-8", newline="") as stream:
+        assert TransactionService.import_transactions(csv_db, stream)["imported"] == 3
+    assert [t.category for t in TransactionService.get_transactions(csv_db, tags="工作日")] == ["餐饮"]
+    csv_db.close()
+
+
+def test_export_invalid_options(db_session, tmp_path):
+    """测试无效参数和已存在的文件"""
+    output_path = tmp_path / "ledger.csv"
+    output_path.write_text("old", encoding="utf-8")
+    with pytest.raises(FileExistsError):
+        ExportService.export_table(db_session, str(output_path))
+    assert output_path.read_text(encoding="utf-8") == "old"
+
+    with pytest.raises(ValueError, match="不支持的筛选条件: month"):
+        ExportService.export_table(db_session, str(tmp_path / "todos.csv"), table="todos", month="2023-12")
+    with pytest.raises(ValueError, match="导出格式无效"):
+        ExportService.export_table(db_session, str(tmp_path / "a.xml"), file_format="xml")
+    with pytest.raises(ValueError, match="必须以.gz为后缀"):
+        ExportService.export_table(db_session, str(tmp_path / "a.csv"), compress="gzip")
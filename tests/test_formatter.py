@@ -0,0 +1,65 @@
+"""格式化工具单元测试"""
+import csv
+import io
+import json
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from cashlog.models.todo import TodoStatus
+from cashlog.utils.formatter import Formatter, TRANSACTION_FIELDS, TODO_FIELDS
+
+
+def _transactions():
+    return [
+        SimpleNamespace(id=2, amount_cents=-1250, category="餐饮", tags="午餐,工作日", notes="含\t制表符\n换行",
+                        created_at=datetime(2023, 12, 1, 12, 0, 0)),
+        SimpleNamespace(id=1, amount_cents=500000, category="工资", tags=None, notes=None,
+                        created_at=datetime(2023, 12, 1, 9, 30, 0, 123456)),
+    ]
+
+
+def test_write_rows_tsv():
+    """测试TSV输出转义制表符和换行，空值输出为空串"""
+    stream = io.StringIO()
+    count = Formatter.write_rows(iter(_transactions()), TRANSACTION_FIELDS, "tsv", stream)
+    assert count == 2
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "id\tamount\ttype\tcategory\ttags\tnotes\tcreated_at"
+    assert lines[1] == "2\t-12.50\texpense\t餐饮\t午餐,工作日\t含\\t制表符\\n换行\t2023-12-01 12:00:00"
+    assert lines[2] == "1\t5000.00\tincome\t工资\t\t\t2023-12-01 09:30:00.123456"
+
+
+def test_write_rows_csv_roundtrip():
+    """测试CSV输出可被csv模块还原"""
+    stream = io.StringIO()
+    Formatter.write_rows(iter(_transactions()), TRANSACTION_FIELDS, "csv", stream)
+    rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert rows[0]["tags"] == "午餐,工作日"
+    assert rows[0]["notes"] == "含\t制表符\n换行"
+    assert rows[1]["notes"] == ""
+
+
+def test_write_rows_jsonl():
+    """测试JSONL输出枚举取值、时间字符串和null"""
+    todo = SimpleNamespace(id=1, content="写周报", category="工作", status=TodoStatus.DOING, tags=None,
+                           deadline=None, created_at=datetime(2023, 12, 1, 8, 0, 0))
+    stream = io.StringIO()
+    Formatter.write_rows([todo], TODO_FIELDS, "jsonl", stream)
+    row = json.loads(stream.getvalue())
+    assert row["status"] == "doing"
+    assert row["deadline"] is None
+    assert row["created_at"] == "2023-12-01 08:00:00"
+
+
+def test_write_rows_invalid_format():
+    """测试不支持的输出格式"""
+    with pytest.raises(ValueError, match="不支持的输出格式"):
+        Formatter.write_rows([], TRANSACTION_FIELDS, "table", io.StringIO())
+
+
+def test_format_money():
+    """测试以分为单位的金额按整数格式化为两位小数"""
+    assert Formatter.format_money(-1250) == "-12.50"
+    assert Formatter.format_money(5) == "0.05"
+    assert Formatter.format_money(-5) == "-0.05"
+    assert Formatter.format_money(123456789) == "1234567.89"
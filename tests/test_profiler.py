@@ -0,0 +1,100 @@
+"""命令耗时分析单元测试"""
+import builtins
+import json
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base
+from cashlog.models.transaction import Transaction
+from cashlog.services.transaction_service import TransactionService
+from cashlog.utils.formatter import Formatter
+from cashlog.utils.profiler import N_PLUS_ONE_THRESHOLD, CommandProfiler, _FULL_SCAN
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def db_session():
+    """创建测试数据库会话，并写入几条交易"""
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    for i in range(3):
+        TransactionService.create_transaction(db, {"amount": str(-10 - i), "category": "餐饮", "notes": f"午餐{i}"})
+
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def test_profiler_records_statements_and_rows(db_session, tmp_path):
+    """测试记录语句、返回行数和ORM对象数，并写出JSON"""
+    profiler = CommandProfiler()
+    profiler.start()
+    transactions = TransactionService.get_transactions(db_session, limit=2)
+    output_path = tmp_path / "profile.json"
+    result = profiler.finish(summary=False, output_path=str(output_path))
+
+    assert len(transactions) == 2
+    assert result["sql"]["statements"] == 1
+    assert result["sql"]["rows"] == 2
+    assert result["sql"]["orm_objects"] == 2
+    assert result["sql"]["queries"][0]["sql"].startswith("SELECT transactions.id")
+    assert result["phases_ms"]["sql"] > 0
+    assert json.loads(output_path.read_text(encoding="utf-8"))["sql"]["statements"] == 1
+
+
+def test_profiler_flags_n_plus_one_and_full_scan(db_session):
+    """测试重复执行的查询和全表扫描会产生警告"""
+    profiler = CommandProfiler()
+    profiler.start()
+    for transaction_id in range(1, N_PLUS_ONE_THRESHOLD + 1):
+        db_session.get(Transaction, transaction_id)
+        db_session.expunge_all()
+    db_session.query(Transaction).filter(Transaction.notes == "午餐1").all()
+    result = profiler.finish(summary=False)
+
+    types = [warning["type"] for warning in result["warnings"]]
+    assert types == ["N+1", "全表扫描"]
+    assert "transactions 表未使用索引" in result["warnings"][1]["message"]
+
+
+
+@pytest.mark.parametrize("detail, table", [
+    ("SCAN transactions", "transactions"),
+    ("SCAN TABLE transactions", "transactions"),
+    ("SCAN TABLE transactions AS t", "transactions"),
+    ("SCAN transactions USING INDEX ix_transactions_created_at", None),
+    ("SCAN TABLE transactions USING COVERING INDEX ix_transactions_created_at", None),
+    ("SCAN transactions_fts VIRTUAL TABLE INDEX 0:M1", None),
+])
+def test_full_scan_pattern_matches_old_and_new_plan_text(detail, table):
+    """测试新旧版本SQLite的查询计划文本都能识别全表扫描"""
+    match = _FULL_SCAN.match(detail)
+    assert (match.group(1) if match else None) == table
+
+def test_profiler_phases_and_restore(db_session, capsys):
+    """测试渲染阶段扣除其中的SQL时间，结束后还原全部钩子"""
+    original_import = builtins.__import__
+    original_print_text = Formatter.__dict__["print_text"]
+
+    profiler = CommandProfiler(trace_sql=True)
+    profiler.start()
+    Formatter.write_rows(TransactionService.iter_transactions(db_session), {"id": lambda t: t.id}, "tsv")
+    result = profiler.finish()
+
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == ["id", "3", "2", "1"]
+    assert "[SQL" in captured.err and "3行]" in captured.err
+    assert "耗时分析" in captured.err
+    assert result["phases_ms"]["render"] > 0
+    assert sum(result["phases_ms"].values()) == pytest.approx(result["total_ms"], abs=0.01)
+
+    assert builtins.__import__ is original_import
+    assert Formatter.__dict__["print_text"] is original_print_text
+    TransactionService.get_transactions(db_session)
+    assert profiler.result()["sql"]["statements"] == result["sql"]["statements"]
@@ -0,0 +1,240 @@
+"""查询计划与结构迁移单元测试"""
+import sqlite3
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from cashlog.models.db import Base
+from cashlog.models.migrations import run_migrations, get_schema_version, latest_version
+from cashlog.services.transaction_service import TransactionService
+from cashlog.services.todo_service import TodoService
+from cashlog.services.report_service import ReportService
+
+# 使用内存数据库进行测试
+TEST_DATABASE_URL = "sqlite:///:memory:"
+
+
+@pytest.fixture
+def engine():
+    """创建测试数据库引擎"""
+    engine = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield engine
+    finally:
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+@pytest.fixture
+def db_session(engine):
+    """创建测试数据库会话"""
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def capture_query_plans(db, func):
+    """
+    执行func并返回其中每条SELECT语句的查询计划
+
+    Returns:
+        查询计划明细列表，每项为一条语句的计划行
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    plans = []
+    for statement, parameters in statements:
+        rows = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        plans.append([row[-1] for row in rows])
+    return plans
+
+
+def assert_uses_index(plans, table):
+    """断言每条查询计划访问table时都使用了索引"""
+    assert plans, "未捕获到任何查询"
+    for plan in plans:
+        accesses = [step for step in plan if f" {table}" in step]
+        assert accesses, f"查询计划未访问表 {table}: {plan}"
+        for step in accesses:
+            assert "USING" in step and ("INDEX" in step or "PRIMARY KEY" in step), f"查询未使用索引: {plan}"
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"month": "2023-12"},
+    {"category": "餐饮"},
+    {"category": "餐饮", "month": "2023-12"},
+    {"transaction_type": "income"},
+    {"transaction_type": "expense", "month": "2023-12"},
+])
+def test_get_transactions_uses_index(db_session, filters):
+    """测试交易查询使用索引"""
+    plans = capture_query_plans(db_session, lambda: TransactionService.get_transactions(db_session, **filters))
+    assert_uses_index(plans, "transactions")
+
+
+def test_tag_filter_uses_index(db_session):
+    """测试标签筛选通过标签表和关联表索引完成"""
+    plans = capture_query_plans(db_session, lambda: TransactionService.get_transactions(
+        db_session, tags="餐饮,午餐", tags_match="all"
+    ))
+    assert_uses_index(plans, "transactions")
+    assert_uses_index(plans, "tags")
+    assert_uses_index(plans, "transaction_tags")
+
+
+@pytest.mark.parametrize("filters", [
+    {"status": "todo"},
+    {"status": "doing", "deadline_before": "2023-12-31"},
+    {"category": "工作"},
+])
+def test_get_todos_uses_index(db_session, filters):
+    """测试待办查询使用索引"""
+    plans = capture_query_plans(db_session, lambda: TodoService.get_todos(db_session, **filters))
+    assert_uses_index(plans, "todos")
+
+
+@pytest.mark.parametrize("service", [TransactionService.get_transactions, TodoService.get_todos])
+def test_keyset_page_uses_index_order(db_session, service):
+    """测试键集分页沿 created_at 索引读取，不需要额外排序"""
+    TransactionService.create_transaction(db_session, {"amount": "-1", "category": "餐饮"})
+    TodoService.create_todo(db_session, {"content": "任务", "category": "工作"})
+
+    plans = capture_query_plans(db_session, lambda: service(db_session, limit=20, after_id=1))
+    page_plans = [plan for plan in plans if not any("PRIMARY KEY" in step for step in plan)]
+    assert page_plans
+    for plan in page_plans:
+        assert any("SEARCH" in step and "created_at<?" in step for step in plan), plan
+        assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_search_uses_full_text_index(db_session):
+    """测试全文检索先走FTS5索引，再按主键回表"""
+    plans = capture_query_plans(db_session, lambda: TransactionService.search_transactions(
+        db_session, "dinner", category="餐饮"
+    ))
+    steps = [step for plan in plans for step in plan]
+    assert any(step.startswith("SCAN transactions_fts VIRTUAL TABLE INDEX") for step in steps), steps
+    assert "SEARCH transactions USING INTEGER PRIMARY KEY (rowid=?)" in steps
+    assert not any(step.startswith("SCAN transactions ") for step in steps), steps
+
+
+def test_monthly_report_uses_index(db_session):
+    """测试月度报表查询使用索引"""
+    plans = capture_query_plans(db_session, lambda: ReportService.generate_monthly_report(db_session, "2023-12"))
+    assert_uses_index(plans, "monthly_category_rollup")
+
+
+def test_range_report_uses_index(db_session):
+    """测试按周统计的区间报表沿交易时间索引读取"""
+    plans = capture_query_plans(db_session, lambda: ReportService.generate_range_report(
+        db_session, "2023-10-01", "2023-12-31", by="week"
+    ))
+    assert_uses_index(plans, "transactions")
+
+
+@pytest.mark.parametrize("sqlite_version", [None, (3, 34, 1)], ids=["current-sqlite", "sqlite-3.34"])
+def test_run_migrations_upgrades_existing_database(tmp_path, monkeypatch, sqlite_version):
+    """测试迁移为旧版本数据库补建索引并记录版本号，不支持 DROP COLUMN 和 trigram 的SQLite同样可以升级"""
+    if sqlite_version:
+        monkeypatch.setattr(sqlite3, "sqlite_version_info", sqlite_version)
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # 模拟仅有id索引的旧版表结构
+        conn.execute(text(
+            "CREATE TABLE transactions (id INTEGER PRIMARY KEY, amount FLOAT NOT NULL, "
+            "category VARCHAR(50) NOT NULL, tags VARCHAR(200), notes TEXT, "
+            "created_at DATETIME NOT NULL, updated_at DATETIME)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE todos (id INTEGER PRIMARY KEY, content TEXT NOT NULL, "
+            "category VARCHAR(50) NOT NULL, tags VARCHAR(200), deadline DATETIME, "
+            "status VARCHAR(5) NOT NULL, created_at DATETIME NOT NULL, updated_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO transactions (amount, category, tags, created_at) VALUES "
+            "(-30.1, '餐饮', '餐饮,午餐', '2023-12-01 12:00:00'), (-4.9, '零食', ' 餐 , 日常,,餐', '2023-12-02 12:00:00')"
+        ))
+        conn.execute(text(
+            "INSERT INTO todos (content, category, tags, status, created_at) VALUES "
+            "('任务1', '工作', '重要, 紧急', 'TODO', '2023-12-01 12:00:00')"
+        ))
+    Base.metadata.create_all(bind=engine)
+
+    applied = run_migrations(engine)
+    assert applied == list(range(1, latest_version() + 1))
+    assert run_migrations(engine) == []
+
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == latest_version()
+        indexes = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type='index'"))}
+    assert {
+        "ix_transactions_created_at",
+        "ix_transactions_category_created_at",
+        "ix_todos_status_deadline",
+        "ix_todos_category_created_at",
+        "ix_todos_created_at",
+    } <= indexes
+    # 浮点金额已转换为整数分，旧列已删除
+    with engine.connect() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(transactions)"))}
+        cents = [row[0] for row in conn.execute(text("SELECT amount_cents FROM transactions ORDER BY id"))]
+    assert "amount" not in columns
+    assert cents == [-3010, -490]
+    # 与 create_all 建出的表一致，金额列没有默认值，漏写金额的插入会失败
+    fresh = create_engine(TEST_DATABASE_URL)
+    Base.metadata.create_all(bind=fresh)
+    with fresh.connect() as conn:
+        expected = conn.execute(text("PRAGMA table_info(transactions)")).all()
+    fresh.dispose()
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA table_info(transactions)")).all() == expected
+        with pytest.raises(IntegrityError):
+            conn.execute(text("INSERT INTO transactions (category, created_at) VALUES ('餐饮', '2023-12-03')"))
+
+    # 旧数据的标签已回填到关联表
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    assert [t.category for t in TransactionService.get_transactions(db, tags="餐")] == ["零食"]
+    assert [t.category for t in TransactionService.get_transactions(db, tags="午餐")] == ["餐饮"]
+    assert len(TodoService.get_todos(db, tags="紧急")) == 1
+
+    # 旧数据的tags字段已规范为逗号分隔、无空白和重复项的形式
+    with engine.connect() as conn:
+        assert [row[0] for row in conn.execute(text("SELECT tags FROM transactions ORDER BY id"))] == [
+            "餐饮,午餐", "餐,日常"
+        ]
+        assert conn.execute(text("SELECT tags FROM todos")).scalar() == "重要,紧急"
+
+    # 旧数据已加入全文索引
+    assert [t.category for t in TransactionService.search_transactions(db, "餐饮,午")] == ["餐饮"]
+    assert len(TodoService.search_todos(db, "紧急")) == 1
+
+    # 旧数据已计入月度汇总
+    report_data = ReportService.generate_monthly_report(db, "2023-12")
+    assert report_data["total_expense_cents"] == 3500
+    assert report_data["transaction_count"] == 2
+
+    # 迁移后新增的交易同样进入全文索引和月度汇总
+    TransactionService.create_transaction(db, {
+        "amount": "-1.25", "category": "零食", "notes": "迁移后新增", "created_at": "2023-12-03"
+    })
+    assert [t.notes for t in TransactionService.search_transactions(db, "迁移后新增")] == ["迁移后新增"]
+    assert ReportService.generate_monthly_report(db, "2023-12")["total_expense_cents"] == 3625
+    db.close()
+    engine.dispose()
@@ -1,9 +1,12 @@
 """报表服务单元测试"""
+import csv
+import io
 import pytest
 from datetime import datetime
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from cashlog.models.db import Base
+from cashlog.models.rollup import MonthlyCategoryRollup
 from cashlog.services.transaction_service import TransactionService
 from cashlog.services.report_service import ReportService
 
@@ -70,9 +73,9 @@ def test_generate_monthly_report(sample_transactions, db_session):
     
     # 验证汇总数据
     assert report_data["month"] == "2023-12"
-    assert report_data["total_income"] == 6000.00  # 5000 + 1000
-    assert report_data["total_expense"] == 3500.00  # 1000 + 500 + 2000
-    assert report_data["balance"] == 2500.00  # 6000 - 3500
+    assert report_data["total_income_cents"] == 600000  # 5000 + 1000
+    assert report_data["total_expense_cents"] == 350000  # 1000 + 500 + 2000
+    assert report_data["balance_cents"] == 250000  # 6000 - 3500
     assert report_data["transaction_count"] == 5
     assert report_data["has_data"] is True
     
@@ -85,11 +88,11 @@ def test_generate_monthly_report(sample_transactions, db_session):
     assert "购物" in category_stats
     
     # 验证分类金额
-    assert category_stats["工资"]["income"] == 5000.00
-    assert category_stats["奖金"]["income"] == 1000.00
-    assert category_stats["餐饮"]["expense"] == 1000.00
-    assert category_stats["交通"]["expense"] == 500.00
-    assert category_stats["购物"]["expense"] == 2000.00
+    assert category_stats["工资"]["income_cents"] == 500000
+    assert category_stats["奖金"]["income_cents"] == 100000
+    assert category_stats["餐饮"]["expense_cents"] == 100000
+    assert category_stats["交通"]["expense_cents"] == 50000
+    assert category_stats["购物"]["expense_cents"] == 200000
     
     # 验证分类占比（使用近似比较避免浮点数精度问题）
     assert abs(category_stats["工资"]["income_percentage"] - 83.33333333333334) < 1e-9  # 5000/6000*100
@@ -104,9 +107,9 @@ def test_generate_monthly_report_no_data(db_session):
     report_data = ReportService.generate_monthly_report(db_session, "2023-10")
     
     assert report_data["month"] == "2023-10"
-    assert report_data["total_income"] == 0
-    assert report_data["total_expense"] == 0
-    assert report_data["balance"] == 0
+    assert report_data["total_income_cents"] == 0
+    assert report_data["total_expense_cents"] == 0
+    assert report_data["balance_cents"] == 0
     assert report_data["category_stats"] == {}
     assert report_data["has_data"] is False
 
@@ -125,9 +128,9 @@ def test_generate_monthly_report_without_month_parameter(db_session):
         report_data = ReportService.generate_monthly_report(db_session)
         # 验证返回的数据结构正确
         assert "month" in report_data
-        assert "total_income" in report_data
-        assert "total_expense" in report_data
-        assert "balance" in report_data
+        assert "total_income_cents" in report_data
+        assert "total_expense_cents" in report_data
+        assert "balance_cents" in report_data
         assert "category_stats" in report_data
         assert "has_data" in report_data
     except Exception as e:
@@ -188,3 +191,130 @@ def test_format_report_no_data_markdown(db_session):
     
     assert "# 2023-10 月度收支报表" in markdown_report
     assert "暂无数据" in markdown_report
+
+
+def test_generate_monthly_report_mixed_category(db_session):
+    """测试同一分类同时包含收入和支出时的聚合结果"""
+    for amount in ("300.00", "-100.00", "-50.00"):
+        TransactionService.create_transaction(db_session, {
+            "amount": amount,
+            "category": "理财",
+            "created_at": "2023-09-10 10:00:00"
+        })
+
+    report_data = ReportService.generate_monthly_report(db_session, "2023-09")
+
+    stats = report_data["category_stats"]["理财"]
+    assert stats["income_cents"] == 30000
+    assert stats["expense_cents"] == 15000
+    assert stats["count"] == 3
+    assert stats["income_percentage"] == 100
+    assert stats["expense_percentage"] == 100
+    assert report_data["transaction_count"] == 3
+    assert report_data["balance_cents"] == 15000
+
+
+def test_monthly_report_sums_are_exact(db_session):
+    """测试大量小额交易的汇总没有浮点累积误差"""
+    for _ in range(1000):
+        TransactionService.create_transaction(db_session, {
+            "amount": "-0.10",
+            "category": "零钱",
+            "created_at": "2023-08-10 10:00:00"
+        })
+
+    report_data = ReportService.generate_monthly_report(db_session, "2023-08")
+    assert report_data["total_expense_cents"] == 10000
+    assert "总支出: 100.00" in ReportService.format_report(report_data)
+
+
+def test_rollup_tracks_update_and_delete(sample_transactions, db_session):
+    """测试交易修改和删除后月度汇总同步更新"""
+    # 将餐饮支出移到11月，并删除交通支出
+    db_session.execute(text(
+        "UPDATE transactions SET created_at = '2023-11-05 12:00:00' WHERE category = '餐饮'"
+    ))
+    db_session.execute(text("DELETE FROM transactions WHERE category = '交通'"))
+    db_session.commit()
+
+    december = ReportService.generate_monthly_report(db_session, "2023-12")
+    assert set(december["category_stats"]) == {"工资", "奖金", "购物"}
+    assert december["total_expense_cents"] == 200000
+    assert december["transaction_count"] == 3
+
+    november = ReportService.generate_monthly_report(db_session, "2023-11")
+    assert november["category_stats"]["餐饮"]["expense_cents"] == 100000
+    assert november["balance_cents"] == 350000
+
+
+def test_rebuild_rollups(sample_transactions, db_session):
+    """测试全量重建月度汇总"""
+    expected = ReportService.generate_monthly_report(db_session, "2023-12")
+    db_session.query(MonthlyCategoryRollup).delete()
+    db_session.commit()
+    assert ReportService.generate_monthly_report(db_session, "2023-12")["has_data"] is False
+
+    assert ReportService.rebuild_rollups(db_session) == 6
+    db_session.commit()
+    assert ReportService.generate_monthly_report(db_session, "2023-12") == expected
+
+
+def test_generate_range_report_by_month(sample_transactions, db_session):
+    """测试按月区间报表包含无交易的月份，合计与月度报表一致"""
+    report_data = ReportService.generate_range_report(db_session, "2023-10", "2023-12")
+
+    assert report_data["periods"] == ["2023-10", "2023-11", "2023-12"]
+    assert report_data["period_totals"]["2023-10"] == {"income_cents": 0, "expense_cents": 0, "count": 0}
+    assert report_data["period_totals"]["2023-11"]["income_cents"] == 450000
+    assert report_data["category_stats"]["工资"]["2023-12"]["income_cents"] == 500000
+    assert report_data["category_totals"]["工资"] == {"income_cents": 950000, "expense_cents": 0, "count": 2}
+    assert report_data["balance_cents"] == 250000 + 450000
+    assert report_data["transaction_count"] == 6
+
+
+def test_generate_range_report_by_week_and_day(sample_transactions, db_session):
+    """测试按周、按日统计及精确到日的起止时间"""
+    weekly = ReportService.generate_range_report(db_session, "2023-12-01", "2023-12-10", by="week")
+    # 2023-12-01 为周五，所在周从 11-27 开始；12-10 为周日，不含 12-11 起的一周
+    assert weekly["periods"] == ["2023-11-27", "2023-12-04"]
+    assert weekly["category_stats"]["工资"] == {"2023-11-27": {"income_cents": 500000, "expense_cents": 0, "count": 1}}
+    assert weekly["period_totals"]["2023-12-04"]["expense_cents"] == 150000
+    assert weekly["transaction_count"] == 3
+
+    daily = ReportService.generate_range_report(db_session, "2023-12-05", "2023-12-05", by="day")
+    assert daily["periods"] == ["2023-12-05"]
+    assert set(daily["category_stats"]) == {"餐饮"}
+
+
+def test_generate_range_report_invalid(db_session):
+    """测试区间报表参数校验"""
+    with pytest.raises(ValueError, match="YYYY-MM或YYYY-MM-DD"):
+        ReportService.generate_range_report(db_session, "2023/12")
+    with pytest.raises(ValueError, match="起始时间不能晚于结束时间"):
+        ReportService.generate_range_report(db_session, "2023-12", "2023-11")
+    with pytest.raises(ValueError, match="统计周期应为"):
+        ReportService.generate_range_report(db_session, "2023-12", by="year")
+    with pytest.raises(ValueError, match="统计周期过多"):
+        ReportService.generate_range_report(db_session, "2000-01", "2023-12", by="day")
+
+
+def test_format_range_report_pivot(sample_transactions, db_session):
+    """测试分类×周期透视表的文本、Markdown和CSV输出"""
+    report_data = ReportService.generate_range_report(db_session, "2023-11", "2023-12")
+
+    text_report = ReportService.format_range_report(report_data, "text", pivot="category")
+    assert "2023-11-01 至 2023-12-31 收支报表（按月）" in text_report
+    assert "分类统计（净额）" in text_report
+
+    markdown_report = ReportService.format_range_report(report_data, "markdown", pivot="category", value="expense")
+    assert "| 分类 | 2023-11 | 2023-12 | 合计 |" in markdown_report
+    assert "| 购物 | 0.00 | 2000.00 | 2000.00 |" in markdown_report
+
+    rows = list(csv.reader(io.StringIO(ReportService.format_range_report(report_data, "csv", pivot="category"))))
+    assert rows[0] == ["分类", "2023-11", "2023-12", "合计"]
+    assert rows[1] == ["工资", "4500.00", "5000.00", "9500.00"]
+    assert rows[-1] == ["合计", "4500.00", "2500.00", "7000.00"]
+
+    rows = list(csv.reader(io.StringIO(ReportService.format_range_report(report_data, "csv"))))
+    assert rows[0] == ["周期", "收入", "支出", "结余", "笔数"]
+    assert rows[-1] == ["合计", "10500.00", "3500.00", "7000.00", "6"]
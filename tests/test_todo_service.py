@@ -5,7 +5,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from cashlog.models.db import Base, get_db
 from cashlog.models.todo import Todo, TodoStatus
+from cashlog.models.records import TodoRecord
 from cashlog.services.todo_service import TodoService
+from cashlog.utils.formatter import Formatter
 
 # 使用内存数据库进行测试
 TEST_DATABASE_URL = "sqlite:///:memory:"
@@ -145,6 +147,47 @@ def test_get_todos_by_deadline(db_session):
     assert after_todos[0].content == "任务2"
 
 
+def test_get_todos_by_tags(db_session):
+    """测试按标签精确查询待办事项"""
+    TodoService.create_todo(db_session, {
+        "content": "任务1",
+        "category": "工作",
+        "tags": "重要,紧急"
+    })
+    TodoService.create_todo(db_session, {
+        "content": "任务2",
+        "category": "工作",
+        "tags": "重要性低"
+    })
+
+    assert [t.content for t in TodoService.get_todos(db_session, tags="重要")] == ["任务1"]
+    assert len(TodoService.get_todos(db_session, tags="重要,重要性低")) == 2
+    assert TodoService.get_todos(db_session, tags="重要,重要性低", tags_match="all") == []
+
+
+def test_get_todos_keyset_pagination(db_session):
+    """测试待办事项键集分页和流式查询"""
+    for i in range(3):
+        TodoService.create_todo(db_session, {"content": f"任务{i}", "category": "工作"})
+
+    first = TodoService.get_todos(db_session, limit=2)
+    assert len(first) == 2
+    rest = TodoService.get_todos(db_session, limit=2, after_id=first[-1].id)
+    assert [t.id for t in first + rest] == [t.id for t in TodoService.get_todos(db_session)]
+    assert [t.id for t in TodoService.iter_todos(db_session, batch_size=1)] == [3, 2, 1]
+
+
+def test_search_todos(db_session):
+    """测试待办全文检索与状态筛选"""
+    TodoService.create_todo(db_session, {"content": "准备季度汇报材料", "category": "工作"})
+    TodoService.create_todo(db_session, {"content": "买菜", "category": "个人", "tags": "季度汇报"})
+    TodoService.update_todo_status(db_session, 2, "done")
+
+    assert {t.id for t in TodoService.search_todos(db_session, "季度汇报")} == {1, 2}
+    assert [t.id for t in TodoService.search_todos(db_session, "季度汇报", status="done")] == [2]
+    assert [t.id for t in TodoService.search_todos(db_session, "买菜")] == [2]
+
+
 def test_update_todo_status_success(db_session):
     """测试成功更新待办事项状态"""
     # 创建测试数据
@@ -196,3 +239,51 @@ def test_get_todo_by_id(db_session):
     # 查询不存在的ID
     not_found = TodoService.get_todo_by_id(db_session, 999)
     assert not_found is None
+
+
+def test_bulk_update_status_by_ids_and_filters(db_session):
+    """测试按ID范围和筛选条件批量更新状态"""
+    for i in range(1, 11):
+        TodoService.create_todo(db_session, {
+            "content": f"任务{i}",
+            "category": "工作" if i % 2 else "生活",
+            "tags": "迭代" if i <= 6 else None,
+            "deadline": f"2023-12-{i:02d}"
+        })
+
+    assert TodoService.bulk_update_status(db_session, "done", ["1,3", "5-8"], dry_run=True) == 6
+    assert db_session.query(Todo).filter(Todo.status == TodoStatus.DONE).count() == 0
+
+    assert TodoService.bulk_update_status(db_session, "done", ["1,3", "5-8"], category="工作") == 4
+    done = [todo.id for todo in db_session.query(Todo).filter(Todo.status == TodoStatus.DONE).order_by(Todo.id)]
+    assert done == [1, 3, 5, 7]
+
+    # 已经是目标状态的待办事项不计入
+    assert TodoService.bulk_update_status(db_session, "done", tags="迭代", deadline_before="2023-12-05") == 2
+    assert TodoService.bulk_update_status(db_session, "done", ["1-10"]) == 4
+
+
+def test_bulk_update_status_invalid(db_session):
+    """测试批量更新参数无效"""
+    with pytest.raises(ValueError, match="请指定待办事项ID或筛选条件"):
+        TodoService.bulk_update_status(db_session, "done")
+    with pytest.raises(ValueError, match="ID格式无效"):
+        TodoService.bulk_update_status(db_session, "done", ["1,a"])
+    with pytest.raises(ValueError, match="ID范围无效"):
+        TodoService.bulk_update_status(db_session, "done", ["9-3"])
+    with pytest.raises(ValueError, match="状态无效"):
+        TodoService.bulk_update_status(db_session, "closed", ["1"])
+
+
+def test_list_records_match_orm_results(db_session):
+    """测试待办只读记录与ORM对象的格式化输出一致"""
+    TodoService.create_todo(db_session, {"content": "写周报", "category": "工作", "deadline": "2023-12-01"})
+    todo = TodoService.create_todo(db_session, {"content": "买菜", "category": "生活", "tags": "日常"})
+    TodoService.update_todo_status(db_session, todo.id, "doing")
+
+    records = TodoService.list_records(db_session, include_content=True)
+    assert all(isinstance(record, TodoRecord) for record in records)
+    assert Formatter.format_todos(records) == Formatter.format_todos(TodoService.get_todos(db_session))
+    assert records[0].status == TodoStatus.DOING and records[0].status_text == "进行中"
+    assert [record.content for record in TodoService.iter_records(db_session, status="doing")] == [None]
+    assert [record.id for record in TodoService.search_records(db_session, "周报")] == [1]
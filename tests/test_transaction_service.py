@@ -1,11 +1,21 @@
 """交易服务单元测试"""
+import io
+import json
+import sqlite3
 import pytest
 from datetime import datetime
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine.default import CACHE_HIT
 from sqlalchemy.orm import sessionmaker
-from cashlog.models.db import Base, get_db
+from cashlog.models.db import Base, get_db, invalidate_init_cache
+from cashlog.models.migrations import get_schema_version, latest_version, run_migrations
 from cashlog.models.transaction import Transaction
+from cashlog.models.rollup import MonthlyCategoryRollup
+from cashlog.models.tag import transaction_tags
+from cashlog.models.records import TransactionRecord
+from cashlog.utils.formatter import Formatter
 from cashlog.services.transaction_service import TransactionService
+from cashlog.services.tag_service import TagService
 
 # 使用内存数据库进行测试
 TEST_DATABASE_URL = "sqlite:///:memory:"
@@ -55,6 +65,19 @@ def test_create_transaction_invalid_amount(db_session):
         TransactionService.create_transaction(db_session, transaction_data)
 
 
+def test_create_transaction_amount_in_cents(db_session):
+    """测试金额以分为单位的整数保存，超过两位小数被拒绝"""
+    transaction = TransactionService.create_transaction(db_session, {"amount": 0.1, "category": "零钱"})
+    assert transaction.amount_cents == 10
+    assert str(transaction.amount) == "0.10"
+
+    for amount in ("1.005", "nan"):
+        with pytest.raises(ValueError):
+            TransactionService.create_transaction(db_session, {"amount": amount, "category": "零钱"})
+    with pytest.raises(ValueError, match="金额最多保留两位小数"):
+        TransactionService.create_transaction(db_session, {"amount": "1.005", "category": "零钱"})
+
+
 def test_create_transaction_missing_category(db_session):
     """测试缺少分类"""
     transaction_data = {
@@ -90,6 +113,42 @@ def test_create_transaction_invalid_datetime(db_session):
         TransactionService.create_transaction(db_session, transaction_data)
 
 
+def test_create_transaction_accepts_import_datetime_formats(db_session):
+    """测试新增交易与批量导入接受相同的时间格式"""
+    transaction = TransactionService.create_transaction(db_session, {
+        "amount": "-10",
+        "category": "餐饮",
+        "created_at": "2023-12-01T08:30:15"
+    })
+    assert transaction.created_at == datetime(2023, 12, 1, 8, 30, 15)
+
+
+
+@pytest.mark.parametrize("value", [
+    "2023-12-01T08:30:15+08:00",
+    "2023-12-01 08:30:15Z",
+    "20231201T083015",
+    "2023-12-01 08:30:15.1",
+])
+def test_create_transaction_rejects_undocumented_datetime(db_session, value):
+    """测试带时区或不在文档格式内的时间被拒绝，且提示列出可用格式"""
+    with pytest.raises(ValueError, match="时间格式不正确.*YYYY-MM-DD HH:MM.*不支持时区"):
+        TransactionService.create_transaction(db_session, {
+            "amount": "-10",
+            "category": "餐饮",
+            "created_at": value
+        })
+
+
+def test_create_transaction_accepts_fractional_seconds(db_session):
+    """测试可导入list/export输出的带微秒时间"""
+    transaction = TransactionService.create_transaction(db_session, {
+        "amount": "-10",
+        "category": "餐饮",
+        "created_at": "2023-12-01 08:30:15.938449"
+    })
+    assert transaction.created_at == datetime(2023, 12, 1, 8, 30, 15, 938449)
+
 def test_get_transactions_by_month(db_session):
     """测试按月份查询交易"""
     # 创建测试数据
@@ -158,6 +217,143 @@ def test_get_transactions_by_type(db_session):
     assert expense_transactions[0].amount < 0
 
 
+def test_get_transactions_by_tags(db_session):
+    """测试按标签精确查询交易"""
+    TransactionService.create_transaction(db_session, {
+        "amount": "-30.00",
+        "category": "餐饮",
+        "tags": "餐饮, 午餐"
+    })
+    TransactionService.create_transaction(db_session, {
+        "amount": "-80.00",
+        "category": "餐饮",
+        "tags": "餐饮,晚餐"
+    })
+    TransactionService.create_transaction(db_session, {
+        "amount": "-5.00",
+        "category": "零食",
+        "tags": "餐"
+    })
+
+    # 标签精确匹配，"餐"不应匹配"餐饮"
+    assert [t.tags for t in TransactionService.get_transactions(db_session, tags="餐")] == ["餐"]
+    # 默认包含任一标签即可
+    assert len(TransactionService.get_transactions(db_session, tags="午餐,晚餐")) == 2
+    # tags_match为all时需包含全部标签
+    transactions = TransactionService.get_transactions(db_session, tags="餐饮,午餐", tags_match="all")
+    assert len(transactions) == 1
+    assert transactions[0].tags == "餐饮,午餐"
+    assert TransactionService.get_transactions(db_session, tags="不存在") == []
+
+
+def test_get_transactions_keyset_pagination(db_session):
+    """测试按 (created_at, id) 键集分页，相同时间的记录不重复不遗漏"""
+    for i in range(5):
+        TransactionService.create_transaction(db_session, {
+            "amount": str(-(i + 1)),
+            "category": "餐饮",
+            "created_at": "2023-12-01 12:00:00" if i < 3 else f"2023-12-0{i} 12:00:00"
+        })
+
+    all_ids = [t.id for t in TransactionService.get_transactions(db_session)]
+    assert all_ids == [5, 4, 3, 2, 1]
+
+    pages = []
+    after_id = None
+    while True:
+        page = TransactionService.get_transactions(db_session, limit=2, after_id=after_id)
+        if not page:
+            break
+        pages.append([t.id for t in page])
+        after_id = page[-1].id
+    assert pages == [[5, 4], [3, 2], [1]]
+
+    streamed = [t.id for t in TransactionService.iter_transactions(db_session, batch_size=2, category="餐饮")]
+    assert streamed == all_ids
+
+    with pytest.raises(ValueError, match="游标记录ID 99 不存在"):
+        TransactionService.get_transactions(db_session, after_id=99)
+    with pytest.raises(ValueError, match="条数必须为正整数"):
+        TransactionService.get_transactions(db_session, limit=0)
+
+
+def test_search_transactions(db_session):
+    """测试全文检索：相关度排序、筛选条件、短关键词和索引同步"""
+    for amount, category, notes, tags, created_at in [
+        ("-80", "餐饮", "March dinner with Bob", "聚餐", "2024-03-10"),
+        ("-25", "餐饮", "工作日午餐", "午餐", "2024-03-11"),
+        ("-300", "购物", "dinner set, dinner plates", None, "2024-04-01"),
+        ("-5", "交通", "地铁", None, "2024-03-12"),
+    ]:
+        TransactionService.create_transaction(db_session, {
+            "amount": amount, "category": category, "notes": notes, "tags": tags, "created_at": created_at
+        })
+
+    # 命中次数多的排在前面，不区分大小写
+    assert [t.id for t in TransactionService.search_transactions(db_session, "DINNER")] == [3, 1]
+    assert [t.id for t in TransactionService.search_transactions(db_session, "dinner", month="2024-03")] == [1]
+    assert [t.id for t in TransactionService.search_transactions(db_session, "dinner bob")] == [1]
+    assert [t.id for t in TransactionService.search_transactions(db_session, "dinner", limit=1)] == [3]
+    # 标签也在检索范围内，两个字的关键词同样可以命中
+    assert [t.id for t in TransactionService.search_transactions(db_session, "聚餐")] == [1]
+    assert [t.id for t in TransactionService.search_transactions(db_session, "午餐", category="餐饮")] == [2]
+    assert TransactionService.search_transactions(db_session, '"dinner" OR') == []
+
+    # 修改和删除后索引同步更新
+    subway = TransactionService.get_transaction_by_id(db_session, 4)
+    subway.notes = "地铁 after dinner"
+    db_session.commit()
+    assert [t.id for t in TransactionService.search_transactions(db_session, "dinner", category="交通")] == [4]
+    db_session.delete(subway)
+    db_session.commit()
+    assert [t.id for t in TransactionService.search_transactions(db_session, "dinner")] == [3, 1]
+
+    with pytest.raises(ValueError, match="搜索关键词不能为空"):
+        TransactionService.search_transactions(db_session, "  ")
+
+
+def test_search_without_trigram_support(tmp_path, monkeypatch):
+    """测试SQLite不支持trigram时迁移给出警告而不失败，检索改用LIKE匹配"""
+    monkeypatch.setattr(sqlite3, "sqlite_version_info", (3, 31, 1))
+    engine = create_engine(f"sqlite:///{tmp_path / 'old_sqlite.db'}")
+    Base.metadata.create_all(bind=engine)
+    with pytest.warns(RuntimeWarning, match="trigram"):
+        run_migrations(engine)
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == latest_version()
+        assert conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE name LIKE '%_fts%'").first() is None
+
+    db = sessionmaker(bind=engine)()
+    for notes in ("March dinner with Bob", "工作日午餐"):
+        TransactionService.create_transaction(db, {"amount": "-10", "category": "餐饮", "notes": notes})
+    assert [t.notes for t in TransactionService.search_transactions(db, "DINNER bob")] == ["March dinner with Bob"]
+    assert [t.notes for t in TransactionService.search_transactions(db, "工作日")] == ["工作日午餐"]
+    db.close()
+    engine.dispose()
+
+
+
+def test_search_rechecks_index_after_cache_invalidation(tmp_path):
+    """测试清除初始化缓存后检索重新判断全文索引表是否存在"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'restored.db'}")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    db = sessionmaker(bind=engine)()
+    TransactionService.create_transaction(db, {"amount": "-10", "category": "餐饮", "notes": "工作日午餐"})
+    assert len(TransactionService.search_transactions(db, "工作日")) == 1
+
+    # 模拟换成一个没有全文索引的数据库
+    with engine.begin() as conn:
+        for kind, name in conn.exec_driver_sql(
+            "SELECT type, name FROM sqlite_master WHERE name LIKE '%_fts%' AND type IN ('trigger', 'table')"
+        ).all():
+            conn.exec_driver_sql(f"DROP {kind.upper()} IF EXISTS {name}")
+    invalidate_init_cache()
+
+    assert [t.notes for t in TransactionService.search_transactions(db, "工作日")] == ["工作日午餐"]
+    db.close()
+    engine.dispose()
+
 def test_get_transaction_by_id(db_session):
     """测试按ID查询交易"""
     # 创建测试数据
@@ -174,3 +370,193 @@ def test_get_transaction_by_id(db_session):
     # 查询不存在的ID
     not_found = TransactionService.get_transaction_by_id(db_session, 999)
     assert not_found is None
+
+
+def test_import_transactions_csv(db_session):
+    """测试从CSV批量导入交易"""
+    source = io.StringIO(
+        "amount,category,tags,notes,created_at\n"
+        "5000.00,工资,收入,12月份工资,2023-12-01 10:00:00\n"
+        "-35.5,餐饮,午餐,,2023-12-02\n"
+        "-8,交通,,,2023-12-03T08:30:00\n"
+    )
+
+    result = TransactionService.import_transactions(db_session, source, "csv", batch_size=2)
+
+    assert result == {"imported": 3, "rejected": 0}
+    transactions = TransactionService.get_transactions(db_session, month="2023-12")
+    assert len(transactions) == 3
+    assert transactions[0].category == "交通"
+    assert transactions[0].tags is None
+    assert transactions[2].notes == "12月份工资"
+    assert len(TransactionService.get_transactions(db_session, tags="午餐")) == 1
+
+
+def test_import_transactions_jsonl_with_rejects(db_session):
+    """测试JSONL导入时错误行写入拒绝文件"""
+    source = io.StringIO(
+        '{"amount": 100, "category": "工资", "created_at": "2023-12-01 10:00"}\n'
+        '{"amount": "abc", "category": "餐饮"}\n'
+        'not json\n'
+        '\n'
+        '{"amount": -20, "category": "餐饮", "created_at": "2023/12/01"}\n'
+        '{"amount": -20}\n'
+    )
+    rejects = io.StringIO()
+
+    result = TransactionService.import_transactions(db_session, source, "jsonl", reject_stream=rejects)
+
+    assert result == {"imported": 1, "rejected": 4}
+    rejected = [json.loads(line) for line in rejects.getvalue().splitlines()]
+    assert [r["line"] for r in rejected] == [2, 3, 5, 6]
+    assert rejected[0]["error"] == "金额需为数字"
+    assert "时间格式不正确" in rejected[2]["error"]
+    assert rejected[3]["error"] == "分类为必填项"
+
+
+
+def test_import_transactions_without_returning(tmp_path, monkeypatch):
+    """测试SQLite不支持 RETURNING 时逐行导入，标签关联到正确的交易"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old_sqlite.db'}")
+    # SQLite 3.35 之前方言会关闭 insert_returning
+    monkeypatch.setattr(engine.dialect, "insert_returning", False)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    source = io.StringIO(
+        '{"amount": 100, "category": "工资", "tags": "收入"}\n'
+        '{"amount": "abc", "category": "餐饮"}\n'
+        '{"amount": -20, "category": "餐饮", "tags": "午餐,日常"}\n'
+        '{"amount": -5, "category": "交通", "tags": "日常"}\n'
+    )
+
+    assert TransactionService.import_transactions(db, source, "jsonl", batch_size=2) == {"imported": 3, "rejected": 1}
+    assert [t.category for t in TransactionService.get_transactions(db, tags="日常")] == ["交通", "餐饮"]
+    assert [t.category for t in TransactionService.get_transactions(db, tags="收入")] == ["工资"]
+    db.close()
+    engine.dispose()
+
+def test_import_transactions_invalid_options(db_session):
+    """测试无效的导入参数"""
+    with pytest.raises(ValueError, match="导入格式无效"):
+        TransactionService.import_transactions(db_session, io.StringIO(""), "xml")
+
+    with pytest.raises(ValueError, match="批次大小必须为正整数"):
+        TransactionService.import_transactions(db_session, io.StringIO(""), "csv", batch_size=0)
+
+
+def _seed_bulk(db_session):
+    for i, (category, tags) in enumerate([("餐饮", "午餐,工作日"), ("餐饮", "晚餐"), ("杂项", None), ("杂项", "午餐")], 1):
+        TransactionService.create_transaction(db_session, {
+            "amount": -10 * i, "category": category, "tags": tags, "notes": f"记录{i}",
+            "created_at": f"2024-03-0{i} 12:00:00"
+        })
+
+
+def _tag_links(db_session):
+    return sorted(db_session.execute(transaction_tags.select()).all())
+
+
+def test_bulk_update_category_and_tags(db_session):
+    """测试批量修改分类和标签，汇总表、关联表和全文索引保持一致"""
+    _seed_bulk(db_session)
+
+    assert TransactionService.bulk_update(db_session, new_category="餐饮", category="杂项", dry_run=True) == 2
+    assert TransactionService.bulk_update(
+        db_session, ["3-4"], new_category="餐饮", add_tags="午餐,报销", remove_tags="工作日", month="2024-03"
+    ) == 2
+
+    rows = {t.id: (t.category, t.tags) for t in db_session.query(Transaction)}
+    assert rows == {1: ("餐饮", "午餐,工作日"), 2: ("餐饮", "晚餐"), 3: ("餐饮", "午餐,报销"), 4: ("餐饮", "午餐,报销")}
+    rollups = db_session.query(MonthlyCategoryRollup).all()
+    assert [(r.category, r.expense_cents, r.count) for r in rollups] == [("餐饮", 10000, 4)]
+    assert [t.id for t in TransactionService.get_transactions(db_session, tags="报销")] == [4, 3]
+    assert [t.id for t in TransactionService.search_transactions(db_session, "报销")] != []
+
+    # 按标签筛选并移除该标签：命中范围在修改前确定，分批执行不受影响
+    assert TransactionService.bulk_update(db_session, remove_tags="午餐", batch_size=1, tags="午餐") == 3
+    rows = {t.id: t.tags for t in db_session.query(Transaction)}
+    assert rows == {1: "工作日", 2: "晚餐", 3: "报销", 4: "报销"}
+    assert TransactionService.get_transactions(db_session, tags="午餐") == []
+    assert len(_tag_links(db_session)) == 4
+
+
+
+def test_bulk_update_tags_on_legacy_tag_string(db_session):
+    """测试标签字段为带空白的旧格式时，批量增删标签后字段与关联表一致"""
+    transaction = TransactionService.create_transaction(db_session, {"amount": "-10", "category": "餐饮"})
+    TagService.set_tags(db_session, transaction_tags.c.transaction_id, transaction.id, "餐饮, 日常")
+    db_session.execute(
+        Transaction.__table__.update().where(Transaction.id == transaction.id).values(tags="餐饮, 日常")
+    )
+    db_session.commit()
+
+    assert TransactionService.bulk_update(db_session, [str(transaction.id)], remove_tags="日常") == 1
+    db_session.refresh(transaction)
+    assert transaction.tags == "餐饮"
+    assert TransactionService.get_transactions(db_session, tags="日常") == []
+
+    assert TransactionService.bulk_update(db_session, [str(transaction.id)], add_tags="早餐, 餐饮") == 1
+    db_session.refresh(transaction)
+    assert transaction.tags == "餐饮,早餐"
+    assert [t.id for t in TransactionService.get_transactions(db_session, tags="早餐")] == [transaction.id]
+    assert len(_tag_links(db_session)) == 2
+
+def test_bulk_delete_transactions(db_session):
+    """测试批量删除交易，关联表和汇总表同步删除"""
+    _seed_bulk(db_session)
+
+    assert TransactionService.bulk_delete(db_session, tags="午餐", dry_run=True) == 2
+    assert db_session.query(Transaction).count() == 4
+
+    assert TransactionService.bulk_delete(db_session, category="餐饮", batch_size=1) == 2
+    assert [t.id for t in db_session.query(Transaction).order_by(Transaction.id)] == [3, 4]
+    assert [row.transaction_id for row in _tag_links(db_session)] == [4]
+    rollups = db_session.query(MonthlyCategoryRollup).all()
+    assert [(r.category, r.expense_cents, r.count) for r in rollups] == [("杂项", 7000, 2)]
+
+
+def test_bulk_operations_invalid(db_session):
+    """测试批量操作参数无效"""
+    with pytest.raises(ValueError, match="请指定交易ID或筛选条件"):
+        TransactionService.bulk_delete(db_session)
+    with pytest.raises(ValueError, match="请指定新分类"):
+        TransactionService.bulk_update(db_session, ["1"])
+    with pytest.raises(ValueError, match="同一标签不能同时添加和移除"):
+        TransactionService.bulk_update(db_session, ["1"], add_tags="a", remove_tags="a,b")
+    with pytest.raises(ValueError, match="月份格式"):
+        TransactionService.bulk_delete(db_session, month="2024")
+
+
+def test_list_records_match_orm_results(db_session):
+    """测试只读记录与ORM对象的查询结果和格式化输出一致"""
+    _seed_bulk(db_session)
+
+    records = TransactionService.list_records(db_session, include_notes=True, tags="午餐")
+    assert all(isinstance(record, TransactionRecord) for record in records)
+    orm_rows = Formatter.format_transactions(TransactionService.get_transactions(db_session, tags="午餐"))
+    assert Formatter.format_transactions(records) == orm_rows
+    assert records[0].month == "2024-03" and records[0].transaction_type == "支出"
+
+    # 默认不读取备注
+    assert [record.notes for record in TransactionService.list_records(db_session, limit=2)] == [None, None]
+    streamed = TransactionService.iter_records(db_session, batch_size=1, include_notes=True, after_id=3)
+    assert [(record.id, record.notes) for record in streamed] == [(2, "记录2"), (1, "记录1")]
+    assert [record.id for record in TransactionService.search_records(db_session, "记录3")] == [3]
+
+
+def test_list_records_use_compiled_cache(db_session):
+    """测试结构相同的只读查询复用编译缓存"""
+    _seed_bulk(db_session)
+    cache_hits = []
+    engine = db_session.get_bind()
+
+    def record_cache_hit(conn, cursor, statement, parameters, context, executemany):
+        cache_hits.append(context.cache_hit)
+
+    event.listen(engine, "before_cursor_execute", record_cache_hit)
+    try:
+        TransactionService.list_records(db_session, category="餐饮")
+        TransactionService.list_records(db_session, category="杂项")
+    finally:
+        event.remove(engine, "before_cursor_execute", record_cache_hit)
+    assert cache_hits[-1] == CACHE_HIT